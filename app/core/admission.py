@@ -0,0 +1,215 @@
+# app/core/admission.py
+
+"""
+Admission control: a memory budget for running jobs.
+
+Each job is charged an estimate of its peak memory, from the upload
+size and the spacing expansion (stations inserted per measured station,
+sampled from the head of the file). Jobs then:
+- start at once while the budget has room
+- wait in FIFO order for running jobs to release it, as long as the
+  total of waiting estimates stays within the queue allowance
+- are rejected otherwise (HTTP 429 with Retry-After)
+
+A job larger than the whole budget is charged the whole budget, so it
+runs alone instead of never.
+"""
+
+import asyncio
+import io
+import math
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from app.core.config import settings
+from app.schemas.job import JobCreateRequest
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Too many jobs are queued; retry later")
+        self.retry_after = retry_after
+
+
+# ============================================================
+# Estimate
+# ============================================================
+
+def estimate_job_bytes(upload, request: JobCreateRequest) -> int:
+    """
+    Peak memory estimate for a job: stations x per-station footprint.
+
+    Rules:
+    - rows are extrapolated from the upload size and the sampled head
+    - sparse jobs add floor(gap / spacing) stations per sampled gap,
+      for every spacing (all geometries are held until the merge)
+    - gaps across survey lines are ignored (distance restarts per line)
+    """
+    sample = upload.head(settings.admission_sample_bytes)
+    rows, inserted = _sample_geometry(sample, request)
+
+    if rows:
+        sample_rows = rows
+        rows = upload.size * rows / len(sample)
+    else:
+        sample_rows, rows = 1, upload.size / settings.admission_fallback_row_bytes
+
+    stations = rows * (1 + inserted / sample_rows)
+    return estimate_station_bytes(stations, len(request.value_columns))
+
+
+def estimate_station_bytes(stations: float, channels: int) -> int:
+    """
+    Peak memory estimate for holding `stations` stations of `channels`
+    value columns (e.g. the merge of an async job's results).
+    """
+    per_station = settings.admission_station_bytes + settings.admission_channel_bytes * channels
+    return int(math.ceil(stations * per_station))
+
+
+def _sample_geometry(sample: bytes, request: JobCreateRequest) -> Tuple[int, float]:
+    """
+    (rows, inserted stations over all spacings) in the complete lines of
+    the sample; (0, 0) if it cannot be read.
+    """
+    sample = sample[:sample.rfind(b"\n") + 1]
+    columns = [request.x_column, request.y_column]
+    if request.line_column:
+        columns.append(request.line_column)
+
+    try:
+        table = pacsv.read_csv(
+            io.BytesIO(sample),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=columns,
+                column_types={request.x_column: pa.float64(), request.y_column: pa.float64()},
+            ),
+        )
+    except (pa.ArrowInvalid, pa.ArrowKeyError):
+        return 0, 0.0
+
+    if table.num_rows < 2 or request.scenario != "sparse":
+        return table.num_rows, 0.0
+
+    x = table.column(request.x_column).to_numpy(zero_copy_only=False)
+    y = table.column(request.y_column).to_numpy(zero_copy_only=False)
+    gap = np.hypot(np.diff(x), np.diff(y))
+
+    same = np.isfinite(gap)
+    if request.line_column:
+        line = table.column(request.line_column).to_numpy(zero_copy_only=False)
+        same &= line[1:] == line[:-1]
+    gap = gap[same]
+
+    inserted = sum(float(np.floor_divide(gap, s).sum()) for s in request.station_spacings)
+    return table.num_rows, inserted
+
+
+# ============================================================
+# Budget
+# ============================================================
+
+class MemoryBudget:
+    """
+    Estimated bytes of running jobs against a fixed budget.
+
+    - admit(): at submission; counts the job as waiting or rejects it
+    - reserve(): around the job's run; waits for room in FIFO order
+
+    Runs on the event loop only, so it needs no locks.
+    """
+
+    def __init__(self, budget_bytes: int, queue_bytes: Optional[int] = None):
+        self.budget_bytes = budget_bytes
+        self.queue_bytes = budget_bytes if queue_bytes is None else queue_bytes
+
+        self.in_use = 0
+        self.waiting = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self._admitted = 0
+        self._rejected = 0
+
+    def charge(self, job_bytes: int) -> int:
+        return min(job_bytes, self.budget_bytes)
+
+    def admit(self, job_bytes: int, force: bool = False):
+        """
+        Raises AdmissionRejected if the job neither fits the budget now
+        nor the queue allowance. `force` queues it regardless (e.g. its
+        upload could not be sent again).
+        """
+        job_bytes = self.charge(job_bytes)
+        outstanding = self.in_use + self.waiting + job_bytes
+
+        if not force and outstanding > self.budget_bytes + self.queue_bytes:
+            self._rejected += 1
+            raise AdmissionRejected(settings.admission_retry_after_seconds)
+
+        self.waiting += job_bytes
+        self._admitted += 1
+
+    def withdraw(self, job_bytes: int):
+        """
+        Forgets an admitted job that will not run.
+        """
+        self.waiting -= self.charge(job_bytes)
+        self._admitted -= 1
+
+    async def reserve(self, job_bytes: int):
+        """
+        Waits until an admitted job fits, then charges it.
+        """
+        job_bytes = self.charge(job_bytes)
+
+        if not self._waiters and self.in_use + job_bytes <= self.budget_bytes:
+            self._grant(job_bytes)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((job_bytes, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(job_bytes)
+            else:
+                if (job_bytes, future) in self._waiters:
+                    self._waiters.remove((job_bytes, future))
+                self.waiting -= job_bytes
+                self._wake()
+            raise
+
+    def release(self, job_bytes: int):
+        self.in_use -= self.charge(job_bytes)
+        self._wake()
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "budget_bytes": self.budget_bytes,
+            "queue_bytes": self.queue_bytes,
+            "in_use_bytes": self.in_use,
+            "waiting_bytes": self.waiting,
+            "waiting_jobs": len(self._waiters),
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+        }
+
+    def _grant(self, job_bytes: int):
+        self.waiting -= job_bytes
+        self.in_use += job_bytes
+
+    def _wake(self):
+        while self._waiters and self.in_use + self._waiters[0][0] <= self.budget_bytes:
+            job_bytes, future = self._waiters.popleft()
+            if future.cancelled():
+                # Its waiter settles the accounting
+                continue
+            self._grant(job_bytes)
+            future.set_result(None)
+
+
+memory_budget = MemoryBudget(settings.admission_memory_bytes, settings.admission_queue_bytes)
@@ -0,0 +1,77 @@
+# app/core/aio.py
+
+"""
+Non-blocking facade over the storage, job store and result cache modules.
+
+The underlying modules stay synchronous (boto3 is blocking); every call
+here is offloaded to the executor's I/O thread pool so the event loop
+never waits on a network round trip.
+"""
+
+from typing import Dict, List
+
+from app.core import job_store, s3_io
+from app.core.job_index import get_job_index
+from app.core.result_cache import result_cache
+from app.core.executor import executor
+from app.core.storage import get_store
+
+
+# ============================================================
+# Objects
+# ============================================================
+
+async def get_object(key: str) -> bytes:
+    return await executor.run_io(get_store().get, key)
+
+
+async def upload_artifact(job_id: str, content: bytes, filename: str) -> str:
+    return await executor.run_io(s3_io.upload_artifact, job_id, content, filename)
+
+
+# ============================================================
+# Job records
+# ============================================================
+
+async def create_job_record(job_id: str) -> Dict:
+    return await executor.run_io(job_store.create_job_record, job_id)
+
+
+async def update_job_status(job_id: str, status: str, **fields) -> Dict:
+    return await executor.run_io(job_store.update_job_status, job_id, status, **fields)
+
+
+async def begin_append(job_id: str) -> Dict:
+    return await executor.run_io(job_store.begin_append, job_id)
+
+
+async def start_job_lines(job_id: str, lines: List[str]) -> Dict:
+    return await executor.run_io(job_store.start_job_lines, job_id, lines)
+
+
+async def update_job_line(job_id: str, line: str, status: str, **fields) -> Dict:
+    return await executor.run_io(job_store.update_job_line, job_id, line, status, **fields)
+
+
+async def get_job_record(job_id: str) -> Dict:
+    return await executor.run_io(job_store.get_job_record, job_id)
+
+
+async def list_jobs(**filters) -> Dict:
+    return await executor.run_io(get_job_index().list_jobs, **filters)
+
+
+async def backfill_job_index():
+    await executor.run_io(job_store.get_job_store().backfill_index)
+
+
+# ============================================================
+# Result cache
+# ============================================================
+
+async def claim_cached_job(key: str, job_id: str) -> str:
+    return await executor.run_io(result_cache.claim, key, job_id)
+
+
+async def release_cached_job(key: str, job_id: str):
+    return await executor.run_io(result_cache.release, key, job_id)
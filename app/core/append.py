@@ -0,0 +1,156 @@
+# app/core/append.py
+
+"""
+Incremental appends to a completed single-traverse job.
+
+New stations only change the tail of a job:
+- Distance continues from the last stored station, and sparse stations
+  are generated for the new segments only (build_geometry's `origin`)
+- Windowed models (kriging, k neighbours): predictions change only
+  from the tail window on. The model is refitted on the last 2k+1
+  train stations of each channel with its length scale frozen, which
+  reproduces a full refit exactly from the k-th last train station on.
+  Results keep their bytes before the window; only the tail is merged
+  again and the prefix is copied server-side. Jobs with too few
+  stations for a window have the whole traverse as their tail
+- Global models (linear): the line through all train stations changes,
+  so every stored prediction has to be rewritten. The fit is refreshed
+  from running sums instead of the train stations, and each result is
+  streamed back with its predicted rows re-evaluated; no artifact is
+  read, but the work still grows with the job, not with the append
+
+The state is set up when the job first completes, on any backend (the
+frozen parameters of a job run on SageMaker are fitted locally).
+
+State kept between appends (job record `append`):
+- request, last station, input bytes and stations an append reads back
+- windowed: the window bounds, frozen model parameters, tail artifacts
+  (the train / predict stations inside it) and the byte offset of the
+  window in every result
+- linear: per channel [n, sum d, sum v, sum d^2, sum d*v] over its
+  measured stations
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core import local_inference
+from app.core.traverse import Traverse
+
+
+# (train_from, predict_from) distances; None for global models
+Window = Tuple[Optional[float], Optional[float]]
+
+# Sufficient statistics of a straight-line fit: [n, sum d, sum v,
+# sum d^2, sum d*v]
+LinearSums = List[float]
+
+
+def tail_window(train: Traverse, model: str) -> Window:
+    """
+    Where appended stations can start to change a job:
+    - predict_from: predictions before it keep their neighbours
+    - train_from: train stations before it are not needed to predict
+      from predict_from on
+    """
+    k = local_inference.neighbours(model)
+    if k is None:
+        return None, None
+
+    train_from = predict_from = np.inf
+
+    for name in train.value_cols:
+        d = np.sort(train.d_along[~np.isnan(train.channel(name))])
+
+        # Too few stations for a window: everything (distances start
+        # at 0) is the tail
+        if d.shape[0] <= 2 * k + 1:
+            return 0.0, 0.0
+
+        train_from = min(train_from, d[-(2 * k + 1)])
+        predict_from = min(predict_from, d[-k])
+
+    return float(train_from), float(predict_from)
+
+
+def from_distance(traverse: Traverse, start: Optional[float]) -> Traverse:
+    if start is None:
+        return traverse
+    return traverse.select(traverse.d_along >= start)
+
+
+def model_params(train: Traverse, model: str) -> Dict[str, Dict]:
+    """
+    Frozen model parameters per channel, from a fit on all its stations.
+    """
+    params = {}
+
+    for name in train.value_cols:
+        channel = train.for_channel(name)
+        channel = channel.select(channel.has_value)
+        params[name] = local_inference.frozen_params(model, channel.d_along, channel.value)
+
+    return params
+
+
+def predict_window(
+    train: Traverse,
+    predict: Traverse,
+    model: str,
+    params: Dict[str, Dict],
+) -> np.ndarray:
+    """
+    Predictions at every predict station, (n_predict, channels); one
+    local fit per channel with its frozen parameters. Module-level so it
+    can run in the executor's process pool.
+    """
+    out = np.empty((len(predict), len(train.value_cols)))
+
+    for j, name in enumerate(train.value_cols):
+        channel = train.for_channel(name)
+        channel = channel.select(channel.has_value)
+
+        out[:, j] = local_inference.predict_local(
+            channel.d_along,
+            channel.value,
+            predict.d_along,
+            model,
+            params.get(name),
+        )
+
+    return out
+
+
+# ============================================================
+# Global models
+# ============================================================
+
+def linear_sums(train: Traverse, sums: Optional[Dict[str, LinearSums]] = None) -> Dict[str, LinearSums]:
+    """
+    Running sums of every channel over its measured stations, plus
+    those already in `sums`.
+    """
+    out = {}
+
+    for name in train.value_cols:
+        channel = train.for_channel(name)
+        channel = channel.select(channel.has_value)
+        d, v = channel.d_along, channel.value
+
+        added = [float(d.shape[0]), float(d.sum()), float(v.sum()), float(d @ d), float(d @ v)]
+        out[name] = [a + b for a, b in zip((sums or {}).get(name, [0.0] * 5), added)]
+
+    return out
+
+
+def linear_coefficients(sums: LinearSums) -> Tuple[float, float]:
+    """
+    (intercept, slope) of the least-squares line through the stations
+    behind `sums`; a flat line if their distances are all equal.
+    """
+    n, sum_d, sum_v, sum_dd, sum_dv = sums
+    spread = n * sum_dd - sum_d * sum_d
+
+    slope = (n * sum_dv - sum_d * sum_v) / spread if spread > 0 else 0.0
+    return (sum_v - slope * sum_d) / n, slope
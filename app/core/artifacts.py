@@ -0,0 +1,158 @@
+# app/core/artifacts.py
+
+"""
+Train / predict artifacts exchanged with the inference container.
+
+Layout (one row per station, ordered by distance):
+- distance_along  float64
+- <value column>  float64 (null where not measured), one per channel
+- is_measured     bool
+
+Multi-channel artifacts carry one value column per channel in request
+order, the primary channel first. A null in the predict artifact marks
+a value to predict.
+
+Stored as Parquet by default; CSV is kept for debugging and for older
+containers.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+from app.core.traverse import IS_MEASURED_COL, Traverse
+
+
+DISTANCE_COL = "distance_along"
+
+FORMATS = {
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "csv": ("csv", "text/csv"),
+}
+
+
+def artifact_filename(stem: str, fmt: str = None) -> str:
+    fmt = fmt or settings.artifact_format
+    return f"{stem}.{FORMATS[fmt][0]}"
+
+
+def content_type(fmt: str = None) -> str:
+    return FORMATS[fmt or settings.artifact_format][1]
+
+
+def format_of(name: str) -> str:
+    for fmt, (ext, _) in FORMATS.items():
+        if str(name).endswith(f".{ext}"):
+            return fmt
+    raise ValueError(f"Unknown artifact format for '{name}'")
+
+
+# ============================================================
+# Writing
+# ============================================================
+
+def to_table(traverse: Traverse) -> pa.Table:
+    columns = {DISTANCE_COL: pa.array(traverse.d_along, type=pa.float64())}
+
+    for name in traverse.value_cols:
+        value = traverse.channel(name)
+        columns[name] = pa.array(value, type=pa.float64(), mask=np.isnan(value))
+
+    columns[IS_MEASURED_COL] = pa.array(traverse.is_measured, type=pa.bool_())
+    return pa.table(columns)
+
+
+def encode_table(table: pa.Table, fmt: str = None) -> bytes:
+    fmt = fmt or settings.artifact_format
+    sink = pa.BufferOutputStream()
+
+    if fmt == "parquet":
+        # Modest row groups let the container stream predict in bounded memory
+        pq.write_table(table, sink, compression="zstd", row_group_size=128 * 1024)
+    elif fmt == "csv":
+        pacsv.write_csv(table, sink)
+    else:
+        raise ValueError(f"Unknown artifact format '{fmt}'")
+
+    return sink.getvalue().to_pybytes()
+
+
+def encode_traverse(traverse: Traverse, fmt: str = None) -> bytes:
+    return encode_table(to_table(traverse), fmt)
+
+
+# ============================================================
+# Reading
+# ============================================================
+
+def decode_table(data: bytes, fmt: str) -> pa.Table:
+    if fmt == "parquet":
+        return pq.read_table(pa.BufferReader(data))
+    if fmt == "csv":
+        return pacsv.read_csv(pa.BufferReader(data))
+    raise ValueError(f"Unknown artifact format '{fmt}'")
+
+
+def read_columns(path) -> Dict[str, np.ndarray]:
+    """
+    Reads a local artifact into float / bool numpy columns (nulls -> NaN).
+    """
+    with open(path, "rb") as f:
+        return decode_columns(f.read(), format_of(path))
+
+
+def decode_columns(data: bytes, fmt: str) -> Dict[str, np.ndarray]:
+    table = decode_table(data, fmt)
+
+    return {
+        name: table.column(name).to_numpy()
+        for name in table.column_names
+    }
+
+
+def decode_traverse(data: bytes, fmt: str) -> Traverse:
+    """
+    Rebuilds a Traverse from an artifact. Coordinates are not part of
+    the artifact, so x / y come back as NaN.
+    """
+    columns = decode_columns(data, fmt)
+    value_col, *channels = value_columns(columns)
+    d_along = columns[DISTANCE_COL]
+    nan = np.full(d_along.shape[0], np.nan)
+
+    return Traverse.from_arrays(
+        nan,
+        nan,
+        columns[value_col],
+        value_col=value_col,
+        d_along=d_along,
+        is_measured=columns[IS_MEASURED_COL],
+        channels={name: columns[name] for name in channels},
+    )
+
+
+def value_columns(columns) -> List[str]:
+    value_cols = [
+        c for c in columns
+        if c not in (DISTANCE_COL, IS_MEASURED_COL)
+    ]
+
+    if not value_cols:
+        raise RuntimeError("No value column in artifact")
+
+    return value_cols
+
+
+def value_column(columns) -> str:
+    value_cols: List[str] = value_columns(columns)
+
+    if len(value_cols) != 1:
+        raise RuntimeError(
+            f"Expected exactly one value column in artifact, found {value_cols}"
+        )
+
+    return value_cols[0]
@@ -0,0 +1,53 @@
+# app/core/clients.py
+
+import threading
+
+import boto3
+from botocore.config import Config
+
+from app.core.config import settings
+
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(service: str):
+    """
+    Returns the process-wide boto3 client for `service`.
+
+    Clients are thread-safe; one pooled client per service is shared by
+    every module and by all threads of the I/O pool.
+    """
+    client = _clients.get(service)
+    if client is not None:
+        return client
+
+    with _lock:
+        if service not in _clients:
+            _clients[service] = boto3.session.Session().client(
+                service,
+                region_name=settings.aws_region,
+                config=Config(
+                    max_pool_connections=settings.aws_max_pool_connections,
+                    retries={"max_attempts": 5, "mode": "adaptive"},
+                ),
+            )
+        return _clients[service]
+
+
+def get_runtime():
+    """
+    The SageMaker runtime client, or the in-process fake endpoint when
+    settings.sagemaker_runtime_backend is "fake".
+    """
+    if settings.sagemaker_runtime_backend == "fake":
+        with _lock:
+            if "fake-sagemaker-runtime" not in _clients:
+                from app.core.fake_endpoint import FakeSageMakerRuntime
+                _clients["fake-sagemaker-runtime"] = FakeSageMakerRuntime(
+                    latency_ms=settings.fake_endpoint_latency_ms,
+                )
+            return _clients["fake-sagemaker-runtime"]
+
+    return get_client("sagemaker-runtime")
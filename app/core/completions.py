@@ -0,0 +1,185 @@
+# app/core/completions.py
+
+"""
+Tracks outstanding asynchronous inference invocations.
+
+One polling task serves every in-flight job; nothing waits on a job
+slot or a thread while SageMaker works. Each invocation is checked for
+its output / failure object with its own exponential backoff, and its
+callback fires exactly once: on output, on failure or on timeout.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.admission import memory_budget
+from app.core.config import settings
+from app.core.executor import executor
+from app.core.storage import get_store, key_from_uri
+
+
+logger = logging.getLogger(__name__)
+
+# on_done(output_key, failure_message): exactly one of them is set
+Callback = Callable[[Optional[str], Optional[str]], Awaitable]
+
+
+@dataclass
+class Invocation:
+    invocation_id: str
+    output_key: str
+    failure_key: str
+    on_done: Callback
+    delay: float
+    next_check: float
+    deadline: float
+    memory_bytes: int = field(default=0)
+    checks: int = field(default=0)
+
+
+class CompletionTracker:
+    def __init__(self, *, initial_delay: float, max_delay: float, timeout: float):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+        self._pending: Dict[str, Invocation] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._completed = 0
+        self._failed = 0
+        self._checks = 0
+
+    def track(
+        self,
+        invocation_id: str,
+        output_location: str,
+        failure_location: str,
+        on_done: Callback,
+        memory_bytes: int = 0,
+    ):
+        """
+        Registers an invocation (must be called from the event loop).
+        `invocation_id` is the job id, or job id / line for multi-line jobs;
+        `memory_bytes` is the estimate charged to the completion work.
+        """
+        now = time.monotonic()
+        self._pending[invocation_id] = Invocation(
+            invocation_id=invocation_id,
+            output_key=key_from_uri(output_location),
+            failure_key=key_from_uri(failure_location),
+            on_done=on_done,
+            delay=self.initial_delay,
+            next_check=now + self.initial_delay,
+            deadline=now + self.timeout,
+            memory_bytes=memory_bytes,
+        )
+
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._poll())
+        else:
+            self._wakeup.set()
+
+    def outstanding(self) -> int:
+        return len(self._pending)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "outstanding": len(self._pending),
+            "completed": self._completed,
+            "failed": self._failed,
+            "checks": self._checks,
+        }
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    # --------------------------------------------------
+    # Polling
+    # --------------------------------------------------
+
+    async def _poll(self):
+        while self._pending:
+            now = time.monotonic()
+            due = [inv for inv in self._pending.values() if inv.next_check <= now]
+
+            if due:
+                await asyncio.gather(*(self._check(inv) for inv in due))
+                continue
+
+            # Sleep until the next check is due, or a new invocation arrives
+            wait = min(inv.next_check for inv in self._pending.values()) - now
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check(self, inv: Invocation):
+        self._checks += 1
+        inv.checks += 1
+
+        try:
+            output, failure = await executor.run_io(self._probe, inv)
+        except Exception:
+            logger.exception("Polling inference output for %s failed", inv.invocation_id)
+            output = failure = False
+
+        if output:
+            self._finish(inv, inv.output_key, None)
+        elif failure:
+            self._finish(inv, None, await self._failure_message(inv))
+        elif time.monotonic() >= inv.deadline:
+            self._finish(inv, None, f"Inference timed out after {self.timeout:.0f}s")
+        else:
+            # Full jitter keeps many jobs from polling in lockstep
+            inv.delay = min(inv.delay * 2, self.max_delay)
+            inv.next_check = time.monotonic() + random.uniform(inv.delay / 2, inv.delay)
+
+    @staticmethod
+    async def _failure_message(inv: Invocation) -> str:
+        # Only this invocation fails if its failure object cannot be read
+        try:
+            message = await executor.run_io(get_store().get, inv.failure_key)
+        except Exception as exc:
+            logger.exception("Reading inference failure for %s failed", inv.invocation_id)
+            return f"Inference failed (failure details unavailable: {exc})"
+
+        return message.decode("utf-8", errors="replace") or "Inference failed"
+
+    @staticmethod
+    def _probe(inv: Invocation):
+        store = get_store()
+        if store.exists(inv.output_key):
+            return True, False
+        return False, store.exists(inv.failure_key)
+
+    def _finish(self, inv: Invocation, output_key: Optional[str], failure: Optional[str]):
+        del self._pending[inv.invocation_id]
+
+        if output_key is None:
+            self._failed += 1
+        else:
+            self._completed += 1
+
+        # Completion work runs as a regular job so it gets a slot (and
+        # its memory) only now. The job was admitted at submission, so
+        # its merge queues instead of being rejected
+        if inv.memory_bytes:
+            memory_budget.admit(inv.memory_bytes, force=True)
+        executor.submit(inv.invocation_id, lambda: inv.on_done(output_key, failure), inv.memory_bytes)
+
+
+tracker = CompletionTracker(
+    initial_delay=settings.async_poll_initial_seconds,
+    max_delay=settings.async_poll_max_seconds,
+    timeout=settings.async_inference_timeout_seconds,
+)
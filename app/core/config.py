@@ -1,10 +1,100 @@
 import os
+import tempfile
+from typing import Optional
+
 from pydantic import BaseSettings
 
 
 class Settings(BaseSettings):
     s3_bucket = "gaia-magnetics"
     aws_region = "us-east-1"
+    aws_max_pool_connections = 32
+
+    # Object storage: "s3" or "local" (filesystem stand-in)
+    storage_backend = "s3"
+    local_storage_dir = os.path.join(tempfile.gettempdir(), "gaia-storage")
+
+    # Job records: "object" (job.json in object storage), "sqlite" or "memory"
+    job_store_backend = "object"
+    job_store_sqlite_path = os.path.join(tempfile.gettempdir(), "gaia-jobs.sqlite3")
+    job_cache_ttl_seconds = 30.0
+    job_cache_max_entries = 10000
+
+    # Job listing index: local SQLite, shared between instances through
+    # a manifest in object storage (see job_index.py)
+    job_index_sqlite_path = os.path.join(tempfile.gettempdir(), "gaia-job-index.sqlite3")
+    job_index_sync_seconds = 5.0
+    job_index_skew_seconds = 60.0
+    job_index_snapshot_every = 10000
+
+    # Reuse of identical jobs (same CSV bytes + parameters)
+    result_cache_enabled = True
+    result_cache_ttl_seconds = 7 * 24 * 3600.0
+    result_cache_max_entries = 10000
+    # A claim whose job record never appeared (its submission failed)
+    # stops being shared after this
+    result_cache_claim_seconds = 60.0
+
+    # Streaming ingest
+    ingest_chunk_bytes = 1024 * 1024
+    upload_part_bytes = 8 * 1024 * 1024
+    # Per-row problems listed when a CSV fails validation
+    ingest_max_error_reports = 100
+    staging_dir = os.path.join(tempfile.gettempdir(), "gaia-staging")
+
+    # Train / predict artifacts: "parquet" or "csv"
+    artifact_format = "parquet"
+
+    # Background execution
+    max_concurrent_jobs = 4
+    cpu_workers: Optional[int] = None
+    io_workers = 16
+
+    # Admission control (see admission.py): estimated peak memory of
+    # running jobs, and of jobs waiting for it before new ones get 429
+    admission_memory_bytes = 4 * 1024 ** 3
+    admission_queue_bytes: Optional[int] = None
+    admission_retry_after_seconds = 30
+    admission_sample_bytes = 256 * 1024
+    # Peak footprint per station: fixed part plus one per value channel
+    admission_station_bytes = 200
+    admission_channel_bytes = 50
+    # Bytes per CSV row when the sample cannot be read
+    admission_fallback_row_bytes = 32
+
+    # Server-Sent Events
+    sse_heartbeat_seconds = 15.0
+
+    # Result streaming
+    result_chunk_bytes = 1024 * 1024
+    # Rows per stored result chunk (the unit of windowed reads)
+    result_chunk_rows = 65536
+
+    # Realtime inference, in size-bounded chunks. Payload format:
+    # application/json, application/x-gaia-json+gzip or
+    # application/x-gaia-f64 (the endpoint must accept it).
+    sagemaker_runtime_backend = "aws"
+    inference_payload_format = "application/json"
+    inference_max_payload_bytes = 5 * 1024 * 1024
+    inference_max_chunk_rows = 100000
+    inference_concurrency = 8
+    inference_max_retries = 4
+    inference_backoff_seconds = 0.1
+    fake_endpoint_latency_ms = 0.0
+
+    # Job inference stage: "auto" (local below the thresholds, async
+    # above), "local" (process pool), "async" (SageMaker async endpoint,
+    # polled for completion) or "realtime" (batched invocation above)
+    inference_backend = "auto"
+    local_inference_max_rows = 500000
+    local_inference_max_bytes = 64 * 1024 * 1024
+    sagemaker_endpoint_name = "gaia-magnetics-async-endpoint"
+    # The model the deployed endpoints run (the container's GAIA_MODEL);
+    # jobs selecting another model run on the local backend
+    sagemaker_endpoint_model = "linear"
+    async_poll_initial_seconds = 1.0
+    async_poll_max_seconds = 30.0
+    async_inference_timeout_seconds = 3600.0
 
 
     class Config:
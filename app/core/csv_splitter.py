@@ -1,21 +1,48 @@
 # app/core/csv_splitter.py
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Union
+
+import numpy as np
+
+from app.core.traverse import Traverse
 
 
 def split_train_predict(
-    rows: List[Dict],
+    rows: Union[Traverse, List[Dict]],
     *,
     value_col: str,
-) -> Tuple[List[Dict], List[Dict]]:
+    measured_per_channel: bool = False,
+) -> Union[Tuple[Traverse, Traverse], Tuple[List[Dict], List[Dict]]]:
     """
     Splits rows into train and predict sets.
 
     Rules:
     - train: is_measured == True AND value exists
     - predict: is_measured == False AND value missing
+
+    Multi-channel traverses apply the rules per channel with shared
+    masks: a station is in train if any channel trains on it and in
+    predict if any channel needs it. Within each set a channel is NaN
+    where the rule does not hold for it. With `measured_per_channel`
+    (explicit geometry) a channel counts as measured where the station
+    is flagged `is_measured` and that channel has a value, so a flagged
+    station missing a channel's value is predicted for that channel.
     """
 
+    if isinstance(rows, Traverse):
+        if not rows.channels:
+            has_value = rows.has_value
+            measured = rows.is_measured
+            if measured_per_channel:
+                measured = measured & has_value
+
+            return (
+                rows.select(measured & has_value),
+                rows.select(~measured & ~has_value),
+            )
+
+        return _split_channels(rows, measured_per_channel)
+
     train: List[Dict] = []
     predict: List[Dict] = []
 
@@ -32,3 +59,19 @@ def split_train_predict(
             predict.append(r)
 
     return train, predict
+
+
+def _split_channels(rows: Traverse, measured_per_channel: bool) -> Tuple[Traverse, Traverse]:
+    values = rows.values_matrix()
+    has_value = ~np.isnan(values)
+    measured = rows.is_measured[:, None]
+    if measured_per_channel:
+        measured = measured & has_value
+
+    # Train stations are measured, so a channel's value there is NaN
+    # exactly where it does not train; likewise predict stations are NaN
+    # exactly where a channel needs a prediction
+    return (
+        rows.select((measured & has_value).any(axis=1)),
+        rows.select((~measured & ~has_value).any(axis=1)),
+    )
@@ -0,0 +1,214 @@
+# app/core/decimate.py
+
+from typing import Iterable, Iterator, Tuple
+
+import numpy as np
+
+
+# (x, y, *other columns) for a run of ordered rows
+Rows = Tuple[np.ndarray, ...]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the (sorted) indices of the points to keep. First and last
+    points are always kept. `x` must be ordered.
+    """
+    n = x.shape[0]
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1], dtype=np.int64)[:n_out]
+
+    # Bucket edges for the n - 2 interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+
+        # Average of the next bucket (or the last point)
+        if i + 2 < n_out - 1:
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx = x[nlo:nhi].mean()
+            cy = y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return keep
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min/max per bucket downsampling (keeps peaks and troughs exactly).
+
+    Returns sorted indices; at most `n_out` points.
+    """
+    n = x.shape[0]
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 2:
+        return np.array([0, n - 1], dtype=np.int64)[:n_out]
+
+    buckets = max(n_out // 2, 1)
+    bucket = (np.arange(n) * buckets) // n
+
+    return _extremes(y, bucket)
+
+
+def _extremes(y: np.ndarray, bucket: np.ndarray) -> np.ndarray:
+    # Within each bucket, sort by value: first = min, last = max
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[starts[1:], y.shape[0]] - 1
+
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def decimate(x: np.ndarray, y: np.ndarray, n_out: int, method: str = "lttb") -> np.ndarray:
+    if method == "lttb":
+        return lttb(x, y, n_out)
+    if method == "minmax":
+        return minmax(x, y, n_out)
+    raise ValueError(f"Unknown decimation method '{method}'")
+
+
+# ============================================================
+# Streaming
+# ============================================================
+
+def stream_decimate(batches: Iterable[Rows], n: int, n_out: int, method: str = "lttb") -> Iterator[Rows]:
+    """
+    decimate() over ordered batches of exactly `n` rows in total,
+    without collecting them: yields the kept rows of every column, the
+    same rows decimate() keeps.
+
+    Rules:
+    - Buckets are sized from `n` up front
+    - minmax holds back one open bucket, lttb two (a bucket's point
+      depends on the next bucket's average)
+    """
+    if method not in ("lttb", "minmax"):
+        raise ValueError(f"Unknown decimation method '{method}'")
+
+    if n_out >= n:
+        return iter(batches)
+    if n_out < (3 if method == "lttb" else 2):
+        return _stream_take(batches, np.array([0, n - 1], dtype=np.int64)[:n_out])
+    if method == "lttb":
+        return _stream_lttb(batches, n, n_out)
+    return _stream_minmax(batches, n, n_out)
+
+
+def _stream_minmax(batches: Iterable[Rows], n: int, n_out: int) -> Iterator[Rows]:
+    buckets = max(n_out // 2, 1)
+    pending = None
+    start = 0
+
+    for rows in batches:
+        rows = rows if pending is None else _concat(pending, rows)
+        if not rows[0].shape[0]:
+            continue
+
+        bucket = ((start + np.arange(rows[0].shape[0])) * buckets) // n
+
+        # The last bucket may go on in the next batch
+        cut = int(np.searchsorted(bucket, bucket[-1]))
+        if cut:
+            yield _take(rows, _extremes(rows[1][:cut], bucket[:cut]))
+
+        pending = tuple(col[cut:] for col in rows)
+        start += cut
+
+    if pending is not None and pending[0].shape[0]:
+        yield _take(pending, _extremes(pending[1], np.zeros(pending[0].shape[0], dtype=np.int64)))
+
+
+def _stream_lttb(batches: Iterable[Rows], n: int, n_out: int) -> Iterator[Rows]:
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    pending = None
+    start = 0   # row number of pending[0]
+    i = 0       # next interior bucket
+    a = None    # (x, y) of the last kept point
+
+    for rows in batches:
+        if not rows[0].shape[0]:
+            continue
+
+        keep = []
+        if pending is None:
+            pending = rows
+            a = (rows[0][0], rows[1][0])
+            keep.append(0)
+        else:
+            pending = _concat(pending, rows)
+
+        x, y = pending[0], pending[1]
+        end = start + x.shape[0]
+
+        while i < n_out - 2:
+            lo, hi = edges[i] - start, edges[i + 1] - start
+
+            # Average of the next bucket (or the last point)
+            if i + 2 < n_out - 1:
+                if end < edges[i + 2]:
+                    break
+                nlo, nhi = edges[i + 1] - start, edges[i + 2] - start
+                cx = x[nlo:nhi].mean()
+                cy = y[nlo:nhi].mean()
+            else:
+                if end < n:
+                    break
+                cx, cy = x[-1], y[-1]
+
+            bx = x[lo:hi]
+            by = y[lo:hi]
+            area = np.abs((a[0] - cx) * (by - a[1]) - (a[0] - bx) * (cy - a[1]))
+
+            chosen = lo + int(np.argmax(area))
+            a = (x[chosen], y[chosen])
+            keep.append(chosen)
+            i += 1
+
+        if end == n:
+            keep.append(x.shape[0] - 1)
+
+        if keep:
+            yield _take(pending, np.array(keep, dtype=np.int64))
+
+        # Rows before the next open bucket are no longer needed
+        cut = (edges[i] if i < n_out - 2 else n - 1) - start
+        pending = tuple(col[cut:] for col in pending)
+        start += cut
+
+
+def _stream_take(batches: Iterable[Rows], keep: np.ndarray) -> Iterator[Rows]:
+    start = 0
+    for rows in batches:
+        size = rows[0].shape[0]
+        local = keep[(keep >= start) & (keep < start + size)] - start
+        if local.shape[0]:
+            yield _take(rows, local)
+        start += size
+
+
+def _take(rows: Rows, keep: np.ndarray) -> Rows:
+    return tuple(col[keep] for col in rows)
+
+
+def _concat(first: Rows, second: Rows) -> Rows:
+    return tuple(np.concatenate(cols) for cols in zip(first, second))
+
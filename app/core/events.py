@@ -0,0 +1,78 @@
+# app/core/events.py
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class JobEventBus:
+    """
+    In-process pub/sub for job progress events.
+
+    `publish` may be called from any thread; events are delivered to each
+    subscriber's queue on the subscriber's own event loop. The latest
+    event per job is kept so late subscribers start from current state.
+    """
+
+    def __init__(self, queue_size: int = 256, max_retained: int = 1000):
+        self.queue_size = queue_size
+        self.max_retained = max_retained
+
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._latest: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, job_id: str, event: Dict):
+        event = {"job_id": job_id, "ts": time.time(), **event}
+
+        with self._lock:
+            self._latest[job_id] = event
+            self._latest.move_to_end(job_id)
+            while len(self._latest) > self.max_retained:
+                self._latest.popitem(last=False)
+
+            subscribers = list(self._subscribers.get(job_id, ()))
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+    def latest(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._latest.get(job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        entry = (asyncio.get_running_loop(), queue)
+
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(entry)
+
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, set())
+            for entry in [e for e in subscribers if e[1] is queue]:
+                subscribers.discard(entry)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+def _offer(queue: asyncio.Queue, event: Dict):
+    # A slow consumer loses its oldest events rather than blocking publishers;
+    # the newest (possibly terminal) event always gets through
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+event_bus = JobEventBus()
@@ -0,0 +1,152 @@
+# app/core/executor.py
+
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.admission import MemoryBudget, memory_budget
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobExecutor:
+    """
+    Runs jobs in the background with bounded concurrency.
+
+    - At most `max_concurrent_jobs` jobs run at once; the rest wait in FIFO order
+    - Jobs charged to the memory budget first wait for room in it
+    - CPU-heavy work goes to a process pool
+    - Blocking I/O (boto3) goes to a thread pool
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrent_jobs: int,
+        cpu_workers: Optional[int] = None,
+        io_workers: Optional[int] = None,
+        memory: Optional[MemoryBudget] = None,
+    ):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.cpu_workers = cpu_workers
+        self.io_workers = io_workers
+        self.memory = memory
+
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+
+    # --------------------------------------------------
+    # Pools (created lazily, inside the running loop)
+    # --------------------------------------------------
+
+    @property
+    def cpu_pool(self) -> ProcessPoolExecutor:
+        if self._cpu_pool is None:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        return self._cpu_pool
+
+    @property
+    def io_pool(self) -> ThreadPoolExecutor:
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(
+                max_workers=self.io_workers,
+                thread_name_prefix="gaia-io",
+            )
+        return self._io_pool
+
+    async def run_cpu(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_pool, partial(fn, *args, **kwargs))
+
+    async def run_io(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_pool, partial(fn, *args, **kwargs))
+
+    # --------------------------------------------------
+    # Job submission
+    # --------------------------------------------------
+
+    def submit(self, job_id: str, job: Callable[[], Awaitable], memory_bytes: int = 0) -> asyncio.Task:
+        """
+        Schedules `job()` and returns immediately. `memory_bytes` is the
+        job's estimate, already admitted to the memory budget.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent_jobs)
+
+        self._queued += 1
+        task = asyncio.create_task(self._run(job_id, job, memory_bytes))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda t: self._forget(job_id, t))
+        return task
+
+    def _forget(self, job_id: str, task: asyncio.Task):
+        # A job may be resubmitted (e.g. its completion stage) under the same id
+        if self._tasks.get(job_id) is task:
+            del self._tasks[job_id]
+
+    async def _run(self, job_id: str, job: Callable[[], Awaitable], memory_bytes: int):
+        charged = self.memory is not None and memory_bytes > 0
+        reserved = started = False
+
+        try:
+            if charged:
+                await self.memory.reserve(memory_bytes)
+                reserved = True
+
+            async with self._slots:
+                self._queued -= 1
+                started = True
+                self._running += 1
+                try:
+                    await job()
+                    self._completed += 1
+                except Exception:
+                    self._failed += 1
+                    logger.exception("Job %s failed", job_id)
+                finally:
+                    self._running -= 1
+        finally:
+            if not started:
+                # Cancelled while still queued
+                self._queued -= 1
+            if reserved:
+                self.memory.release(memory_bytes)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "queue_depth": self._queued,
+            "running": self._running,
+            "completed": self._completed,
+            "failed": self._failed,
+            "max_concurrent_jobs": self.max_concurrent_jobs,
+        }
+
+    async def shutdown(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+
+
+executor = JobExecutor(
+    max_concurrent_jobs=settings.max_concurrent_jobs,
+    cpu_workers=settings.cpu_workers,
+    io_workers=settings.io_workers,
+    memory=memory_budget,
+)
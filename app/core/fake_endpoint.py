@@ -0,0 +1,121 @@
+# app/core/fake_endpoint.py
+
+"""
+In-process stand-in for the SageMaker runtime client.
+
+Speaks the same payload formats as the real endpoint (see payloads.py)
+and, like the inference container, runs one fixed model
+(settings.sagemaker_endpoint_model, the container's GAIA_MODEL) from
+gaia_model. Asynchronous invocations read their
+artifacts from, and write their output to, the configured object
+store on a background thread. Used with
+GAIA_SAGEMAKER_RUNTIME_BACKEND=fake for local runs and by
+scripts/bench_inference.py.
+"""
+
+import io
+import json
+import random
+import threading
+import time
+import uuid
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+from app.core import artifacts, payloads
+from app.core.config import settings
+from app.core.local_inference import predict_local
+from app.core.storage import get_store, key_from_uri, object_uri
+
+
+class FakeSageMakerRuntime:
+    def __init__(self, latency_ms: float = 0.0, throttle_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.throttle_rate = throttle_rate
+        self.invocations = 0
+        self.bytes_in = 0
+        self._lock = threading.Lock()
+
+    def invoke_endpoint(self, EndpointName, Body, ContentType, Accept=None, **kwargs):
+        with self._lock:
+            self.invocations += 1
+            self.bytes_in += len(Body)
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        if self.throttle_rate and random.random() < self.throttle_rate:
+            raise ClientError(
+                {
+                    "Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"},
+                    "ResponseMetadata": {"HTTPStatusCode": 400},
+                },
+                "InvokeEndpoint",
+            )
+
+        # Several channels: (n_train, channels) targets, one multi-output fit
+        train_d, train_v, predict_d, channels = payloads.decode_request(Body, ContentType)
+        predictions = predict_local(train_d, train_v, predict_d, settings.sagemaker_endpoint_model)
+
+        accept = Accept or ContentType.partition(";")[0]
+        return {
+            "ContentType": accept,
+            "Body": io.BytesIO(payloads.encode_response(predict_d, predictions, accept, channels)),
+        }
+
+    def invoke_endpoint_async(self, EndpointName, InputLocation, ContentType=None, InferenceId=None, **kwargs):
+        inference_id = InferenceId or uuid.uuid4().hex
+        output_key = f"sagemaker-async/output/{uuid.uuid4().hex}.out"
+        failure_key = f"sagemaker-async/failure/{uuid.uuid4().hex}-error.out"
+
+        with self._lock:
+            self.invocations += 1
+
+        threading.Thread(
+            target=self._run_async,
+            args=(key_from_uri(InputLocation), output_key, failure_key),
+            daemon=True,
+        ).start()
+
+        return {
+            "InferenceId": inference_id,
+            "OutputLocation": object_uri(output_key),
+            "FailureLocation": object_uri(failure_key),
+        }
+
+    def _run_async(self, input_key: str, output_key: str, failure_key: str):
+        store = get_store()
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        try:
+            request = json.loads(store.get(input_key))
+            train = _read_artifact(request["train_s3"])
+            predict = _read_artifact(request["predict_s3"])
+            channels = artifacts.value_columns(train)
+
+            # One channel keeps the original 1-D request / response shape
+            targets = (
+                train[channels[0]] if len(channels) == 1
+                else np.column_stack([train[c] for c in channels])
+            )
+            predictions = predict_local(
+                train[artifacts.DISTANCE_COL],
+                targets,
+                predict[artifacts.DISTANCE_COL],
+                settings.sagemaker_endpoint_model,
+            )
+            # The container's output format (predictions.csv)
+            body = payloads.encode_async_output(predict[artifacts.DISTANCE_COL], predictions, channels)
+        except Exception as exc:
+            store.put(failure_key, str(exc).encode("utf-8"), content_type="text/plain")
+            return
+
+        store.put(output_key, body, content_type="text/csv")
+
+
+def _read_artifact(uri: str):
+    key = key_from_uri(uri)
+    return artifacts.decode_columns(get_store().get(key), artifacts.format_of(key))
@@ -1,42 +1,202 @@
 # app/core/geometry.py
 
-from math import hypot
-from typing import List, Dict
+from typing import List, Dict, Sequence, Tuple, Union
 
+import numpy as np
+
+from app.core.traverse import Traverse
+
+
+# ============================================================
+# Columnar geometry engine
+# ============================================================
+
+def cumulative_distance(x: np.ndarray, y: np.ndarray, start: float = 0.0) -> np.ndarray:
+    """
+    Cumulative distance along a traverse given station coordinates.
+    The first station is at distance `start` (0 unless the traverse
+    continues another one).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    d = np.full(x.shape[0], start, dtype=np.float64)
+    if x.shape[0] > 1:
+        steps = np.hypot(np.diff(x), np.diff(y))
+        steps[0] += start
+        np.cumsum(steps, out=d[1:])
+
+    return d
+
+
+def sparse_stations(
+    d_along: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    *,
+    spacing: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Inserts uniform-spacing stations between consecutive measured stations.
+
+    Inputs must already be ordered by `d_along`.
+
+    Returns:
+    - d_along, x, y of the combined stations (ordered)
+    - source index: position of the original station, or -1 if inserted
+    """
+    d_along = np.asarray(d_along, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = d_along.shape[0]
+
+    if n < 2:
+        return d_along.copy(), x.copy(), y.copy(), np.arange(n)
+
+    da = d_along[:-1]
+    db = d_along[1:]
+    gap = db - da
+
+    # ----------------------------
+    # Candidate stations per segment
+    # ----------------------------
+    steps = np.where(gap > spacing, np.floor_divide(gap, spacing), 0).astype(np.int64)
+
+    seg = np.repeat(np.arange(n - 1), steps)
+    starts = np.cumsum(steps) - steps
+    k = np.arange(seg.shape[0]) - np.repeat(starts, steps) + 1
+
+    d_new = da[seg] + k * spacing
+
+    # Stations landing on (or past) the next measured station are dropped
+    keep = d_new < db[seg]
+    seg = seg[keep]
+    d_new = d_new[keep]
+
+    t = (d_new - da[seg]) / gap[seg]
+    x_new = x[seg] + t * (x[seg + 1] - x[seg])
+    y_new = y[seg] + t * (y[seg + 1] - y[seg])
+
+    # ----------------------------
+    # Interleave originals and inserted stations
+    # ----------------------------
+    inserted = np.bincount(seg, minlength=n - 1)
+    orig_pos = np.arange(n)
+    orig_pos[1:] += np.cumsum(inserted)
+
+    total = n + seg.shape[0]
+    is_orig = np.zeros(total, dtype=bool)
+    is_orig[orig_pos] = True
+
+    out_d = np.empty(total, dtype=np.float64)
+    out_x = np.empty(total, dtype=np.float64)
+    out_y = np.empty(total, dtype=np.float64)
+    source = np.full(total, -1, dtype=np.int64)
+
+    out_d[orig_pos] = d_along
+    out_x[orig_pos] = x
+    out_y[orig_pos] = y
+    source[orig_pos] = np.arange(n)
+
+    out_d[~is_orig] = d_new
+    out_x[~is_orig] = x_new
+    out_y[~is_orig] = y_new
+
+    return out_d, out_x, out_y, source
+
+
+def sparse_traverse(traverse: Traverse, *, spacing: float) -> Traverse:
+    """
+    Columnar counterpart of `generate_sparse_geometry`.
+    """
+    return sparse_traverses(traverse, spacings=[spacing])[0]
+
+
+def sparse_traverses(traverse: Traverse, *, spacings: Sequence[float]) -> List[Traverse]:
+    """
+    One geometry per spacing, from a single sort of the stations.
+    """
+    order = np.argsort(traverse.d_along, kind="stable")
+    ordered = traverse.select(order)
+
+    return [_sparse_ordered(traverse, ordered, spacing) for spacing in spacings]
+
+
+def _sparse_ordered(traverse: Traverse, ordered: Traverse, spacing: float) -> Traverse:
+    out_d, out_x, out_y, source = sparse_stations(
+        ordered.d_along,
+        ordered.x,
+        ordered.y,
+        spacing=spacing,
+    )
+
+    original = source >= 0
+    src = source[original]
+
+    value = np.full(out_d.shape[0], np.nan)
+    value[original] = ordered.value[src]
+
+    channels = {}
+    for name, col in ordered.channels.items():
+        out_col = np.full(out_d.shape[0], np.nan)
+        out_col[original] = col[src]
+        channels[name] = out_col
+
+    extras = {}
+    for name, col in ordered.extras.items():
+        out_col = np.full(out_d.shape[0], "", dtype=object)
+        out_col[original] = col[src]
+        extras[name] = out_col
+
+    return Traverse.from_arrays(
+        out_x,
+        out_y,
+        value,
+        x_col=traverse.x_col,
+        y_col=traverse.y_col,
+        value_col=traverse.value_col,
+        d_along=out_d,
+        is_measured=original,
+        channels=channels,
+        extras=extras,
+        columns=traverse.columns,
+    )
+
+
+# ============================================================
+# Row adapters
+# ============================================================
 
 def compute_distance_along_traverse(
-    rows: List[Dict],
+    rows: Union[Traverse, List[Dict]],
     x_col: str,
     y_col: str,
-) -> List[Dict]:
+) -> Union[Traverse, List[Dict]]:
     """
     Computes cumulative distance along traverse.
     Adds `d_along` to every row.
     """
-    d = 0.0
-    prev = None
-
-    for r in rows:
-        x = float(r[x_col])
-        y = float(r[y_col])
+    if isinstance(rows, Traverse):
+        rows.d_along = cumulative_distance(rows.x, rows.y)
+        return rows
 
-        if prev is not None:
-            d += hypot(x - prev[0], y - prev[1])
+    x = np.fromiter((float(r[x_col]) for r in rows), dtype=np.float64, count=len(rows))
+    y = np.fromiter((float(r[y_col]) for r in rows), dtype=np.float64, count=len(rows))
 
+    for r, d in zip(rows, cumulative_distance(x, y).tolist()):
         r["d_along"] = d
-        prev = (x, y)
 
     return rows
 
 
 def generate_sparse_geometry(
-    rows: List[Dict],
+    rows: Union[Traverse, List[Dict]],
     *,
     x_col: str,
     y_col: str,
     value_col: str,
-    spacing: float,
-) -> List[Dict]:
+    spacing: Union[float, Sequence[float]],
+) -> Union[Traverse, List[Dict], List[Traverse]]:
     """
     Inserts uniform-spacing geometry rows between measured stations.
 
@@ -44,7 +204,14 @@ def generate_sparse_geometry(
     - Original rows are measured
     - Inserted rows are unmeasured
     - Boundary stations remain measured
+
+    A list of spacings gives one geometry per spacing (Traverse input
+    only), all from the same sorted stations.
     """
+    if isinstance(rows, Traverse):
+        if isinstance(spacing, (int, float)):
+            return sparse_traverse(rows, spacing=spacing)
+        return sparse_traverses(rows, spacings=spacing)
 
     # Enforce ordering
     rows = sorted(rows, key=lambda r: r["d_along"])
@@ -53,39 +220,29 @@ def generate_sparse_geometry(
     for r in rows:
         r["is_measured"] = True
 
-    out: List[Dict] = []
+    d = np.fromiter((r["d_along"] for r in rows), dtype=np.float64, count=len(rows))
+    x = np.fromiter((float(r[x_col]) for r in rows), dtype=np.float64, count=len(rows))
+    y = np.fromiter((float(r[y_col]) for r in rows), dtype=np.float64, count=len(rows))
 
-    for i in range(len(rows) - 1):
-        a = rows[i]
-        b = rows[i + 1]
+    out_d, out_x, out_y, source = sparse_stations(d, x, y, spacing=spacing)
 
-        out.append(a)
-
-        da = a["d_along"]
-        db = b["d_along"]
-        gap = db - da
+    out: List[Dict] = []
 
-        if gap <= spacing:
+    for d_new, x_new, y_new, src in zip(
+        out_d.tolist(), out_x.tolist(), out_y.tolist(), source.tolist()
+    ):
+        if src >= 0:
+            out.append(rows[src])
             continue
 
-        steps = int(gap // spacing)
-
-        for k in range(1, steps + 1):
-            d_new = da + k * spacing
-            if d_new >= db:
-                break
-
-            t = (d_new - da) / gap
-
-            out.append(
-                {
-                    x_col: float(a[x_col]) + t * (float(b[x_col]) - float(a[x_col])),
-                    y_col: float(a[y_col]) + t * (float(b[y_col]) - float(a[y_col])),
-                    "d_along": d_new,
-                    value_col: "",
-                    "is_measured": False,
-                }
-            )
+        out.append(
+            {
+                x_col: x_new,
+                y_col: y_new,
+                "d_along": d_new,
+                value_col: "",
+                "is_measured": False,
+            }
+        )
 
-    out.append(rows[-1])
     return out
@@ -1,9 +1,15 @@
-import json
-import csv
-from pathlib import Path
-from typing import List, Dict
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
 
-import boto3
+import numpy as np
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError
+
+from app.core import payloads
+from app.core.clients import get_runtime
+from app.core.config import settings
 
 
 # ============================================================
@@ -11,100 +17,146 @@ import boto3
 # ============================================================
 
 SAGEMAKER_ENDPOINT_NAME = "gaia-magnetics-endpoint"
-AWS_REGION = "us-east-1"
-
 
-# ============================================================
-# SageMaker client
-# ============================================================
-
-_runtime = boto3.client(
-    "sagemaker-runtime",
-    region_name=AWS_REGION,
-)
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "ServiceUnavailable",
+    "InternalFailure",
+    "ModelNotReadyException",
+}
 
 
 # ============================================================
-# Inference runner
+# Batched invocation
 # ============================================================
 
-def run_sagemaker_inference(
-    train_csv: Path,
-    predict_csv: Path,
-) -> List[Dict]:
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def predict_values(
+    train_d: np.ndarray,
+    train_v: np.ndarray,
+    predict_d: np.ndarray,
+    *,
+    payload_format: Optional[str] = None,
+    max_payload_bytes: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    runtime=None,
+    channels: Optional[Sequence[str]] = None,
+) -> np.ndarray:
     """
-    Calls a SageMaker endpoint to infer magnetic values.
+    Predicts values at `predict_d`, one endpoint call per chunk.
 
-    Expected behavior:
-    - Model learns magnetic_value vs distance_along from train
-    - Model predicts magnetic_value for predict distances
-    - Returned rows must include distance_along and magnetic_value
+    With `channels` naming several, `train_v` is (n_train, channels)
+    and every chunk predicts all of them: (n_predict, channels) back.
 
-    Returns:
-    - List of predicted rows
+    Rules:
+    - Every chunk carries the full train set and a slice of predict
+      distances, sized so the encoded request fits max_payload_bytes;
+      a chunk that still encodes larger is halved until it fits
+    - Chunks run concurrently (bounded), each with retry and backoff
+    - Predictions come back in the order of `predict_d`
     """
-
-    # ----------------------------
-    # Load train data
-    # ----------------------------
-    train_rows = _read_csv(train_csv)
-    predict_rows = _read_csv(predict_csv)
-
-    if not predict_rows:
-        return []
-
-    # ----------------------------
-    # Prepare payload
-    # ----------------------------
-    payload = {
-        "train": [
-            {
-                "distance_along": float(r["distance_along"]),
-                "value": float(r["magnetic_value"]),
-            }
-            for r in train_rows
-        ],
-        "predict": [
-            {
-                "distance_along": float(r["distance_along"]),
-            }
-            for r in predict_rows
-        ],
-    }
-
-    # ----------------------------
-    # Invoke endpoint
-    # ----------------------------
-    response = _runtime.invoke_endpoint(
-        EndpointName=SAGEMAKER_ENDPOINT_NAME,
-        ContentType="application/json",
-        Body=json.dumps(payload),
-    )
-
-    # ----------------------------
-    # Parse response
-    # ----------------------------
-    body = response["Body"].read().decode("utf-8")
-    result = json.loads(body)
-
-    if "predictions" not in result:
-        raise RuntimeError("Invalid response from SageMaker endpoint")
-
-    predictions = []
-    for item in result["predictions"]:
-        predictions.append({
-            "distance_along": float(item["distance_along"]),
-            "magnetic_value": float(item["magnetic_value"]),
-        })
-
-    return predictions
-
-
-# ============================================================
-# Internal helpers
-# ============================================================
-
-def _read_csv(path: Path) -> List[Dict]:
-    with open(path, newline="") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+    fmt = payload_format or settings.inference_payload_format
+    max_bytes = max_payload_bytes or settings.inference_max_payload_bytes
+    runtime = runtime or get_runtime()
+
+    n_predict = predict_d.shape[0]
+    if not n_predict:
+        return np.empty((0,) + train_v.shape[1:])
+
+    content_type = payloads.request_content_type(fmt, channels)
+    rows = _chunk_rows(train_d.shape[0], fmt, max_bytes, channels)
+    bounds = [(lo, min(lo + rows, n_predict)) for lo in range(0, n_predict, rows)]
+
+    def run(bound):
+        lo, hi = bound
+        body = payloads.encode_request(train_d, train_v, predict_d[lo:hi], fmt, channels)
+
+        if len(body) > max_bytes:
+            if hi - lo == 1:
+                raise RuntimeError(
+                    f"Train set of {train_d.shape[0]} rows does not fit a {max_bytes}-byte endpoint payload"
+                )
+            mid = (lo + hi) // 2
+            return np.concatenate([run((lo, mid)), run((mid, hi))])
+
+        values = _invoke_with_retry(runtime, body, content_type, fmt, channels)
+        if values.shape[0] != hi - lo:
+            raise RuntimeError(
+                f"Endpoint returned {values.shape[0]} predictions for {hi - lo} rows"
+            )
+        return values
+
+    if len(bounds) == 1:
+        return run(bounds[0])
+
+    # map() yields in submission order, so chunks reassemble in place
+    if concurrency is None:
+        return np.concatenate(list(_invoke_pool().map(run, bounds)))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return np.concatenate(list(pool.map(run, bounds)))
+
+
+def _chunk_rows(n_train: int, fmt: str, max_bytes: int, channels: Optional[Sequence[str]] = None) -> int:
+    fixed = payloads.request_size(n_train, 0, fmt, channels)
+    per_row = payloads.request_size(n_train, 1, fmt, channels) - fixed
+
+    if fixed + per_row > max_bytes:
+        raise RuntimeError(
+            f"Train set of {n_train} rows does not fit a {max_bytes}-byte endpoint payload"
+        )
+
+    return max(1, min(settings.inference_max_chunk_rows, (max_bytes - fixed) // per_row))
+
+
+def _invoke_with_retry(
+    runtime,
+    body: bytes,
+    content_type: str,
+    fmt: str,
+    channels: Optional[Sequence[str]] = None,
+) -> np.ndarray:
+    attempt = 0
+    while True:
+        try:
+            response = runtime.invoke_endpoint(
+                EndpointName=SAGEMAKER_ENDPOINT_NAME,
+                ContentType=content_type,
+                Accept=fmt,
+                Body=body,
+            )
+            return payloads.decode_response(response["Body"].read(), fmt, channels)
+        except (ClientError, BotoConnectionError, ReadTimeoutError) as exc:
+            attempt += 1
+            if attempt > settings.inference_max_retries or not _retryable(exc):
+                raise
+
+            # Full jitter exponential backoff
+            time.sleep(random.uniform(0, settings.inference_backoff_seconds * 2 ** attempt))
+
+
+def _retryable(exc: Exception) -> bool:
+    if not isinstance(exc, ClientError):
+        return True
+
+    error = exc.response.get("Error", {})
+    status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+    return error.get("Code") in RETRYABLE_ERROR_CODES or status >= 500
+
+
+def _invoke_pool() -> ThreadPoolExecutor:
+    """
+    Shared across jobs so the total number of in-flight endpoint calls
+    stays bounded by settings.inference_concurrency.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.inference_concurrency,
+                thread_name_prefix="gaia-invoke",
+            )
+        return _pool
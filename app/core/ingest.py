@@ -0,0 +1,552 @@
+# app/core/ingest.py
+
+import csv
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from app.core.config import settings
+from app.core.executor import executor
+from app.core.s3_io import RawCsvUpload
+from app.core.storage import get_store
+from app.core.traverse import IS_MEASURED_COL, Traverse
+from app.schemas.job import JobCreateRequest
+
+
+# ============================================================
+# Typed column parser
+# ============================================================
+
+# is_measured spellings (Arrow matches them case-sensitively); an empty
+# cell is not measured
+_TRUE_VALUES = ("true", "t", "1", "yes", "y")
+_FALSE_VALUES = ("false", "f", "0", "no", "n", "")
+
+# Arrow's float syntax (its null spellings, e.g. NaN, are checked apart)
+_NUMBER = r"^[+-]?(\d+\.?\d*([eE][+-]?\d+)?|\.\d+([eE][+-]?\d+)?|[iI]nf(inity)?|INF(INITY)?)$"
+
+
+class CsvValidationError(ValueError):
+    """
+    Rows that failed validation. `errors` holds one report per problem
+    ({"line", "column", "value", "error"}), at most
+    settings.ingest_max_error_reports of them; `count` is the total.
+    """
+
+    def __init__(self, errors: List[Dict], count: int):
+        self.errors = errors
+        self.count = count
+
+        shown = "; ".join(_describe(e) for e in errors[:3])
+        more = f" (and {count - 3} more)" if count > 3 else ""
+        super().__init__(f"{count} invalid value(s) in CSV: {shown}{more}")
+
+
+class ColumnarCsvParser:
+    """
+    Parses a CSV stream into typed column arrays with pyarrow.
+
+    Only the x / y / value (and `is_measured`, when present) columns are
+    read, plus any extra value channels and the line column when one is
+    given (dictionary-coded). Numbers are decoded straight into float64
+    blocks on several threads; nothing is held as Python strings.
+
+    Validation is one vectorized pass over the columns (see _validate).
+    Every problem is reported with its file line, not just the first;
+    lines are only worked out, with a second read, when there are
+    problems to report.
+    """
+
+    def __init__(
+        self,
+        *,
+        x_col: str,
+        y_col: str,
+        value_col: str,
+        line_col: Optional[str] = None,
+        channels: Sequence[str] = (),
+    ):
+        self.x_col = x_col
+        self.y_col = y_col
+        self.value_col = value_col
+        self.line_col = line_col
+        self.channels = [c for c in channels if c != value_col]
+
+    def parse(self, stream: "ChunkStream", reread: Optional[Callable[[], "ChunkStream"]] = None) -> Traverse:
+        """
+        `reread` opens the same bytes again, to locate the problems found.
+        """
+        header = stream.header()
+        if header is None:
+            raise ValueError("CSV file is empty")
+
+        numeric = [self.x_col, self.y_col, self.value_col, *self.channels]
+        for name in (*numeric, self.line_col):
+            if name is not None and name not in header:
+                raise ValueError(f"CSV is missing column '{name}'")
+
+        types = {name: pa.float64() for name in numeric}
+        if IS_MEASURED_COL in header:
+            types[IS_MEASURED_COL] = pa.bool_()
+        if self.line_col is not None:
+            types[self.line_col] = pa.string()
+
+        malformed = _MalformedRows(settings.ingest_max_error_reports)
+        try:
+            table = _read(stream, header, types, malformed)
+        except pa.ArrowInvalid as exc:
+            # Arrow stops at the first value it cannot convert
+            if reread is not None:
+                self._report_unparseable(reread, header, types)
+            raise ValueError(f"Invalid CSV: {exc}")
+
+        columns = {
+            name: table.column(name).to_numpy()
+            for name in numeric
+        }
+
+        # Without an is_measured column every station is flagged:
+        # whether it is measured then depends on its values alone
+        measured = np.ones(table.num_rows, dtype=bool)
+        if IS_MEASURED_COL in types:
+            measured = pc.fill_null(table.column(IS_MEASURED_COL), False).to_numpy()
+
+        extras, codes = {}, None
+        if self.line_col is not None:
+            labels = pc.fill_null(pc.utf8_trim_whitespace(table.column(self.line_col)), "")
+            coded = labels.combine_chunks().dictionary_encode()
+            codes = coded.indices.to_numpy()
+            extras[self.line_col] = coded.dictionary.to_numpy(zero_copy_only=False).astype(object)[codes]
+
+        problems = self._validate(columns, codes)
+        if problems or malformed.count:
+            _raise_problems(problems, malformed, table.num_rows, reread, stream.header_line, len(header))
+
+        return Traverse.from_arrays(
+            columns[self.x_col],
+            columns[self.y_col],
+            columns[self.value_col],
+            x_col=self.x_col,
+            y_col=self.y_col,
+            value_col=self.value_col,
+            is_measured=measured,
+            channels={name: columns[name] for name in self.channels},
+            extras=extras,
+        )
+
+    # --------------------------------------------------
+    # Internals
+    # --------------------------------------------------
+
+    def _validate(self, columns: Dict[str, np.ndarray], codes: Optional[np.ndarray]) -> List[Tuple]:
+        """
+        Rules:
+        - coordinates are present and finite
+        - values are numbers or empty (not measured), never infinite
+        - no two stations (of one line) share coordinates
+
+        Returns (column, row mask, values, message) per rule.
+        """
+        x, y = columns[self.x_col], columns[self.y_col]
+        problems = []
+
+        for name in (self.x_col, self.y_col):
+            col = columns[name]
+            problems.append((name, np.isnan(col), col, "missing coordinate"))
+            problems.append((name, np.isinf(col), col, "coordinate is not finite"))
+
+        for name in (self.value_col, *self.channels):
+            col = columns[name]
+            problems.append((name, np.isinf(col), col, "value is not finite"))
+
+        # Duplicates: sort by (line, x, y) and compare neighbours
+        if codes is None:
+            codes = np.zeros(x.shape[0], dtype=np.int64)
+
+        order = np.lexsort((y, x, codes))
+        same = (
+            (codes[order][1:] == codes[order][:-1])
+            & (x[order][1:] == x[order][:-1])
+            & (y[order][1:] == y[order][:-1])
+        )
+        if same.any():
+            duplicate = np.zeros(x.shape[0], dtype=bool)
+            duplicate[order[1:][same]] = True
+            problems.append((f"{self.x_col},{self.y_col}", duplicate, np.column_stack((x, y)), "duplicate station"))
+
+        return [p for p in problems if p[1].any()]
+
+    def _report_unparseable(self, reread: Callable[[], "ChunkStream"], header, types):
+        """
+        Second read with the typed columns as text: finds every value
+        Arrow cannot convert, then raises CsvValidationError.
+        """
+        malformed = _MalformedRows(settings.ingest_max_error_reports)
+        stream = reread()
+        table = _read(stream, header, {name: pa.string() for name in types}, malformed)
+        problems = []
+
+        for name, type_ in types.items():
+            if type_ == pa.string():
+                continue
+
+            text = pc.utf8_trim_whitespace(table.column(name))
+            if type_ == pa.bool_():
+                valid = pc.is_in(pc.utf8_lower(text), pa.array(_TRUE_VALUES + _FALSE_VALUES))
+                message = "not a boolean"
+            else:
+                valid = pc.or_(
+                    pc.match_substring_regex(text, _NUMBER),
+                    pc.is_in(text, pa.array(pacsv.ConvertOptions().null_values)),
+                )
+                message = "not a number"
+
+            invalid = ~valid.to_numpy(zero_copy_only=False)
+            if invalid.any():
+                problems.append((name, invalid, table.column(name), message))
+
+        if problems:
+            _raise_problems(problems, malformed, table.num_rows, reread, stream.header_line, len(header))
+
+
+class _MalformedRows:
+    """
+    Rows with too few / many fields: the text of the first `limit`
+    (the reports shown) and how many there were in all.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.texts: List[str] = []
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self, text: str):
+        # Arrow may call the handler from several parsing threads
+        with self._lock:
+            self.count += 1
+            if len(self.texts) < self.limit:
+                self.texts.append(text)
+
+
+def _read(stream, header: List[str], types: Dict, malformed: _MalformedRows) -> pa.Table:
+    def invalid_row(row):
+        # Rows with too few / many fields are reported with the others
+        malformed.add(row.text)
+        return "skip"
+
+    return pacsv.read_csv(
+        stream,
+        read_options=pacsv.ReadOptions(
+            use_threads=True,
+            block_size=settings.ingest_chunk_bytes,
+            column_names=header,
+            skip_rows=stream.header_line,
+        ),
+        parse_options=pacsv.ParseOptions(invalid_row_handler=invalid_row),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=list(types),
+            column_types=types,
+            true_values=_spellings(_TRUE_VALUES),
+            false_values=_spellings(_FALSE_VALUES),
+            strings_can_be_null=False,
+        ),
+    )
+
+
+def _raise_problems(problems, malformed, n_rows, reread, header_line, n_fields):
+    """
+    Raises CsvValidationError for (column, row mask, values, message)
+    problems plus malformed rows, located by file line.
+    """
+    limit = settings.ingest_max_error_reports
+    count = malformed.count + sum(int(mask.sum()) for _, mask, _, _ in problems)
+
+    if reread is not None:
+        lines, malformed_lines = _locate_rows(reread(), header_line, n_fields)
+    else:
+        # Rows fill the lines after the header (blank lines aside)
+        lines = np.arange(header_line + 1, header_line + 1 + n_rows)
+        malformed_lines = [None] * len(malformed.texts)
+
+    errors = [
+        {"line": line, "column": None, "value": text, "error": "wrong number of fields"}
+        for line, text in zip(malformed_lines[:limit], malformed.texts)
+    ]
+
+    for name, mask, col, message in problems:
+        rows = np.flatnonzero(mask)[:max(limit - len(errors), 0)]
+        # Reported as text: NaN / inf are not valid JSON
+        if isinstance(col, np.ndarray):
+            values = [",".join(map(repr, np.atleast_1d(v).tolist())) for v in col[rows]]
+        else:
+            values = col.take(pa.array(rows)).to_pylist()
+
+        errors.extend(
+            {"line": int(lines[i]), "column": name, "value": value, "error": message}
+            for i, value in zip(rows.tolist(), values)
+        )
+
+    errors.sort(key=lambda e: e["line"] or 0)
+    raise CsvValidationError(errors, count)
+
+
+def _locate_rows(stream: "ChunkStream", header_line: int, n_fields: int) -> Tuple[np.ndarray, List[int]]:
+    """
+    File lines of the data rows and of the malformed rows, as Arrow
+    splits them: blank lines are skipped, a row is malformed if its
+    field count differs from the header's.
+    """
+    stream.header()
+    rows = array("q")
+    malformed = []
+
+    for number, raw in enumerate(io.BufferedReader(stream, 1024 * 1024), start=1):
+        text = raw.rstrip(b"\r\n")
+        if number <= header_line or not text:
+            continue
+
+        if text.count(b",") + 1 == n_fields or len(next(csv.reader([text.decode("utf-8", "replace")]))) == n_fields:
+            rows.append(number)
+        else:
+            malformed.append(number)
+
+    return np.frombuffer(rows, dtype=np.int64), malformed
+
+
+def _spellings(words: Sequence[str]) -> List[str]:
+    return sorted({v for w in words for v in (w, w.upper(), w.capitalize())})
+
+
+def _describe(error: Dict) -> str:
+    where = "line ?" if error["line"] is None else f"line {error['line']}"
+    if error["column"] is not None:
+        where += f", column '{error['column']}'"
+    return f"{where}: {error['error']} ({error['value']!r})"
+
+
+class ChunkStream(io.RawIOBase):
+    """
+    Read-only binary stream over an iterator of byte chunks. Every chunk
+    is passed to `on_chunk` as it is consumed (e.g. to the raw upload),
+    so parsing and storing share one pass.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], on_chunk: Optional[Callable[[bytes], None]] = None):
+        self._chunks = iter(chunks)
+        self._on_chunk = on_chunk
+        self._buffer = bytearray()
+
+        # Physical line of the header (leading blank lines are skipped)
+        self.header_line = 1
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        # Arrow takes a short read for the end of the stream: fill `b`
+        while len(self._buffer) < len(b):
+            if not self._next():
+                break
+
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        del self._buffer[:n]
+        return n
+
+    def header(self) -> Optional[List[str]]:
+        """
+        Column names of the first non-blank line, without consuming it.
+        """
+        while True:
+            lines = bytes(self._buffer).split(b"\n")
+            for number, line in enumerate(lines[:-1], start=1):
+                if line.strip():
+                    self.header_line = number
+                    return _header_names(line)
+
+            if not self._next():
+                if not lines[-1].strip():
+                    return None
+                self.header_line = len(lines)
+                return _header_names(lines[-1])
+
+    def _next(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+
+        if self._on_chunk is not None:
+            self._on_chunk(chunk)
+        self._buffer += chunk
+        return True
+
+
+def _header_names(line: bytes) -> List[str]:
+    text = line.decode("utf-8").lstrip("\ufeff").rstrip("\r")
+    return [name.strip() for name in next(csv.reader([text]))]
+
+
+# ============================================================
+# Upload staging
+# ============================================================
+
+class StagedUpload:
+    """
+    Local spool of an uploaded CSV.
+
+    Lets a queued job outlive the HTTP request that delivered the file.
+    `sha256` is the hex digest of the raw bytes.
+    """
+
+    def __init__(self, path: str, size: int, sha256: Optional[str] = None):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+    def chunks(self, chunk_size: int) -> Iterator[bytes]:
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def head(self, size: int) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read(size)
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class StoredUpload:
+    """
+    Upload already assembled in object storage under the job's input
+    prefix (see uploads.py); it is the job's raw CSV as it stands.
+
+    `sha256` is the hex digest the client declared for the whole file
+    (None if it declared none); ingest_csv_file checks it.
+    """
+
+    def __init__(self, key: str, size: int, sha256: Optional[str] = None):
+        self.key = key
+        self.size = size
+        self.sha256 = sha256
+
+    def chunks(self, chunk_size: int) -> Iterator[bytes]:
+        return get_store().open_chunks(self.key, chunk_size)
+
+    def head(self, size: int) -> bytes:
+        return get_store().get_range(self.key, 0, size)[0]
+
+    def cleanup(self):
+        # The object is the job's raw input: kept
+        pass
+
+
+async def stage_upload(csv_file) -> StagedUpload:
+    """
+    Spools a request upload to the staging directory. The disk writes
+    run on the IO pool, so a slow disk does not stall the event loop.
+    """
+    out, path = await executor.run_io(_open_staging_file)
+
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        while True:
+            chunk = await csv_file.read(settings.ingest_chunk_bytes)
+            if not chunk:
+                break
+            await executor.run_io(out.write, chunk)
+            digest.update(chunk)
+            size += len(chunk)
+    except BaseException:
+        await executor.run_io(_discard_staging_file, out, path)
+        raise
+
+    await executor.run_io(out.close)
+    return StagedUpload(path, size, digest.hexdigest())
+
+
+def _open_staging_file():
+    os.makedirs(settings.staging_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".csv", dir=settings.staging_dir)
+    return os.fdopen(fd, "wb"), path
+
+
+def _discard_staging_file(out, path: str):
+    out.close()
+    os.remove(path)
+
+
+# ============================================================
+# Upload ingest
+# ============================================================
+
+def ingest_csv_file(
+    job_id: str,
+    upload: Union[StagedUpload, StoredUpload],
+    request: JobCreateRequest,
+    filename: str = "uploaded.csv",
+) -> Traverse:
+    """
+    Streams a staged CSV in fixed-size chunks.
+
+    Each chunk is written to the raw S3 upload as the parser consumes
+    it, so peak memory is bounded by the chunk and part sizes plus the
+    projected columns. Stored uploads already are the raw upload and
+    are only parsed, and checked against their declared SHA-256.
+    """
+    stored = isinstance(upload, StoredUpload)
+    raw_upload = None if stored else RawCsvUpload(job_id, filename)
+
+    chunks = upload.chunks(settings.ingest_chunk_bytes)
+    if stored and upload.sha256 is not None:
+        chunks = _verify_sha256(chunks, upload.sha256)
+
+    parser = ColumnarCsvParser(
+        x_col=request.x_column,
+        y_col=request.y_column,
+        value_col=request.value_column,
+        line_col=request.line_column,
+        channels=request.value_columns,
+    )
+
+    try:
+        traverse = parser.parse(
+            ChunkStream(chunks, None if raw_upload is None else raw_upload.write),
+            reread=lambda: ChunkStream(upload.chunks(settings.ingest_chunk_bytes)),
+        )
+
+    except Exception:
+        if raw_upload is not None:
+            raw_upload.abort()
+        raise
+
+    if raw_upload is not None:
+        raw_upload.close()
+    return traverse
+
+
+def _verify_sha256(chunks: Iterable[bytes], expected: str) -> Iterator[bytes]:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+    if digest.hexdigest() != expected:
+        raise ValueError("Upload does not match the SHA-256 declared for it")
@@ -0,0 +1,358 @@
+# app/core/job_index.py
+
+"""
+Index of jobs for listing, maintained by the job store.
+
+Every job record write that changes the job's status is:
+- upserted into a local SQLite table, which serves list_jobs
+- appended to a manifest in the object store: one small immutable
+  object per change under index/manifest/, named by time, so instances
+  never contend on a shared object
+
+Instances pick up each other's changes by listing manifest entries
+after the last one they applied (sync), rewound by a clock skew margin.
+Every `job_index_snapshot_every` entries a snapshot of the whole index
+is written, so a fresh instance starts from the latest snapshot instead
+of the full history. Entries are applied newest-updated_at-wins, so
+replaying them out of order or twice is harmless.
+
+Indexed fields: job_id, status, created_at and updated_at (the time of
+the last status change).
+
+Jobs recorded before the index existed are added once per index
+database by a backfill from the job store, run at startup.
+"""
+
+import base64
+import gzip
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.storage import ObjectNotFound, get_store
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PREFIX = "index/manifest/"
+SNAPSHOT_PREFIX = "index/snapshots/"
+
+FIELDS = ("job_id", "status", "created_at", "updated_at")
+
+_UPSERT = (
+    "INSERT INTO job_index (job_id, status, created_at, updated_at) VALUES (?, ?, ?, ?)"
+    " ON CONFLICT (job_id) DO UPDATE SET"
+    " status = excluded.status, created_at = excluded.created_at, updated_at = excluded.updated_at"
+    " WHERE excluded.updated_at >= job_index.updated_at"
+)
+
+
+class JobIndex:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_at = 0.0
+
+        # Manifest entries inside the skew margin already applied
+        self._seen: Set[str] = set()
+
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_index ("
+                " job_id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " created_at TEXT NOT NULL,"
+                " updated_at TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS job_index_created"
+                " ON job_index (created_at DESC, job_id DESC)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS job_index_status"
+                " ON job_index (status, created_at DESC, job_id DESC)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS index_meta ("
+                " name TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL)"
+            )
+
+    # ------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------
+
+    def record(self, record: Dict):
+        """
+        Indexes a job record just written to the job store. Only status
+        changes are indexed; a failure to publish one is logged, never
+        raised, so it cannot fail the job.
+        """
+        entry = _entry(record)
+        if entry is None:
+            return
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM job_index WHERE job_id = ?", (entry["job_id"],)
+            ).fetchone()
+            if row is not None and row[0] == entry["status"]:
+                return
+            self._conn.execute(_UPSERT, tuple(entry[name] for name in FIELDS))
+
+        key = f"{MANIFEST_PREFIX}{time.time_ns():020d}-{uuid.uuid4().hex}.json"
+        try:
+            get_store().put(key, json.dumps(entry).encode("utf-8"), content_type="application/json")
+        except Exception:
+            logger.exception("Publishing index entry for %s failed", entry["job_id"])
+            return
+
+        with self._lock:
+            self._seen.add(key)
+
+    def backfill(self, records: Iterable[Dict]):
+        """
+        Indexes existing job records, once per index database. Entries
+        are applied locally only: every instance backfills its own
+        index, and newer manifest entries still win.
+        """
+        if self._meta("backfilled") is not None:
+            return
+
+        rows = []
+        for record in records:
+            entry = _entry(record)
+            if entry is not None:
+                rows.append(tuple(entry[name] for name in FIELDS))
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(_UPSERT, rows)
+            self._conn.execute("COMMIT")
+
+        self._set_meta(backfilled=datetime.utcnow().isoformat())
+        logger.info("Backfilled %d jobs into the job index", len(rows))
+
+    # ------------------------------------------------------------
+    # Listing
+    # ------------------------------------------------------------
+
+    def list_jobs(
+        self,
+        status: Optional[List[str]] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Dict:
+        """
+        Jobs newest first. `next_cursor` continues the listing with the
+        same filters; it is None on the last page.
+
+        Rules:
+        - status: any of the given statuses
+        - created_after <= created_at < created_before
+        - an invalid cursor raises ValueError
+        """
+        self.maybe_sync()
+
+        where, args = [], []
+        if status:
+            where.append(f"status IN ({', '.join('?' * len(status))})")
+            args.extend(status)
+        if created_after is not None:
+            where.append("created_at >= ?")
+            args.append(_timestamp(created_after))
+        if created_before is not None:
+            where.append("created_at < ?")
+            args.append(_timestamp(created_before))
+        if cursor is not None:
+            where.append("(created_at, job_id) < (?, ?)")
+            args.extend(_decode_cursor(cursor))
+
+        query = f"SELECT {', '.join(FIELDS)} FROM job_index"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY created_at DESC, job_id DESC LIMIT ?"
+        args.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+
+        jobs = [dict(zip(FIELDS, row)) for row in rows[:limit]]
+        more = len(rows) > limit
+
+        return {
+            "jobs": jobs,
+            "next_cursor": _encode_cursor(jobs[-1]) if more else None,
+        }
+
+    # ------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------
+
+    def maybe_sync(self):
+        if time.monotonic() - self._synced_at < settings.job_index_sync_seconds:
+            return
+
+        try:
+            self.sync()
+        except Exception:
+            # Serve the local index rather than fail the listing
+            logger.exception("Syncing the job index failed")
+
+    def sync(self):
+        """
+        Applies manifest entries written since the last sync (by any
+        instance), and writes a snapshot when enough have accumulated.
+        """
+        with self._sync_lock:
+            store = get_store()
+            cursor = self._meta("cursor")
+            if cursor is None:
+                cursor = self._load_snapshot()
+
+            start = None if cursor is None else _rewind(cursor, settings.job_index_skew_seconds)
+            applied = 0
+
+            for key in store.list_keys(MANIFEST_PREFIX, start):
+                cursor = key if cursor is None else max(cursor, key)
+                if key in self._seen:
+                    continue
+
+                try:
+                    entry = json.loads(store.get(key))
+                except ObjectNotFound:
+                    # Expired by a lifecycle rule; a snapshot covers it
+                    continue
+
+                with self._lock:
+                    self._conn.execute(_UPSERT, tuple(entry[name] for name in FIELDS))
+                    self._seen.add(key)
+                applied += 1
+
+            if cursor is not None:
+                self._forget_before(_rewind(cursor, settings.job_index_skew_seconds))
+                pending = int(self._meta("since_snapshot") or 0) + applied
+                if pending >= settings.job_index_snapshot_every:
+                    self._write_snapshot(cursor)
+                    pending = 0
+                self._set_meta(cursor=cursor, since_snapshot=str(pending))
+
+            self._synced_at = time.monotonic()
+
+    def _load_snapshot(self) -> Optional[str]:
+        """
+        Loads the newest snapshot; returns the manifest key it covers.
+        """
+        keys = list(get_store().list_keys(SNAPSHOT_PREFIX))
+        if not keys:
+            return None
+
+        body = gzip.decompress(get_store().get(keys[-1]))
+        rows = [json.loads(line) for line in body.splitlines() if line]
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(_UPSERT, [tuple(row[name] for name in FIELDS) for row in rows])
+            self._conn.execute("COMMIT")
+
+        return MANIFEST_PREFIX + keys[-1][len(SNAPSHOT_PREFIX):-len(".gz")]
+
+    def _write_snapshot(self, cursor: str):
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(FIELDS)} FROM job_index").fetchall()
+
+        body = "".join(json.dumps(dict(zip(FIELDS, row))) + "\n" for row in rows)
+        get_store().put(
+            f"{SNAPSHOT_PREFIX}{cursor[len(MANIFEST_PREFIX):]}.gz",
+            gzip.compress(body.encode("utf-8")),
+            content_type="application/gzip",
+        )
+
+    def _forget_before(self, key: str):
+        with self._lock:
+            self._seen = {seen for seen in self._seen if seen > key}
+
+    def _meta(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM index_meta WHERE name = ?", (name,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def _set_meta(self, **values: str):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO index_meta (name, value) VALUES (?, ?)",
+                list(values.items()),
+            )
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def _entry(record: Dict) -> Optional[Dict]:
+    """
+    The indexed fields of a job record; None for records that predate
+    timestamps.
+    """
+    if "created_at" not in record:
+        return None
+
+    return {
+        "job_id": record["job_id"],
+        "status": record.get("status", "unknown"),
+        "created_at": record["created_at"],
+        "updated_at": record.get("updated_at") or record["created_at"],
+    }
+
+
+def _rewind(key: str, seconds: float) -> str:
+    """
+    The manifest key `seconds` before `key`: entries from instances
+    with a slower clock may still land up to then.
+    """
+    written_ns = int(key[len(MANIFEST_PREFIX):].split("-", 1)[0])
+    return f"{MANIFEST_PREFIX}{max(written_ns - int(seconds * 1e9), 0):020d}"
+
+
+def _timestamp(value: datetime) -> str:
+    # Records carry naive UTC timestamps (datetime.utcnow)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def _encode_cursor(job: Dict) -> str:
+    raw = json.dumps([job["created_at"], job["job_id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> List[str]:
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, UnicodeEncodeError):
+        raise ValueError("Invalid cursor")
+
+    return [str(created_at), str(job_id)]
+
+
+_job_index: Optional[JobIndex] = None
+
+
+def get_job_index() -> JobIndex:
+    global _job_index
+
+    if _job_index is None:
+        _job_index = JobIndex(settings.job_index_sqlite_path)
+
+    return _job_index
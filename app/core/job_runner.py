@@ -1,109 +1,906 @@
 # app/core/job_runner.py
 
-import csv
-from typing import List, Dict
+import asyncio
+import json
+from itertools import chain
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
 
 from app.schemas.job import JobCreateRequest, JobStatus
+from app.core import admission, aio, append, artifacts, inference, local_inference, payloads, results
+from app.core.completions import tracker
+from app.core.config import settings
+from app.core.merge import merge_measured_and_predicted
+from app.core.sagemaker_client import SageMakerClient
+from app.core.storage import get_store, object_uri
+from app.core.traverse import Traverse
+from app.core.events import event_bus
+from app.core.executor import executor
+from app.core.ingest import CsvValidationError, StagedUpload, ingest_csv_file
 from app.core.geometry import (
     compute_distance_along_traverse,
+    cumulative_distance,
     generate_sparse_geometry,
 )
 from app.core.csv_splitter import split_train_predict
-from app.core.s3_io import upload_raw_csv
-from app.core.job_store import (
-    create_job_record,
-    update_job_status,
-)
+
+
+# (station spacing, predict set) per requested spacing; the spacing is
+# None for explicit geometry
+SpacedPredicts = List[Tuple[Optional[float], Traverse]]
+
+
+class Geometry(NamedTuple):
+    train: Traverse
+    predicts: SpacedPredicts
+    # Union of the predict sets: what inference runs on
+    combined: Traverse
+    # Last station in file order: {"x", "y", "d_along"}
+    last: Dict
+
+
+def build_geometry(
+    traverse: Traverse,
+    request: JobCreateRequest,
+    origin: Optional[Dict] = None,
+) -> Geometry:
+    """
+    CPU-bound part of a job: distance, geometry and train/predict split.
+    Module-level so it can run in the executor's process pool.
+
+    With `origin` (the last station of a job, see append.py) the
+    stations extend that job: distance continues from it and only the
+    new segments get geometry. Empty train / predict sets are then
+    allowed.
+    """
+
+    # --------------------------------------------------
+    # 1. Distance computation (always)
+    # --------------------------------------------------
+    if origin is None:
+        traverse = compute_distance_along_traverse(
+            traverse,
+            x_col=request.x_column,
+            y_col=request.y_column,
+        )
+    else:
+        # Unvalued anchor station: starts the first new segment but is
+        # neither trained on nor predicted (it is already stored)
+        traverse = _anchor(traverse, origin).concat(traverse)
+        traverse.d_along = cumulative_distance(traverse.x, traverse.y, start=origin["d_along"])
+
+        if request.scenario != "sparse":
+            traverse = traverse.select(slice(1, None))
+
+    last = {
+        "x": float(traverse.x[-1]),
+        "y": float(traverse.y[-1]),
+        "d_along": float(traverse.d_along[-1]),
+    }
+
+    # --------------------------------------------------
+    # 2. Geometry
+    # --------------------------------------------------
+    if request.scenario == "sparse":
+        # Every spacing from one sorted pass
+        geometries = list(zip(
+            request.station_spacings,
+            generate_sparse_geometry(
+                traverse,
+                x_col=request.x_column,
+                y_col=request.y_column,
+                value_col=request.value_column,
+                spacing=request.station_spacings,
+            ),
+        ))
+    else:
+        # explicit geometry: the file's is_measured flag, per channel
+        # where that channel has a value (see split_train_predict)
+        geometries = [(None, traverse)]
+
+    # --------------------------------------------------
+    # 3. Split train / predict (shared masks for every channel)
+    # --------------------------------------------------
+    # Train is the measured stations, the same for every spacing
+    predicts = []
+    for spacing, geometry in geometries:
+        train, predict = split_train_predict(
+            geometry,
+            value_col=request.value_column,
+            measured_per_channel=request.scenario == "explicit",
+        )
+        predicts.append((spacing, predict))
+
+    combined = combine_predicts(predicts)
+
+    if origin is None:
+        if not len(train):
+            raise ValueError("No measured rows for training")
+
+        for name in train.channels:
+            if np.isnan(train.channels[name]).all():
+                raise ValueError(f"No measured rows for training channel '{name}'")
+
+        if not len(combined):
+            raise ValueError("No rows to predict")
+
+    return Geometry(train, predicts, combined, last)
+
+
+def _anchor(traverse: Traverse, origin: Dict) -> Traverse:
+    nan = np.full(1, np.nan)
+
+    return Traverse.from_arrays(
+        [origin["x"]],
+        [origin["y"]],
+        nan,
+        x_col=traverse.x_col,
+        y_col=traverse.y_col,
+        value_col=traverse.value_col,
+        is_measured=np.ones(1, dtype=bool),
+        channels={name: nan for name in traverse.channels},
+        columns=traverse.columns,
+    )
+
+
+def combine_predicts(predicts: SpacedPredicts) -> Traverse:
+    """
+    Union of every spacing's predict stations, ordered by distance, so
+    one fit serves all spacings; shared stations are predicted once.
+    """
+    if len(predicts) == 1:
+        return predicts[0][1]
+
+    first = predicts[0][1]
+    d_along = np.unique(np.concatenate([predict.d_along for _, predict in predicts]))
+    n = d_along.shape[0]
+
+    return Traverse.from_arrays(
+        np.full(n, np.nan),
+        np.full(n, np.nan),
+        np.full(n, np.nan),
+        x_col=first.x_col,
+        y_col=first.y_col,
+        value_col=first.value_col,
+        d_along=d_along,
+        is_measured=np.zeros(n, dtype=bool),
+        channels={name: np.full(n, np.nan) for name in first.channels},
+    )
+
+
+def select_backend(n_rows: int, n_bytes: int, model: str) -> str:
+    backend = settings.inference_backend
+
+    if backend not in ("auto", "local", "async", "realtime"):
+        raise ValueError(f"Unknown inference backend '{backend}'")
+
+    # The endpoints run one fixed model: any other runs locally
+    if model != settings.sagemaker_endpoint_model:
+        return "local"
+
+    if backend == "auto":
+        return "local" if local_inference.runs_locally(n_rows, n_bytes) else "async"
+
+    return backend
+
+
+def write_merged_result(
+    job_id: str,
+    train: Traverse,
+    predict: Traverse,
+    values: np.ndarray,
+    line: Optional[str] = None,
+    spacing: Optional[float] = None,
+    split_at: Optional[float] = None,
+    keep: Optional[Dict[str, int]] = None,
+) -> Dict[str, Tuple[str, int]]:
+    """
+    Step 6: streaming merge of measured and predicted stations into one
+    result per channel. `values` holds the predictions, (n_predict,) or
+    (n_predict, channels); a channel takes them where predict has NaN.
+    `spacing` is only given for extra (non-primary) spacings.
+
+    For appends, `keep` maps result keys to the bytes kept before the
+    merged rows, and `split_at` is the distance whose byte offset is
+    returned (see results.write_result).
+
+    Returns {channel: (result key, offset)}, the primary channel first.
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(predict), len(train.value_cols))
+    keys = {}
+
+    for j, name in enumerate(train.value_cols):
+        measured = train.for_channel(name)
+        measured = measured.select(measured.has_value)
+
+        predicted = predict.for_channel(name)
+        needed = ~predicted.has_value
+        predicted = predicted.select(needed)
+        predicted.value = values[needed, j]
+
+        if np.isnan(predicted.value).any():
+            raise ValueError("Inference left stations without a predicted value")
+
+        channel = None if j == 0 else name
+        keys[name] = results.write_result(
+            job_id,
+            merge_measured_and_predicted(measured, predicted, stream=True),
+            line,
+            channel,
+            spacing,
+            split_at=split_at,
+            keep_bytes=(keep or {}).get(results.result_key(job_id, line, channel, spacing), 0),
+        )
+
+    return keys
+
+
+def write_merged_results(
+    job_id: str,
+    train: Traverse,
+    predicts: SpacedPredicts,
+    combined: Traverse,
+    values: np.ndarray,
+    line: Optional[str] = None,
+    split_at: Optional[float] = None,
+    keep: Optional[Dict[str, int]] = None,
+) -> List[Dict]:
+    """
+    Writes the results of every spacing; each takes its stations'
+    predictions from those made on the combined predict set.
+
+    Returns one {"spacing", "channel", "result", "offset"} entry per
+    result, the primary spacing / channel first.
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(combined), len(train.value_cols))
+    entries = []
+
+    for i, (spacing, predict) in enumerate(predicts):
+        own = values
+        if predict is not combined:
+            own = values[np.searchsorted(combined.d_along, predict.d_along)]
+
+        keys = write_merged_result(
+            job_id, train, predict, own, line, None if i == 0 else spacing, split_at, keep
+        )
+        entries.extend(
+            {"spacing": spacing, "channel": channel, "result": key, "offset": offset}
+            for channel, (key, offset) in keys.items()
+        )
+
+    return entries
+
+
+def rewrite_linear_results(
+    job_id: str,
+    train: Traverse,
+    predicts: SpacedPredicts,
+    sums: Dict[str, append.LinearSums],
+) -> List[Dict]:
+    """
+    Appends to a linear job (see append.py): every stored result is
+    streamed back with its predicted rows re-evaluated on the line from
+    `sums`, followed by the merge of the new stations (`train` /
+    `predicts`). Returns entries as write_merged_results does.
+    """
+    entries = []
+
+    for i, (spacing, predict) in enumerate(predicts):
+        for j, name in enumerate(train.value_cols):
+            intercept, slope = append.linear_coefficients(sums[name])
+            channel = None if j == 0 else name
+            result_spacing = None if i == 0 else spacing
+
+            measured = train.for_channel(name)
+            measured = measured.select(measured.has_value)
+
+            predicted = predict.for_channel(name)
+            predicted = predicted.select(~predicted.has_value)
+            predicted.value = intercept + slope * predicted.d_along
+
+            stored = (
+                (d, np.where(m, v, intercept + slope * d), m)
+                for d, v, m in results.open_result(job_id, None, channel, result_spacing).batches()
+            )
+            key, _ = results.write_result(
+                job_id,
+                chain(stored, merge_measured_and_predicted(measured, predicted, stream=True)),
+                None,
+                channel,
+                result_spacing,
+            )
+            entries.append({"spacing": spacing, "channel": name, "result": key, "offset": 0})
+
+    return entries
+
+
+def failure_fields(exc: Exception) -> Dict:
+    """
+    Extra record fields for a failure: per-row reports for invalid CSVs.
+    """
+    if isinstance(exc, CsvValidationError):
+        return {"errors": exc.errors, "error_count": exc.count}
+    return {}
+
+
+def _with_offsets(state: Dict, entries: List[Dict]) -> Dict:
+    """
+    Append state plus the byte offset of its window in every result.
+    """
+    if "tail" not in state:
+        return state
+    return {**state, "offsets": {entry["result"]: entry["offset"] for entry in entries}}
+
+
+def result_fields(entries: List[Dict]) -> Dict:
+    """
+    Record fields for stored results: `result` is the primary one;
+    multi-channel / multi-spacing jobs also list all under `results`.
+    """
+    fields = {"result": entries[0]["result"]}
+    if len(entries) > 1:
+        fields["results"] = [
+            {k: v for k, v in entry.items() if k != "offset"}
+            for entry in entries
+        ]
+    return fields
+
+
+def merge_memory_bytes(train: Traverse, predicts: SpacedPredicts) -> int:
+    """
+    Memory estimate for merging results: every spacing's stations are
+    held at once, as in the job itself.
+    """
+    stations = len(train) + sum(len(predict) for _, predict in predicts)
+    return admission.estimate_station_bytes(stations, len(train.value_cols))
+
+
+def merge_async_output(
+    job_id: str,
+    artifact_keys: Dict[str, str],
+    output_key: str,
+    line: Optional[str] = None,
+    split_at: Optional[float] = None,
+) -> List[Dict]:
+    """
+    Rebuilds train / predict from their artifacts, attaches the async
+    endpoint's predictions (in predict order) and writes the results.
+    """
+    store = get_store()
+
+    def read(key):
+        return artifacts.decode_traverse(store.get(key), artifacts.format_of(key))
+
+    train = read(artifact_keys["train"])
+    combined = read(artifact_keys["predict"])
+
+    values = payloads.decode_async_output(store.get(output_key), combined.value_cols)
+    if values.shape[0] != len(combined):
+        raise RuntimeError(
+            f"Endpoint returned {values.shape[0]} predictions for {len(combined)} stations"
+        )
+
+    predicts = [(None, combined)]
+    if "spacings" in artifact_keys:
+        predicts = [
+            (item["spacing"], combined if item["predict"] == artifact_keys["predict"] else read(item["predict"]))
+            for item in artifact_keys["spacings"]
+        ]
+
+    return write_merged_results(job_id, train, predicts, combined, values, line, split_at)
 
 
 class JobRunner:
     """
     Executes a GAIA job as a strict linear pipeline.
+
+    With a line column, every survey line runs the same pipeline as an
+    independent traverse; lines run concurrently and the job status is
+    aggregated from theirs.
     """
 
     def __init__(self, job_id: str):
         self.job_id = job_id
 
-    async def run(self, csv_file, request: JobCreateRequest):
+        # Serialises this job's record updates (lines finish concurrently)
+        self._record_lock = asyncio.Lock()
+
+    async def create(self):
         # --------------------------------------------------
         # 0. Create job record FIRST
         # --------------------------------------------------
-        create_job_record(self.job_id)
-        update_job_status(self.job_id, JobStatus.running)
+        record = await aio.create_job_record(self.job_id)
+        event_bus.publish(self.job_id, {"status": record["status"], "stage": "queued", "progress": 0})
+
+    async def run(self, upload: StagedUpload, request: JobCreateRequest):
+        await self._set_status(
+            JobStatus.running,
+            stage="ingest",
+            progress=5,
+            channels=request.value_columns,
+            spacings=request.station_spacings,
+        )
 
         try:
-            raw = await csv_file.read()
-            upload_raw_csv(self.job_id, raw, "uploaded.csv")
+            # Raw upload and column parsing happen in one streaming pass
+            traverse = await executor.run_io(
+                ingest_csv_file,
+                self.job_id,
+                upload,
+                request,
+            )
 
-            rows = self._parse_csv(raw)
+            if request.line_column:
+                await self._run_lines(traverse, request, upload.size)
+                return
+
+            # Steps 1-3
+            self._progress("geometry", 40)
+            train, predicts, combined, last = await executor.run_cpu(build_geometry, traverse, request)
 
             # --------------------------------------------------
-            # 1. Distance computation (always)
+            # 4. Upload authoritative train / predict artifacts
             # --------------------------------------------------
-            rows = compute_distance_along_traverse(
-                rows,
-                x_col=request.x_column,
-                y_col=request.y_column,
-            )
+            self._progress("upload", 70)
+            keys = await self._upload_artifacts("", train, predicts, combined)
+            state = await self._append_state(request, train, predicts, last, upload.size)
 
             # --------------------------------------------------
-            # 2. Geometry
+            # 5. Inference (one fit for every spacing)
             # --------------------------------------------------
-            if request.scenario == "sparse":
-                rows = generate_sparse_geometry(
-                    rows,
-                    x_col=request.x_column,
-                    y_col=request.y_column,
-                    value_col=request.value_column,
-                    spacing=request.station_spacing,
+            backend = select_backend(len(train) + len(combined), upload.size, request.model.value)
+
+            if backend == "async":
+                # Returns as soon as the invocation is queued; the job
+                # slot is released and the tracker resumes the job
+                await self._submit_inference(
+                    keys, request.model.value, merge_memory_bytes(train, predicts), append=state
                 )
             else:
-                # explicit geometry
-                for r in rows:
-                    r["is_measured"] = r.get(request.value_column, "") not in ("", None)
+                self._progress("inference", 75)
+                values = await self._predict(backend, train, combined, request.model.value)
 
-            # --------------------------------------------------
-            # 3. Split train / predict
-            # --------------------------------------------------
-            train, predict = split_train_predict(
-                rows,
-                value_col=request.value_column,
+                await self._complete(
+                    executor.run_io(
+                        write_merged_results,
+                        self.job_id,
+                        train,
+                        predicts,
+                        combined,
+                        values,
+                        split_at=state.get("predict_from"),
+                    ),
+                    append=state,
+                    artifacts=keys,
+                    inference={"backend": backend, "model": request.model.value},
+                )
+
+        except Exception as exc:
+            await self._set_status(JobStatus.failed, stage="failed", message=str(exc), **failure_fields(exc))
+            raise
+
+        finally:
+            upload.cleanup()
+
+    async def _run_lines(self, traverse: Traverse, request: JobCreateRequest, upload_size: int):
+        lines = traverse.group_by(request.line_column)
+        if not lines:
+            raise ValueError("CSV has no rows")
+
+        async with self._record_lock:
+            self._publish(await aio.start_job_lines(self.job_id, [name for name, _ in lines]))
+
+        await asyncio.gather(*(
+            self._run_line(name, line, request, upload_size * len(line) // len(traverse))
+            for name, line in lines
+        ))
+
+    async def _run_line(self, line: str, traverse: Traverse, request: JobCreateRequest, n_bytes: int):
+        try:
+            # Steps 1-3 (process pool, concurrently with other lines)
+            train, predicts, combined, _ = await executor.run_cpu(build_geometry, traverse, request)
+
+            # 4. Per-line artifacts
+            keys = await self._upload_artifacts(f"{results.line_prefix(line)}/", train, predicts, combined)
+
+            # 5. Inference
+            backend = select_backend(len(train) + len(combined), n_bytes, request.model.value)
+            if backend == "async":
+                await self._submit_inference(
+                    keys, request.model.value, merge_memory_bytes(train, predicts), line
+                )
+                return
+
+            values = await self._predict(backend, train, combined, request.model.value)
+
+            # 6. Merge and store the line's results
+            written = await executor.run_io(
+                write_merged_results, self.job_id, train, predicts, combined, values, line
             )
+            await self._set_line(line, "completed", artifacts=keys, backend=backend, **result_fields(written))
 
-            if not train:
-                raise ValueError("No measured rows for training")
+        except Exception as exc:
+            await self._set_line(line, "failed", message=str(exc))
 
-            if not predict:
-                raise ValueError("No rows to predict")
+    async def _predict(self, backend: str, train: Traverse, predict: Traverse, model: str) -> np.ndarray:
+        """
+        Predictions at every predict station, (n_predict, channels).
+        """
+        # Every channel in one multi-output fit (realtime: in each request)
+        targets = train.value if not train.channels else train.values_matrix()
 
-            # --------------------------------------------------
-            # 4. Upload authoritative CSVs
-            # --------------------------------------------------
-            self._upload_csv("train.csv", train)
-            self._upload_csv("predict.csv", predict)
+        if backend == "local":
+            values = await executor.run_cpu(
+                local_inference.predict_local,
+                train.d_along,
+                targets,
+                predict.d_along,
+                model,
+            )
+        else:
+            values = await executor.run_io(
+                inference.predict_values,
+                train.d_along,
+                targets,
+                predict.d_along,
+                channels=train.value_cols if train.channels else None,
+            )
 
-            update_job_status(self.job_id, JobStatus.completed)
+        return values.reshape(len(predict), len(train.value_cols))
+
+    async def _submit_inference(
+        self,
+        keys: Dict[str, str],
+        model: str,
+        memory_bytes: int,
+        line: Optional[str] = None,
+        append: Optional[Dict] = None,
+    ):
+        name = None if line is None else results.line_prefix(line)
+
+        response = await executor.run_io(
+            SageMakerClient().invoke_async,
+            self.job_id,
+            object_uri(keys["train"]),
+            object_uri(keys["predict"]),
+            object_uri(results.output_prefix(self.job_id, line)),
+            name,
+        )
+
+        fields = dict(
+            artifacts=keys,
+            inference={
+                "backend": "async",
+                "model": model,
+                "inference_id": response.get("InferenceId"),
+                "output_location": response["OutputLocation"],
+                "failure_location": response["FailureLocation"],
+            },
+        )
+
+        if append is not None:
+            fields["append"] = append
+
+        if line is None:
+            await self._set_status(JobStatus.running, stage="inference", progress=75, **fields)
+        else:
+            await self._set_line(line, "inference", **fields)
+
+        tracker.track(
+            self.job_id if name is None else f"{self.job_id}/{name}",
+            response["OutputLocation"],
+            response["FailureLocation"],
+            lambda output_key, failure: self._on_inference_done(output_key, failure, line),
+            memory_bytes,
+        )
+
+    async def _on_inference_done(self, output_key: Optional[str], failure: Optional[str], line: Optional[str] = None):
+        """
+        Called by the completion tracker, as a new job, once the async
+        invocation has produced an output or a failure.
+        """
+        try:
+            if failure is not None:
+                raise RuntimeError(f"Inference failed: {failure}")
+
+            record = await aio.get_job_record(self.job_id)
+            if line is None:
+                state = record.get("append") or {}
+                await self._complete(
+                    executor.run_io(
+                        merge_async_output,
+                        self.job_id,
+                        record["artifacts"],
+                        output_key,
+                        split_at=state.get("predict_from"),
+                    ),
+                    append=record.get("append"),
+                )
+                return
+
+            written = await executor.run_io(
+                merge_async_output,
+                self.job_id,
+                record["lines"][line]["artifacts"],
+                output_key,
+                line,
+            )
+            await self._set_line(line, "completed", **result_fields(written))
 
-        except Exception:
-            update_job_status(self.job_id, JobStatus.failed)
+        except Exception as exc:
+            if line is not None:
+                await self._set_line(line, "failed", message=str(exc))
+                return
+
+            await self._set_status(JobStatus.failed, stage="failed", message=str(exc))
             raise
 
+    async def _complete(self, write, append: Optional[Dict] = None, **fields):
+        # --------------------------------------------------
+        # 6. Merge and store the result
+        # --------------------------------------------------
+        self._progress("merge", 90)
+        written = await write
+
+        if append is not None:
+            fields["append"] = _with_offsets(append, written)
+
+        await self._set_status(
+            JobStatus.completed,
+            stage="done",
+            progress=100,
+            **result_fields(written),
+            **fields,
+        )
+
+    # --------------------------------------------------
+    # Appends (see append.py)
+    # --------------------------------------------------
+
+    async def append(self, upload: StagedUpload):
+        """
+        Extends a completed job with the stations of `upload`: a windowed
+        job recomputes its tail window, a linear job rewrites every
+        prediction from its running sums (see append.py).
+        """
+        merging = False
+
+        try:
+            record = await aio.get_job_record(self.job_id)
+            state = record["append"]
+            request = JobCreateRequest(**state["request"])
+            model = request.model.value
+            number = record.get("appends", 0) + 1
+
+            if "tail" not in state and "sums" not in state:
+                raise ValueError("Job predates incremental appends; submit it again to append to it")
+            if "tail" in state and results.is_legacy_result(record["result"]):
+                # Its window offsets point into the legacy CSV result
+                raise ValueError("Job results predate chunked results; submit it again to append to it")
+
+            traverse = await executor.run_io(
+                ingest_csv_file, self.job_id, upload, request, f"append-{number}.csv"
+            )
+            if not len(traverse):
+                raise ValueError("CSV has no rows")
+
+            self._progress("geometry", 30)
+            new_train, new_predicts, _, last = await executor.run_cpu(
+                build_geometry, traverse, request, state["last"]
+            )
+            input_bytes = state.get("input_bytes", 0) + upload.size
+
+            if "sums" in state:
+                sums = await executor.run_cpu(append.linear_sums, new_train, state["sums"])
+
+                # From here on the stored results are being rewritten
+                merging = True
+                self._progress("merge", 90)
+                written = await executor.run_io(
+                    rewrite_linear_results, self.job_id, new_train, new_predicts, sums
+                )
+                next_state = {**state, "last": last, "input_bytes": input_bytes, "sums": sums}
+
+            else:
+                # Only the window's stations are read: predict stations
+                # all lie in it, train stations start earlier, as
+                # neighbours of the first ones
+                old_train, old_predicts = await self._read_stations(state["tail"])
+                train = old_train.concat(new_train)
+                predicts = [
+                    (spacing, old.concat(new))
+                    for (spacing, old), (_, new) in zip(old_predicts, new_predicts)
+                ]
+                combined = combine_predicts(predicts)
+
+                # A tail from the first station is the whole job: its
+                # parameters are fitted again, as a new job would
+                params = state["params"]
+                if not state["train_from"]:
+                    params = await executor.run_cpu(append.model_params, train, model)
+
+                self._progress("inference", 60)
+                values = await executor.run_cpu(append.predict_window, train, combined, model, params)
+
+                merging = True
+                self._progress("merge", 90)
+                next_state = await self._append_state(request, train, predicts, last, input_bytes, params)
+                written = await executor.run_io(
+                    write_merged_results,
+                    self.job_id,
+                    append.from_distance(train, state["predict_from"]),
+                    predicts,
+                    combined,
+                    values,
+                    split_at=next_state["predict_from"],
+                    keep=state["offsets"],
+                )
+
+            await self._set_status(
+                JobStatus.completed,
+                stage="done",
+                progress=100,
+                appends=number,
+                append=_with_offsets(next_state, written),
+                **result_fields(written),
+            )
+
+        except Exception as exc:
+            await self._append_failed(exc, merging)
+            if merging:
+                raise
+
+        finally:
+            upload.cleanup()
+
+    async def _append_failed(self, exc: Exception, merging: bool):
+        if merging:
+            await self._set_status(JobStatus.failed, stage="failed", message=str(exc))
+            return
+
+        # Nothing was written: the job keeps its previous results
+        await self._set_status(
+            JobStatus.completed,
+            stage="done",
+            progress=100,
+            message=f"Append failed: {exc}",
+            **failure_fields(exc),
+        )
+
+    async def _append_state(
+        self,
+        request: JobCreateRequest,
+        train: Traverse,
+        predicts: SpacedPredicts,
+        last: Dict,
+        input_bytes: int,
+        params: Optional[Dict] = None,
+    ) -> Dict:
+        """
+        What a later append needs (result offsets are added once the
+        results are written); `stations` is how many it reads back.
+        Set up at completion on every backend, so no append has to read
+        the whole job.
+
+        Rules:
+        - windowed models store the tail artifacts and frozen parameters
+          (fitted here unless given)
+        - global models store the running sums of their fit
+        """
+        model = request.model.value
+        state = {
+            "request": json.loads(request.json()),
+            "last": last,
+            "input_bytes": input_bytes,
+        }
+
+        train_from, predict_from = append.tail_window(train, model)
+        if predict_from is None:
+            # Results are streamed back, not held
+            state["sums"] = await executor.run_cpu(append.linear_sums, train)
+            state["stations"] = 0
+            return state
+
+        if params is None:
+            params = await executor.run_cpu(append.model_params, train, model)
+
+        tail_train = append.from_distance(train, train_from)
+        tail = {"train": await self._upload_artifact("tail/train", tail_train), "predicts": []}
+        stations = len(tail_train)
+
+        for spacing, predict in predicts:
+            tail_predict = append.from_distance(predict, predict_from)
+            stem = "tail/predict" if spacing is None else f"tail/{results.spacing_prefix(spacing)}/predict"
+            tail["predicts"].append({
+                "spacing": spacing,
+                "predict": await self._upload_artifact(stem, tail_predict),
+            })
+            stations += len(tail_predict)
+
+        state.update(
+            train_from=train_from,
+            predict_from=predict_from,
+            params=params,
+            tail=tail,
+            stations=stations,
+        )
+        return state
+
+    async def _read_stations(self, keys: Dict) -> Tuple[Traverse, SpacedPredicts]:
+        """
+        Train and per-spacing predict stations from their artifacts
+        ({"train", "predicts": [{"spacing", "predict"}]}).
+        """
+        decoded = {}
+
+        async def read(key):
+            if key not in decoded:
+                data = await aio.get_object(key)
+                decoded[key] = await executor.run_cpu(artifacts.decode_traverse, data, artifacts.format_of(key))
+            return decoded[key]
+
+        return await read(keys["train"]), [
+            (item["spacing"], await read(item["predict"]))
+            for item in keys["predicts"]
+        ]
+
     # --------------------------------------------------
     # Helpers
     # --------------------------------------------------
 
-    def _parse_csv(self, raw: bytes) -> List[Dict]:
-        text = raw.decode("utf-8").splitlines()
-        return list(csv.DictReader(text))
+    def _progress(self, stage: str, progress: int):
+        event_bus.publish(self.job_id, {"status": JobStatus.running.value, "stage": stage, "progress": progress})
+
+    async def _set_status(self, status: JobStatus, **fields):
+        async with self._record_lock:
+            record = await aio.update_job_status(self.job_id, status, **fields)
+        self._publish(record)
+
+    async def _set_line(self, line: str, status: str, **fields):
+        async with self._record_lock:
+            record = await aio.update_job_line(self.job_id, line, status, **fields)
+        self._publish(record)
+
+    def _publish(self, record: Dict):
+        # Per-line detail can be large; it is only sent with the final state
+        event = {k: v for k, v in record.items() if k != "job_id"}
+        if "lines" in event and event["status"] not in ("completed", "failed"):
+            del event["lines"]
+        event_bus.publish(self.job_id, event)
+
+    async def _upload_artifacts(
+        self,
+        prefix: str,
+        train: Traverse,
+        predicts: SpacedPredicts,
+        combined: Traverse,
+    ) -> Dict:
+        """
+        `predict` is the combined set inference runs on; with spacings,
+        each spacing's own predict set is listed under `spacings`.
+        """
+        keys = {
+            "train": await self._upload_artifact(f"{prefix}train", train),
+            "predict": await self._upload_artifact(f"{prefix}predict", combined),
+        }
+
+        if predicts[0][0] is not None:
+            keys["spacings"] = []
+            for spacing, predict in predicts:
+                key = keys["predict"]
+                if predict is not combined:
+                    key = await self._upload_artifact(
+                        f"{prefix}{results.spacing_prefix(spacing)}/predict", predict
+                    )
+                keys["spacings"].append({"spacing": spacing, "predict": key})
 
-    def _upload_csv(self, name: str, rows: List[Dict]):
-        headers = rows[0].keys()
-        lines = [",".join(headers)]
-        for r in rows:
-            lines.append(",".join(str(r.get(h, "")) for h in headers))
+        return keys
 
-        upload_raw_csv(
+    async def _upload_artifact(self, stem: str, traverse: Traverse) -> str:
+        content = await executor.run_io(artifacts.encode_traverse, traverse)
+        return await aio.upload_artifact(
             job_id=self.job_id,
-            content="\n".join(lines).encode(),
-            filename=name,
+            content=content,
+            filename=artifacts.artifact_filename(stem),
         )
@@ -1,20 +1,304 @@
 import json
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-import boto3
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 from app.core.config import settings
+from app.core.job_index import JobIndex, get_job_index
+from app.core.storage import ObjectNotFound, PreconditionFailed, get_store
 
 
-s3 = boto3.client(
-    "s3",
-    region_name=settings.aws_region,
-)
+class ConcurrentUpdateError(Exception):
+    pass
+
+
+class JobStateError(Exception):
+    pass
 
 
 def _job_key(job_id: str) -> str:
     return f"jobs/{job_id}/metadata/job.json"
 
 
+# ============================================================
+# Backends
+# ============================================================
+#
+# A backend stores one JSON record per job with an opaque version
+# token. Writes with `expected` only succeed if the stored version still
+# matches; otherwise they raise PreconditionFailed. records() walks
+# every stored record (to rebuild the job index).
+
+class ObjectStoreBackend:
+    """
+    job.json objects in the object store, versioned by ETag.
+    """
+
+    def read(self, job_id: str) -> Optional[Tuple[Dict, str]]:
+        try:
+            body, etag = get_store().get_with_etag(_job_key(job_id))
+        except ObjectNotFound:
+            return None
+        return json.loads(body), etag
+
+    def write(self, job_id: str, record: Dict, expected: Optional[str] = None, create: bool = False) -> str:
+        return get_store().put(
+            _job_key(job_id),
+            json.dumps(record).encode("utf-8"),
+            content_type="application/json",
+            if_match=expected,
+            if_none_match=create,
+        )
+
+    def records(self) -> Iterator[Dict]:
+        store = get_store()
+        for key in store.list_keys("jobs/"):
+            if not key.endswith("/metadata/job.json"):
+                continue
+            try:
+                yield json.loads(store.get(key))
+            except ObjectNotFound:
+                continue
+
+
+class SqliteBackend:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " record TEXT NOT NULL,"
+                " version INTEGER NOT NULL)"
+            )
+
+    def read(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record, version FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), str(row[1])
+
+    def write(self, job_id, record, expected=None, create=False):
+        body = json.dumps(record)
+        with self._lock:
+            if create:
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO jobs (job_id, record, version) VALUES (?, ?, 1)",
+                    (job_id, body),
+                )
+                version = 1
+            else:
+                version = int(expected) + 1
+                cur = self._conn.execute(
+                    "UPDATE jobs SET record = ?, version = ? WHERE job_id = ? AND version = ?",
+                    (body, version, job_id, int(expected)),
+                )
+
+        if cur.rowcount != 1:
+            raise PreconditionFailed(job_id)
+        return str(version)
+
+    def records(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT record FROM jobs").fetchall()
+        for (body,) in rows:
+            yield json.loads(body)
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._records: Dict[str, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def read(self, job_id):
+        with self._lock:
+            entry = self._records.get(job_id)
+        if entry is None:
+            return None
+        return json.loads(entry[0]), str(entry[1])
+
+    def write(self, job_id, record, expected=None, create=False):
+        with self._lock:
+            current = self._records.get(job_id)
+            if create and current is not None:
+                raise PreconditionFailed(job_id)
+            if expected is not None and (current is None or str(current[1]) != expected):
+                raise PreconditionFailed(job_id)
+
+            version = (current[1] if current else 0) + 1
+            self._records[job_id] = (json.dumps(record), version)
+        return str(version)
+
+    def records(self):
+        with self._lock:
+            bodies = [body for body, _ in self._records.values()]
+        for body in bodies:
+            yield json.loads(body)
+
+
+# ============================================================
+# Write-through cache
+# ============================================================
+
+class JobRecordCache:
+    """
+    LRU cache of job records with a TTL.
+
+    Entries carry the backend version they were read or written at, so
+    the next update can be a single conditional write instead of a
+    read-modify-write.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[Dict, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[Tuple[Dict, str]]:
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None:
+                return None
+
+            record, version, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[job_id]
+                return None
+
+            self._entries.move_to_end(job_id)
+            return dict(record), version
+
+    def put(self, job_id: str, record: Dict, version: str):
+        with self._lock:
+            self._entries[job_id] = (dict(record), version, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(job_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, job_id: str):
+        with self._lock:
+            self._entries.pop(job_id, None)
+
+
+# ============================================================
+# Job store
+# ============================================================
+
+class JobStore:
+    def __init__(self, backend, cache: JobRecordCache, index: Optional[JobIndex] = None, max_retries: int = 8):
+        self.backend = backend
+        self.cache = cache
+        self.index = index
+        self.max_retries = max_retries
+
+    def create(self, record: Dict) -> Dict:
+        job_id = record["job_id"]
+        version = self.backend.write(job_id, record, create=True)
+        self.cache.put(job_id, record, version)
+        self._index(record)
+        return record
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        entry = self._read(job_id, use_cache=True)
+        return None if entry is None else entry[0]
+
+    def update(self, job_id: str, mutate: Callable[[Dict], Dict]) -> Dict:
+        """
+        Applies `mutate` to the record with optimistic concurrency.
+
+        The first attempt uses the cached version (no read round trip);
+        on conflict the record is re-read and the change re-applied.
+        """
+        for attempt in range(self.max_retries):
+            entry = self._read(job_id, use_cache=attempt == 0)
+            record, version = entry if entry else ({"job_id": job_id}, None)
+
+            record = mutate(record)
+
+            try:
+                version = self.backend.write(
+                    job_id,
+                    record,
+                    expected=version,
+                    create=version is None,
+                )
+            except PreconditionFailed:
+                self.cache.invalidate(job_id)
+                time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+                continue
+
+            self.cache.put(job_id, record, version)
+            self._index(record)
+            return record
+
+        raise ConcurrentUpdateError(f"Could not update job {job_id}")
+
+    def backfill_index(self):
+        """
+        Indexes every stored record (e.g. jobs written before the index
+        existed); a no-op once this index has been backfilled.
+        """
+        if self.index is not None:
+            self.index.backfill(self.backend.records())
+
+    def _index(self, record: Dict):
+        if self.index is not None:
+            self.index.record(record)
+
+    def _read(self, job_id: str, use_cache: bool) -> Optional[Tuple[Dict, str]]:
+        if use_cache:
+            cached = self.cache.get(job_id)
+            if cached is not None:
+                return cached
+
+        entry = self.backend.read(job_id)
+        if entry is not None:
+            self.cache.put(job_id, *entry)
+        return entry
+
+
+def _make_backend():
+    if settings.job_store_backend == "object":
+        return ObjectStoreBackend()
+    if settings.job_store_backend == "sqlite":
+        return SqliteBackend(settings.job_store_sqlite_path)
+    if settings.job_store_backend == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown job store backend '{settings.job_store_backend}'")
+
+
+_job_store: Optional[JobStore] = None
+
+
+def get_job_store() -> JobStore:
+    global _job_store
+
+    if _job_store is None:
+        _job_store = JobStore(
+            _make_backend(),
+            JobRecordCache(
+                max_entries=settings.job_cache_max_entries,
+                ttl_seconds=settings.job_cache_ttl_seconds,
+            ),
+            get_job_index(),
+        )
+
+    return _job_store
+
+
+# ============================================================
+# Record helpers
+# ============================================================
+
 def create_job_record(job_id: str):
     record = {
         "job_id": job_id,
@@ -22,42 +306,112 @@ def create_job_record(job_id: str):
         "created_at": datetime.utcnow().isoformat(),
     }
 
-    s3.put_object(
-        Bucket=settings.s3_bucket,
-        Key=_job_key(job_id),
-        Body=json.dumps(record).encode("utf-8"),
-        ContentType="application/json",
-    )
+    return get_job_store().create(record)
 
-    return record
 
+def update_job_status(job_id: str, status: str, **fields):
+    def mutate(record):
+        record.update(fields)
+        record["status"] = getattr(status, "value", status)
+        record["updated_at"] = datetime.utcnow().isoformat()
+        return record
+
+    return get_job_store().update(job_id, mutate)
 
-def update_job_status(job_id: str, status: str):
-    record = get_job_record(job_id)
 
-    record["status"] = status
-    record["updated_at"] = datetime.utcnow().isoformat()
+def begin_append(job_id: str):
+    """
+    Marks a completed job as appending; only one append runs at a time.
+    Raises JobStateError if the job cannot take an append now.
+    """
+    def mutate(record):
+        if record.get("status") != "completed":
+            raise JobStateError(f"Job is {record.get('status')}; appends need a completed job")
+        if "append" not in record:
+            raise JobStateError("Job does not support appends (multi-line or created before appends)")
 
-    s3.put_object(
-        Bucket=settings.s3_bucket,
-        Key=_job_key(job_id),
-        Body=json.dumps(record).encode("utf-8"),
-        ContentType="application/json",
+        record.update(
+            status="running",
+            stage="append",
+            progress=5,
+            updated_at=datetime.utcnow().isoformat(),
+        )
+        for name in ("message", "errors", "error_count"):
+            record.pop(name, None)
+        return record
+
+    return get_job_store().update(job_id, mutate)
+
+
+def start_job_lines(job_id: str, lines: List[str]):
+    """
+    Registers the lines of a multi-line job; the job's own status is
+    derived from theirs from now on (see update_job_line).
+    """
+    def mutate(record):
+        record.update(
+            status="running",
+            stage="lines",
+            progress=40,
+            lines={name: {"status": "queued"} for name in lines},
+        )
+        _aggregate_lines(record)
+        return record
+
+    return get_job_store().update(job_id, mutate)
+
+
+def update_job_line(job_id: str, line: str, status: str, **fields):
+    def mutate(record):
+        lines = record.setdefault("lines", {})
+        lines[line] = {**lines.get(line, {}), **fields, "status": status}
+        _aggregate_lines(record)
+        return record
+
+    return get_job_store().update(job_id, mutate)
+
+
+def _aggregate_lines(record: Dict):
+    """
+    Job status from line statuses:
+    - running while any line is unfinished (progress 40 -> 100)
+    - completed once every line is done and at least one succeeded
+    - failed if every line failed
+    """
+    statuses = [line["status"] for line in record["lines"].values()]
+    total = len(statuses)
+    completed = statuses.count("completed")
+    failed = statuses.count("failed")
+
+    record.update(
+        lines_total=total,
+        lines_completed=completed,
+        lines_failed=failed,
+        updated_at=datetime.utcnow().isoformat(),
     )
 
-    return record
+    if completed + failed < total:
+        record["progress"] = 40 + (60 * (completed + failed)) // total
+        return
+
+    record["progress"] = 100
+    if completed:
+        record.update(status="completed", stage="done")
+    else:
+        record.update(status="failed", stage="failed")
+
+    if failed:
+        record["message"] = f"{failed} of {total} lines failed"
 
 
 def get_job_record(job_id: str):
-    try:
-        obj = s3.get_object(
-            Bucket=settings.s3_bucket,
-            Key=_job_key(job_id),
-        )
-        return json.loads(obj["Body"].read())
-    except s3.exceptions.NoSuchKey:
+    record = get_job_store().get(job_id)
+
+    if record is None:
         # Defensive: job was requested before record creation
         return {
             "job_id": job_id,
             "status": "unknown",
         }
+
+    return record
@@ -0,0 +1,57 @@
+# app/core/local_inference.py
+
+"""
+In-process inference using the same model library as the SageMaker
+container (gaia_model, installed from gaia-inference; see
+requirements.txt). Functions here are module-level so they can run in
+the executor's process pool.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+from gaia_model import build_model, fit_predict
+
+from app.core.config import settings
+
+
+def predict_local(
+    train_d: np.ndarray,
+    train_v: np.ndarray,
+    predict_d: np.ndarray,
+    model: str = "linear",
+    params: Optional[Dict] = None,
+) -> np.ndarray:
+    params = dict(params or {})
+
+    # Already inside a pool worker: no nested threads
+    if model == "kriging":
+        params["n_jobs"] = 1
+
+    return fit_predict(train_d, train_v, predict_d, model=model, **params)
+
+
+def neighbours(model: str) -> Optional[int]:
+    """
+    Train stations each prediction depends on (windowed models), or None
+    for global models.
+    """
+    return getattr(build_model(model), "k", None)
+
+
+def frozen_params(model: str, train_d: np.ndarray, train_v: np.ndarray) -> Dict:
+    """
+    Parameters a fit derives from its data (see `frozen_params` in
+    gaia_model), for refitting on part of the same stations.
+    """
+    return build_model(model).fit(train_d, train_v).frozen_params()
+
+
+def runs_locally(n_rows: int, n_bytes: int) -> bool:
+    """
+    Small jobs are cheaper to fit here than to round-trip to SageMaker.
+    """
+    return (
+        n_rows <= settings.local_inference_max_rows
+        and n_bytes <= settings.local_inference_max_bytes
+    )
@@ -1,11 +1,18 @@
-from typing import List, Dict
+import heapq
+from typing import List, Dict, Iterable, Iterator, Tuple, Union
+
+import numpy as np
+
+from app.core.traverse import Traverse
 
 
 def merge_measured_and_predicted(
-    train_rows: List[Dict],
-    predicted_rows: List[Dict],
+    train_rows: Union[Traverse, List[Dict]],
+    predicted_rows: Union[Traverse, List[Dict]],
     value_col: str = "magnetic_value",
-) -> List[Dict]:
+    *,
+    stream: bool = False,
+):
     """
     Merge measured and predicted rows into a final ordered dataset.
 
@@ -14,8 +21,23 @@ def merge_measured_and_predicted(
     - Predicted rows are appended without overwriting
     - A 'source' field identifies row origin
     - Output is sorted strictly by distance_along
+
+    With `stream=True` both inputs must already be ordered by
+    distance_along; the result is a generator (row dicts, or column
+    batches for Traverse inputs) produced in a single linear pass.
     """
 
+    if isinstance(train_rows, Traverse):
+        if stream:
+            return iter_merged_batches(train_rows, predicted_rows)
+        return _merge_traverses(train_rows, predicted_rows)
+
+    if stream:
+        return iter_merged_rows(
+            _result_rows(train_rows, value_col, "measured"),
+            _result_rows(predicted_rows, value_col, "predicted"),
+        )
+
     merged = []
 
     # ----------------------------
@@ -56,3 +78,168 @@ def merge_measured_and_predicted(
     merged.sort(key=lambda r: r["distance_along"])
 
     return merged
+
+
+# ============================================================
+# Streaming merge
+# ============================================================
+
+def iter_merged_rows(*streams: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    k-way merge of row streams that are each ordered by distance_along.
+
+    Rows with equal distance keep stream order (earlier streams first).
+    Raises ValueError as soon as any stream goes backwards.
+    """
+    keyed = [
+        ((row["distance_along"], i, row) for row in _checked(stream, i))
+        for i, stream in enumerate(streams)
+    ]
+
+    for _, _, row in heapq.merge(*keyed, key=lambda item: item[:2]):
+        yield row
+
+
+def merge_positions(d_a: np.ndarray, d_b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Output positions of two ordered arrays in their merged order
+    (ties: `a` before `b`). O(n) memory, no sort.
+    """
+    _check_ordered(d_a, "measured")
+    _check_ordered(d_b, "predicted")
+
+    pos_a = np.arange(d_a.shape[0]) + np.searchsorted(d_b, d_a, side="left")
+    pos_b = np.arange(d_b.shape[0]) + np.searchsorted(d_a, d_b, side="right")
+    return pos_a, pos_b
+
+
+def iter_merged_batches(
+    train: Traverse,
+    predicted: Traverse,
+    batch_rows: int = 65536,
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Yields the merged result as (distance_along, value, is_measured)
+    column batches of at most 2 * batch_rows rows.
+    """
+    _check_values(train, predicted)
+    _check_ordered(train.d_along, "measured")
+    _check_ordered(predicted.d_along, "predicted")
+
+    d_a, d_b = train.d_along, predicted.d_along
+    na, nb = d_a.shape[0], d_b.shape[0]
+
+    i = j = 0
+    while i < na or j < nb:
+        i_cap = min(i + batch_rows, na)
+        j_cap = min(j + batch_rows, nb)
+
+        # Cut the block at the first station left out on either side
+        # (ties: measured sorts first)
+        if i_cap < na and (j_cap == nb or d_a[i_cap] <= d_b[j_cap]):
+            i_hi = i_cap
+            j_hi = j + int(np.searchsorted(d_b[j:j_cap], d_a[i_cap], side="left"))
+        elif j_cap < nb:
+            j_hi = j_cap
+            i_hi = i + int(np.searchsorted(d_a[i:i_cap], d_b[j_cap], side="right"))
+        else:
+            i_hi, j_hi = na, nb
+
+        yield _merge_block(train, predicted, i, i_hi, j, j_hi)
+        i, j = i_hi, j_hi
+
+
+def _merge_block(train, predicted, a_lo, a_hi, b_lo, b_hi):
+    d_a = train.d_along[a_lo:a_hi]
+    d_b = predicted.d_along[b_lo:b_hi]
+    pos_a, pos_b = merge_positions(d_a, d_b)
+
+    n = pos_a.shape[0] + pos_b.shape[0]
+    d = np.empty(n)
+    v = np.empty(n)
+    m = np.zeros(n, dtype=bool)
+
+    d[pos_a] = d_a
+    d[pos_b] = d_b
+    v[pos_a] = train.value[a_lo:a_hi]
+    v[pos_b] = predicted.value[b_lo:b_hi]
+    m[pos_a] = True
+
+    return d, v, m
+
+
+def _merge_traverses(train: Traverse, predicted: Traverse) -> Traverse:
+    """
+    Columnar merge. `is_measured` on the output plays the role of 'source'.
+    """
+    _check_values(train, predicted)
+
+    pos_a, pos_b = merge_positions(train.d_along, predicted.d_along)
+
+    def merged(a, b, dtype=np.float64):
+        out = np.empty(a.shape[0] + b.shape[0], dtype=dtype)
+        out[pos_a] = a
+        out[pos_b] = b
+        return out
+
+    return Traverse.from_arrays(
+        merged(train.x, predicted.x),
+        merged(train.y, predicted.y),
+        merged(train.value, predicted.value),
+        x_col=train.x_col,
+        y_col=train.y_col,
+        value_col=train.value_col,
+        d_along=merged(train.d_along, predicted.d_along),
+        is_measured=merged(
+            np.ones(len(train), dtype=bool),
+            np.zeros(len(predicted), dtype=bool),
+            dtype=bool,
+        ),
+        columns=[train.x_col, train.y_col, train.value_col],
+    )
+
+
+# ============================================================
+# Internal helpers
+# ============================================================
+
+def _result_rows(rows: Iterable[Dict], value_col: str, source: str) -> Iterator[Dict]:
+    label = "Measured" if source == "measured" else "Predicted"
+
+    for row in rows:
+        if "distance_along" not in row:
+            raise ValueError(f"{label} row missing distance_along")
+
+        if value_col not in row:
+            raise ValueError(f"{label} row missing magnetic value")
+
+        yield {
+            "distance_along": float(row["distance_along"]),
+            "magnetic_value": float(row[value_col]),
+            "source": source,
+        }
+
+
+def _checked(rows: Iterable[Dict], index: int) -> Iterator[Dict]:
+    prev = None
+    for row in rows:
+        d = row["distance_along"]
+        if prev is not None and d < prev:
+            raise ValueError(
+                f"Input {index} is not ordered by distance_along ({d} after {prev})"
+            )
+        prev = d
+        yield row
+
+
+def _check_ordered(d: np.ndarray, label: str):
+    if d.shape[0] > 1 and np.any(d[1:] < d[:-1]):
+        raise ValueError(f"{label.capitalize()} rows are not ordered by distance_along")
+
+
+def _check_values(train: Traverse, predicted: Traverse):
+    if np.isnan(train.value).any():
+        raise ValueError("Measured row missing magnetic value")
+
+    if np.isnan(predicted.value).any():
+        raise ValueError("Predicted row missing magnetic value")
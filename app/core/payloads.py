@@ -0,0 +1,299 @@
+# app/core/payloads.py
+
+"""
+Wire formats for realtime endpoint invocations.
+
+- application/json           row-oriented JSON (original format)
+- application/x-gaia-json+gzip  same document, gzip-compressed
+- application/x-gaia-f64     packed little-endian float64 columns:
+                             uint32 n_train, uint32 n_predict,
+                             train distance, train value, predict distance
+                             (response: n_predict float64 predictions)
+
+Several channels travel in one request, so the endpoint fits them in one
+multi-output pass:
+- JSON: a top-level "channels" list of names, and a "values" list per
+  train row instead of "value" (null where a channel is not measured)
+- F64: content type `application/x-gaia-f64; channels=<n>`, with the
+  train values as a row-major (n_train, channels) block (NaN where a
+  channel is not measured)
+Their responses carry one value per channel: a key per channel name in
+JSON, row-major (n_predict, channels) float64 in F64.
+
+Asynchronous invocations write the inference container's CSV output
+instead (see decode_async_output).
+"""
+
+import gzip
+import io
+import json
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+
+JSON = "application/json"
+JSON_GZIP = "application/x-gaia-json+gzip"
+F64 = "application/x-gaia-f64"
+
+ENCODINGS = (JSON, JSON_GZIP, F64)
+
+_HEADER = struct.Struct("<II")
+_F64 = np.dtype("<f8")
+
+
+# ============================================================
+# Requests
+# ============================================================
+
+def request_content_type(content_type: str, channels: Optional[Sequence[str]] = None) -> str:
+    """
+    The Content-Type of a request: F64 states its channel count.
+    """
+    if content_type == F64 and channels is not None and len(channels) > 1:
+        return f"{F64}; channels={len(channels)}"
+    return content_type
+
+
+def encode_request(
+    train_d: np.ndarray,
+    train_v: np.ndarray,
+    predict_d: np.ndarray,
+    content_type: str,
+    channels: Optional[Sequence[str]] = None,
+) -> bytes:
+    """
+    `train_v` is (n_train,), or (n_train, channels) with `channels`
+    naming several.
+    """
+    multi = channels is not None and len(channels) > 1
+
+    if content_type == F64:
+        return b"".join([
+            _HEADER.pack(train_d.shape[0], predict_d.shape[0]),
+            np.ascontiguousarray(train_d, dtype=_F64).tobytes(),
+            np.ascontiguousarray(train_v, dtype=_F64).tobytes(),
+            np.ascontiguousarray(predict_d, dtype=_F64).tobytes(),
+        ])
+
+    if multi:
+        document = {
+            "channels": list(channels),
+            "train": [
+                {"distance_along": d, "values": [None if v != v else v for v in row]}
+                for d, row in zip(train_d.tolist(), train_v.tolist())
+            ],
+        }
+    else:
+        document = {
+            "train": [
+                {"distance_along": d, "value": v}
+                for d, v in zip(train_d.tolist(), train_v.tolist())
+            ],
+        }
+    document["predict"] = [{"distance_along": d} for d in predict_d.tolist()]
+
+    body = json.dumps(document).encode("utf-8")
+
+    if content_type == JSON_GZIP:
+        return gzip.compress(body, compresslevel=5)
+    if content_type == JSON:
+        return body
+
+    raise ValueError(f"Unknown payload content type '{content_type}'")
+
+
+def decode_request(
+    body: bytes,
+    content_type: str,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[List[str]]]:
+    """
+    (train distance, train values, predict distance, channels): values
+    are (n_train, channels) when a request carries several, and
+    `channels` is None otherwise. F64 requests do not name their
+    channels: they are numbered from "0".
+    """
+    content_type, _, params = content_type.partition(";")
+    content_type = content_type.strip()
+
+    if content_type == F64:
+        n_train, n_predict = _HEADER.unpack_from(body)
+        n_channels = int(params.partition("channels=")[2] or 1)
+        cols = np.frombuffer(body, dtype=_F64, offset=_HEADER.size)
+        values_end = n_train * (1 + n_channels)
+
+        train_v = cols[n_train:values_end]
+        channels = None
+        if n_channels > 1:
+            train_v = train_v.reshape(n_train, n_channels)
+            channels = [str(j) for j in range(n_channels)]
+
+        return cols[:n_train], train_v, cols[values_end:values_end + n_predict], channels
+
+    if content_type == JSON_GZIP:
+        body = gzip.decompress(body)
+
+    payload = json.loads(body)
+    channels = payload.get("channels")
+    value = "value" if channels is None else "values"
+
+    return (
+        np.array([r["distance_along"] for r in payload["train"]], dtype=np.float64),
+        np.array([r[value] for r in payload["train"]], dtype=np.float64),
+        np.array([r["distance_along"] for r in payload["predict"]], dtype=np.float64),
+        channels,
+    )
+
+
+# Longest repr of a finite float64, e.g. -1.2345678901234567e-308
+_MAX_FLOAT_CHARS = 24
+
+# {"distance_along": <d>, "value": <v>}, / {"distance_along": <d>},
+_JSON_TRAIN_ROW = len('{"distance_along": , "value": }, ') + 2 * _MAX_FLOAT_CHARS
+_JSON_PREDICT_ROW = len('{"distance_along": }, ') + _MAX_FLOAT_CHARS
+_JSON_FIXED = len('{"train": [], "predict": []}')
+
+# Several channels: {"distance_along": <d>, "values": [<v>, ...]},
+_JSON_VALUES_ROW = len('{"distance_along": , "values": []}, ') + _MAX_FLOAT_CHARS
+_JSON_VALUE = len(", ") + _MAX_FLOAT_CHARS
+
+
+def request_size(
+    n_train: int,
+    n_predict: int,
+    content_type: str,
+    channels: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Size of an encoded request, used to size chunks: an upper bound for
+    F64 and JSON (every number at its widest repr; channel names count
+    at most once). For gzip it is an estimate only; chunks that encode
+    larger are split again.
+    """
+    n_channels = 1 if channels is None else len(channels)
+
+    if content_type == F64:
+        return _HEADER.size + 8 * ((1 + n_channels) * n_train + n_predict)
+
+    train_row = _JSON_TRAIN_ROW
+    fixed = _JSON_FIXED
+    if n_channels > 1:
+        train_row = _JSON_VALUES_ROW + _JSON_VALUE * n_channels
+        fixed += len(json.dumps({"channels": list(channels)}))
+
+    size = fixed + train_row * n_train + _JSON_PREDICT_ROW * n_predict
+    return size // 3 if content_type == JSON_GZIP else size
+
+
+# ============================================================
+# Responses
+# ============================================================
+
+def encode_response(
+    predict_d: np.ndarray,
+    predictions: np.ndarray,
+    content_type: str,
+    channels: Optional[Sequence[str]] = None,
+) -> bytes:
+    if content_type == F64:
+        return np.ascontiguousarray(predictions, dtype=_F64).tobytes()
+
+    if predictions.ndim == 2:
+        return json.dumps({
+            "predictions": [
+                {"distance_along": d, **dict(zip(channels, row))}
+                for d, row in zip(predict_d.tolist(), predictions.tolist())
+            ],
+        }).encode("utf-8")
+
+    return json.dumps({
+        "predictions": [
+            {"distance_along": d, "magnetic_value": v}
+            for d, v in zip(predict_d.tolist(), predictions.tolist())
+        ],
+    }).encode("utf-8")
+
+
+def decode_response(
+    body: bytes,
+    content_type: str,
+    channels: Optional[Sequence[str]] = None,
+) -> np.ndarray:
+    """
+    (n_predict,) for one channel; (n_predict, channels) when `channels`
+    names several.
+    """
+    multi = channels is not None and len(channels) > 1
+
+    if content_type == F64:
+        values = np.frombuffer(body, dtype=_F64).astype(np.float64)
+        return values.reshape(-1, len(channels)) if multi else values
+
+    result = json.loads(body)
+    if "predictions" not in result:
+        raise RuntimeError("Invalid response from SageMaker endpoint")
+
+    if multi:
+        return np.array(
+            [[float(item[c]) for c in channels] for item in result["predictions"]],
+            dtype=np.float64,
+        ).reshape(-1, len(channels))
+
+    return np.array(
+        [float(item["magnetic_value"]) for item in result["predictions"]],
+        dtype=np.float64,
+    )
+
+
+# ============================================================
+# Async output
+# ============================================================
+#
+# The inference container writes predictions.csv in predict order:
+# distance_along, then `predicted_value` for one channel or one column
+# per channel name for several.
+
+PREDICTED_COL = "predicted_value"
+
+
+def encode_async_output(predict_d: np.ndarray, predictions: np.ndarray, channels: Sequence[str]) -> bytes:
+    names = [PREDICTED_COL] if predictions.ndim == 1 else list(channels)
+    values = predictions.reshape(predict_d.shape[0], -1)
+
+    table = pa.table(
+        [pa.array(predict_d, type=pa.float64())]
+        + [pa.array(values[:, j], type=pa.float64()) for j in range(len(names))],
+        names=["distance_along"] + names,
+    )
+    sink = pa.BufferOutputStream()
+    pacsv.write_csv(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_async_output(body: bytes, channels: Sequence[str]) -> np.ndarray:
+    """
+    Predictions from an async invocation's output, shaped as
+    decode_response. A JSON response document is accepted as well.
+    """
+    if body.lstrip()[:1] == b"{":
+        return decode_response(body, JSON, channels)
+
+    multi = len(channels) > 1
+    names = list(channels) if multi else [PREDICTED_COL]
+
+    try:
+        table = pacsv.read_csv(
+            io.BytesIO(body),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=names,
+                column_types={name: pa.float64() for name in names},
+            ),
+        )
+    except (pa.ArrowInvalid, pa.ArrowKeyError) as exc:
+        raise RuntimeError(f"Invalid output from SageMaker endpoint: {exc}")
+
+    values = np.column_stack([table.column(name).to_numpy() for name in names])
+    return values if multi else values[:, 0]
@@ -0,0 +1,200 @@
+# app/core/result_cache.py
+
+"""
+Content-addressed reuse of earlier jobs.
+
+Key = sha256 of the raw CSV bytes + the canonical JobCreateRequest.
+An alias object `cache/<key>.json` in the object store (apart from job
+records) points at the job that produced (or is producing) the result,
+so identical uploads share its artifacts and result instead of
+re-running the pipeline.
+
+Rules:
+- A submission claims its key before its job is created, with a
+  conditional write: concurrent identical submissions share one job
+- Aliases expire after a TTL (wall clock, so they survive restarts)
+- A hot LRU index in front of the object store keeps lookups local
+- Aliases to failed or vanished jobs are treated as misses; a claim
+  whose job record never appeared lapses after `result_cache_claim_seconds`
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.job_store import get_job_store
+from app.core.storage import ObjectNotFound, PreconditionFailed, get_store
+
+
+REUSABLE_STATUSES = ("created", "running", "completed")
+
+ALIAS_PREFIX = "cache/"
+
+
+def _reusable(record: Dict) -> bool:
+    # Appended jobs no longer hold the result of their upload alone
+    return (
+        record.get("status") in REUSABLE_STATUSES
+        and not record.get("appends")
+        and record.get("stage") != "append"
+    )
+
+
+def cache_key(content_sha256: str, request) -> str:
+    params = request.json(sort_keys=True)
+    return hashlib.sha256(f"{content_sha256}\n{params}".encode("utf-8")).hexdigest()
+
+
+def _alias_key(key: str) -> str:
+    return f"{ALIAS_PREFIX}{key}.json"
+
+
+class ResultCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._index: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Returns the id of a job whose result can be reused, or None.
+        """
+        alias = self._index_get(key)
+        if alias is None:
+            entry = _read_alias(key)
+            alias = None if entry is None else entry[0]
+
+        job_id = None if alias is None else self._target(alias)
+        if job_id is None:
+            self._drop(key)
+            self._count("_misses")
+            return None
+
+        self._index_put(key, alias)
+        self._count("_hits")
+        return job_id
+
+    def claim(self, key: str, job_id: str) -> str:
+        """
+        Registers `job_id` as computing `key`, unless a reusable job
+        already does. Returns the job that holds the key: `job_id`, or
+        the earlier job to reuse.
+        """
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+
+        store = get_store()
+        while True:
+            entry = _read_alias(key)
+            if entry is not None:
+                target = self._target(entry[0])
+                if target is not None:
+                    # Another submission claimed it since the lookup
+                    self._index_put(key, entry[0])
+                    return target
+
+            now = time.time()
+            alias = {"target": job_id, "claimed_at": now, "expires_at": now + self.ttl_seconds}
+
+            try:
+                store.put(
+                    _alias_key(key),
+                    json.dumps(alias).encode("utf-8"),
+                    content_type="application/json",
+                    if_match=None if entry is None else entry[1],
+                    if_none_match=entry is None,
+                )
+            except PreconditionFailed:
+                continue
+
+            self._index_put(key, alias)
+            return job_id
+
+    def release(self, key: str, job_id: str):
+        """
+        Drops the claim of a job that will not run.
+        """
+        self._drop(key)
+
+        entry = _read_alias(key)
+        if entry is not None and entry[0].get("target") == job_id:
+            get_store().delete(_alias_key(key))
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._index),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _target(self, alias: Dict) -> Optional[str]:
+        """
+        The alias's job if its result can be reused.
+        """
+        now = time.time()
+        if alias["expires_at"] < now:
+            self._count("_expirations")
+            return None
+
+        record = get_job_store().get(alias["target"])
+        if record is None:
+            # Claimed, job record not written yet
+            in_flight = now - alias.get("claimed_at", 0.0) < settings.result_cache_claim_seconds
+            return alias["target"] if in_flight else None
+
+        return alias["target"] if _reusable(record) else None
+
+    # --------------------------------------------------
+    # LRU index
+    # --------------------------------------------------
+
+    def _index_get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            return self._index.get(key)
+
+    def _index_put(self, key: str, alias: Dict):
+        with self._lock:
+            self._index[key] = alias
+            self._index.move_to_end(key)
+            while len(self._index) > self.max_entries:
+                self._index.popitem(last=False)
+                self._evictions += 1
+
+    def _drop(self, key: str):
+        with self._lock:
+            self._index.pop(key, None)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def _read_alias(key: str) -> Optional[Tuple[Dict, str]]:
+    try:
+        body, etag = get_store().get_with_etag(_alias_key(key))
+    except ObjectNotFound:
+        return None
+    return json.loads(body), etag
+
+
+result_cache = ResultCache(
+    max_entries=settings.result_cache_max_entries,
+    ttl_seconds=settings.result_cache_ttl_seconds,
+)
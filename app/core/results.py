@@ -0,0 +1,531 @@
+# app/core/results.py
+
+import json
+import struct
+from itertools import chain, islice
+from urllib.parse import quote
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+from app.core.decimate import decimate, stream_decimate
+from app.core.storage import MultipartWriter, ObjectNotFound, get_store
+from app.core.traverse import Traverse
+
+
+RESULT_COLUMNS = ("distance_along", "magnetic_value", "source")
+
+RESULT_CONTENT_TYPE = "application/x-gaia-result"
+
+RESULT_NAME = "result.chunks"
+
+# Results written before the chunked layout: plain CSV, read in full
+LEGACY_RESULT_NAME = "result.csv"
+
+# (distance_along, magnetic_value, is_measured) for a run of result rows
+Batch = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def output_prefix(job_id: str, line: Optional[str] = None) -> str:
+    if line is None:
+        return f"jobs/{job_id}/output/"
+    return f"jobs/{job_id}/output/{line_prefix(line)}/"
+
+
+def result_key(
+    job_id: str,
+    line: Optional[str] = None,
+    channel: Optional[str] = None,
+    spacing: Optional[float] = None,
+) -> str:
+    """
+    The primary channel / spacing result sits directly under the output
+    prefix; extra spacings get a `spacings/<spacing>/` folder and extra
+    value channels a `channels/<name>/` folder.
+    """
+    prefix = output_prefix(job_id, line)
+    if spacing is not None:
+        prefix += f"{spacing_prefix(spacing)}/"
+    if channel is not None:
+        prefix += f"channels/{key_segment(channel)}/"
+    return f"{prefix}{RESULT_NAME}"
+
+
+def key_segment(name: str) -> str:
+    """
+    Survey line / channel name made safe for a single key segment.
+    """
+    return quote(name, safe="").replace(".", "%2E") or "%20"
+
+
+def line_prefix(line: str) -> str:
+    return f"lines/{key_segment(line)}"
+
+
+def spacing_prefix(spacing: float) -> str:
+    """
+    Short form where it is exact (10 -> "10"), else the shortest
+    round-tripping repr, so distinct spacings never share a folder.
+    """
+    text = f"{spacing:g}"
+    if float(text) != spacing:
+        text = repr(float(spacing))
+    return f"spacings/{key_segment(text)}"
+
+
+# ============================================================
+# Layout
+# ============================================================
+#
+# A result object is a run of independent Parquet chunks, each a few
+# thousand rows ordered by distance_along, followed by a footer:
+#
+#   chunk 0 | chunk 1 | ... | index JSON | index length (<Q) | MAGIC
+#
+# The index lists every chunk's byte offset, length, row count and
+# distance range, so a distance window is served by ranged GETs of the
+# overlapping chunks only.
+
+MAGIC = b"GAIARES1"
+FOOTER = struct.Struct("<Q")
+
+# First footer read; larger indexes take a second read
+FOOTER_READ_BYTES = 64 * 1024
+
+CHUNK_SCHEMA = pa.schema([
+    ("distance_along", pa.float64()),
+    ("magnetic_value", pa.float64()),
+    ("is_measured", pa.bool_()),
+])
+
+
+# ============================================================
+# Writing
+# ============================================================
+
+def write_result(
+    job_id: str,
+    merged: Union[Traverse, Iterable],
+    line: Optional[str] = None,
+    channel: Optional[str] = None,
+    spacing: Optional[float] = None,
+    *,
+    split_at: Optional[float] = None,
+    keep_bytes: int = 0,
+) -> Tuple[str, int]:
+    """
+    Stores the merged dataset as distance-ordered chunks plus an index.
+
+    `merged` may be a Traverse, or an iterable of row dicts or column
+    batches (e.g. a streaming merge); iterables are written as they are
+    consumed, without materialising the whole result.
+
+    Rules (appends):
+    - keep_bytes: the chunks in the first bytes of the current result
+      are kept and `merged` is written after them; it must be an offset
+      returned by an earlier write
+    - split_at: a chunk ends before the first row with distance_along
+      >= split_at, and the returned offset is where that row's chunk
+      starts (the end of the data if none; 0 if split_at is None)
+
+    Returns the key and that byte offset.
+    """
+    key = result_key(job_id, line, channel, spacing)
+    writer = MultipartWriter(key, RESULT_CONTENT_TYPE)
+    offset = None
+
+    try:
+        index = []
+        if keep_bytes:
+            index = [
+                entry for entry in _read_index(key)[0]["chunks"]
+                if entry["offset"] + entry["length"] <= keep_bytes
+            ]
+            writer.copy_from(key, keep_bytes)
+
+        chunks = _ChunkWriter(writer, index)
+
+        if split_at is None:
+            offset = writer.size
+
+        for d, v, m in _as_batches(merged):
+            if offset is None:
+                cut = int(np.searchsorted(d, split_at))
+                if cut < d.shape[0]:
+                    chunks.add(d[:cut], v[:cut], m[:cut])
+                    chunks.flush()
+                    offset = writer.size
+                    d, v, m = d[cut:], v[cut:], m[cut:]
+
+            chunks.add(d, v, m)
+
+        chunks.flush()
+        if offset is None:
+            offset = writer.size
+
+        writer.write(_footer(index))
+    except Exception:
+        writer.abort()
+        raise
+
+    return writer.close(), offset
+
+
+class _ChunkWriter:
+    """
+    Groups batches into chunks of `result_chunk_rows` rows, appending
+    each chunk to the writer and its entry to the index.
+    """
+
+    def __init__(self, writer: MultipartWriter, index: List[Dict]):
+        self.writer = writer
+        self.index = index
+        self._pending: List[Batch] = []
+        self._rows = 0
+
+    def add(self, d: np.ndarray, v: np.ndarray, m: np.ndarray):
+        rows = settings.result_chunk_rows
+
+        while d.shape[0]:
+            take = rows - self._rows
+            self._pending.append((d[:take], v[:take], m[:take]))
+            self._rows += min(take, d.shape[0])
+            d, v, m = d[take:], v[take:], m[take:]
+
+            if self._rows >= rows:
+                self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+
+        d, v, m = (np.concatenate(cols) for cols in zip(*self._pending))
+        self._pending, self._rows = [], 0
+
+        table = pa.Table.from_arrays(
+            [pa.array(d), pa.array(v), pa.array(m)], schema=CHUNK_SCHEMA
+        )
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression="zstd")
+        body = sink.getvalue().to_pybytes()
+
+        self.index.append({
+            "offset": self.writer.size,
+            "length": len(body),
+            "rows": int(d.shape[0]),
+            "d_min": float(d[0]),
+            "d_max": float(d[-1]),
+        })
+        self.writer.write(body)
+
+
+def _footer(index: List[Dict]) -> bytes:
+    body = json.dumps({
+        "version": 1,
+        "rows": sum(entry["rows"] for entry in index),
+        "chunks": index,
+    }).encode("utf-8")
+    return body + FOOTER.pack(len(body)) + MAGIC
+
+
+# ============================================================
+# Reading
+# ============================================================
+
+def open_result(
+    job_id: str,
+    line: Optional[str] = None,
+    channel: Optional[str] = None,
+    spacing: Optional[float] = None,
+) -> Union["ResultReader", "LegacyResultReader"]:
+    """
+    Reads the result's index, or opens the legacy CSV result if there
+    is no chunked one. Raises ObjectNotFound straight away if the job
+    has no result yet.
+    """
+    key = result_key(job_id, line, channel, spacing)
+
+    try:
+        index, version = _read_index(key)
+    except ObjectNotFound:
+        legacy = key[:-len(RESULT_NAME)] + LEGACY_RESULT_NAME
+        return LegacyResultReader(legacy, get_store().open_chunks(legacy, settings.result_chunk_bytes))
+
+    return ResultReader(key, index, version)
+
+
+def is_legacy_result(key: str) -> bool:
+    return key.endswith(LEGACY_RESULT_NAME)
+
+
+class ResultReader:
+    """
+    Column batches of one result, read chunk by chunk.
+    """
+
+    def __init__(self, key: str, index: Dict, version: str):
+        self.key = key
+        self.index = index
+        self.version = version
+
+    @property
+    def rows(self) -> int:
+        return self.index["rows"]
+
+    def batches(self, d_from: Optional[float] = None, d_to: Optional[float] = None) -> Iterator[Batch]:
+        """
+        Rows with d_from <= distance_along <= d_to. Only the chunks
+        overlapping the window are fetched; adjacent ones are coalesced
+        into ranged GETs of up to `result_chunk_bytes`. Raises
+        PreconditionFailed if the result is replaced while reading.
+        """
+        for group in _coalesce(self._chunks(d_from, d_to), settings.result_chunk_bytes):
+            start = group[0]["offset"]
+            end = group[-1]["offset"] + group[-1]["length"]
+            body, _ = get_store().get_range(self.key, start, end, if_match=self.version)
+
+            for entry in group:
+                lo = entry["offset"] - start
+                batch, _ = _window(_decode_chunk(body[lo:lo + entry["length"]]), d_from, d_to)
+                if len(batch[0]):
+                    yield batch
+
+    def count(self, d_from: Optional[float] = None, d_to: Optional[float] = None) -> int:
+        """
+        Rows with d_from <= distance_along <= d_to. Chunks inside the
+        window count from the index; only the (at most two) chunks it
+        cuts are read.
+        """
+        total = 0
+
+        for entry in self._chunks(d_from, d_to):
+            if (d_from is None or entry["d_min"] >= d_from) and (d_to is None or entry["d_max"] <= d_to):
+                total += entry["rows"]
+                continue
+
+            start = entry["offset"]
+            body, _ = get_store().get_range(self.key, start, start + entry["length"], if_match=self.version)
+            total += len(_window(_decode_chunk(body), d_from, d_to)[0][0])
+
+        return total
+
+    def _chunks(self, d_from: Optional[float], d_to: Optional[float]) -> List[Dict]:
+        return [
+            entry for entry in self.index["chunks"]
+            if (d_from is None or entry["d_max"] >= d_from)
+            and (d_to is None or entry["d_min"] <= d_to)
+        ]
+
+
+class LegacyResultReader:
+    """
+    Column batches of a legacy CSV result, parsed as it streams in.
+    The object is read once, from the start: a window only stops the
+    read early once past its end.
+    """
+
+    def __init__(self, key: str, chunks: Iterator[bytes]):
+        self.key = key
+        self._chunks = chunks
+
+    def batches(self, d_from: Optional[float] = None, d_to: Optional[float] = None) -> Iterator[Batch]:
+        pending = b""
+        header_seen = False
+
+        for chunk in self._chunks:
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+
+            if not header_seen and lines:
+                lines = lines[1:]
+                header_seen = True
+
+            batch = _parse_lines(lines)
+            if batch is None:
+                continue
+
+            batch, done = _window(batch, d_from, d_to)
+            if len(batch[0]):
+                yield batch
+            if done:
+                return
+
+        if pending.strip() and header_seen:
+            batch = _parse_lines([pending])
+            if batch is not None:
+                batch, _ = _window(batch, d_from, d_to)
+                if len(batch[0]):
+                    yield batch
+
+
+def decimate_batches(
+    reader: Union[ResultReader, LegacyResultReader],
+    d_from: Optional[float],
+    d_to: Optional[float],
+    max_points: int,
+    method: str,
+) -> Iterator[Batch]:
+    """
+    The result's rows in the window, reduced to at most `max_points`
+    while preserving its shape.
+
+    Chunked results are decimated as they stream, with buckets sized
+    from the window's row count (see ResultReader.count). Legacy CSV
+    results have no index: they are collected first.
+    """
+    if isinstance(reader, ResultReader):
+        n = reader.count(d_from, d_to)
+        yield from stream_decimate(reader.batches(d_from, d_to), n, max_points, method)
+        return
+
+    parts = list(reader.batches(d_from, d_to))
+    if not parts:
+        return
+
+    d, v, m = (np.concatenate(cols) for cols in zip(*parts))
+    keep = decimate(d, v, max_points, method)
+    yield d[keep], v[keep], m[keep]
+
+
+def _read_index(key: str) -> Tuple[Dict, str]:
+    """
+    The result's index and the object version it was read from.
+    """
+    store = get_store()
+    tail, version = store.get_range(key, -FOOTER_READ_BYTES)
+
+    if not tail.endswith(MAGIC) or len(tail) < FOOTER.size + len(MAGIC):
+        raise ValueError(f"'{key}' is not a result object")
+
+    (length,) = FOOTER.unpack_from(tail, len(tail) - len(MAGIC) - FOOTER.size)
+    needed = length + FOOTER.size + len(MAGIC)
+    if needed > len(tail):
+        tail, _ = store.get_range(key, -needed, if_match=version)
+
+    body = tail[len(tail) - needed:len(tail) - needed + length]
+    return json.loads(body), version
+
+
+def _coalesce(chunks: List[Dict], max_bytes: int) -> Iterator[List[Dict]]:
+    group: List[Dict] = []
+
+    for entry in chunks:
+        if group and (
+            entry["offset"] != group[-1]["offset"] + group[-1]["length"]
+            or entry["offset"] + entry["length"] - group[0]["offset"] > max_bytes
+        ):
+            yield group
+            group = []
+        group.append(entry)
+
+    if group:
+        yield group
+
+
+def _parse_lines(lines: List[bytes]) -> Optional[Batch]:
+    fields = [line.rstrip(b"\r").split(b",") for line in lines if line.strip()]
+    if not fields:
+        return None
+
+    return (
+        np.array([float(f[0]) for f in fields], dtype=np.float64),
+        np.array([float(f[1]) for f in fields], dtype=np.float64),
+        np.array([f[2] == b"measured" for f in fields], dtype=bool),
+    )
+
+
+def _decode_chunk(body: bytes) -> Batch:
+    table = pq.read_table(pa.BufferReader(body))
+    return (
+        table.column("distance_along").to_numpy(),
+        table.column("magnetic_value").to_numpy(),
+        table.column("is_measured").to_numpy(zero_copy_only=False),
+    )
+
+
+# ============================================================
+# Serialisation
+# ============================================================
+
+CSV_HEADER = ",".join(RESULT_COLUMNS) + "\n"
+
+
+def iter_csv(batches: Iterable[Batch]) -> Iterator[str]:
+    yield CSV_HEADER
+
+    for d, v, m in batches:
+        yield _csv_rows(d, v, m)
+
+
+def _csv_rows(d: np.ndarray, v: np.ndarray, m: np.ndarray) -> str:
+    return "".join(
+        f"{di!r},{vi!r},{'measured' if mi else 'predicted'}\n"
+        for di, vi, mi in zip(d.tolist(), v.tolist(), m.tolist())
+    )
+
+
+def iter_json(batches: Iterable[Batch]) -> Iterator[str]:
+    yield "["
+
+    first = True
+    for d, v, m in batches:
+        body = ",".join(
+            json.dumps({
+                "distance_along": di,
+                "magnetic_value": vi,
+                "source": "measured" if mi else "predicted",
+            })
+            for di, vi, mi in zip(d.tolist(), v.tolist(), m.tolist())
+        )
+        yield body if first else "," + body
+        first = False
+
+    yield "]"
+
+
+# ============================================================
+# Internal helpers
+# ============================================================
+
+def _as_batches(merged, batch_rows: int = 65536) -> Iterator[Batch]:
+    if isinstance(merged, Traverse):
+        yield merged.d_along, merged.value, merged.is_measured
+        return
+
+    items = iter(merged)
+    first = next(items, None)
+    if first is None:
+        return
+
+    items = chain([first], items)
+    if not isinstance(first, dict):
+        yield from items
+        return
+
+    # Row dicts: group into column batches
+    while True:
+        rows = list(islice(items, batch_rows))
+        if not rows:
+            return
+        yield (
+            np.array([r["distance_along"] for r in rows], dtype=np.float64),
+            np.array([r["magnetic_value"] for r in rows], dtype=np.float64),
+            np.array([r["source"] == "measured" for r in rows], dtype=bool),
+        )
+
+
+def _window(batch: Batch, d_from: Optional[float], d_to: Optional[float]) -> Tuple[Batch, bool]:
+    d = batch[0]
+    mask = np.ones(d.shape[0], dtype=bool)
+    done = False
+
+    if d_from is not None:
+        mask &= d >= d_from
+    if d_to is not None:
+        mask &= d <= d_to
+        done = bool(d[-1] > d_to)
+
+    return tuple(col[mask] for col in batch), done
@@ -1,20 +1,29 @@
-import boto3
-from app.core.config import settings
+from typing import Optional
 
-s3 = boto3.client(
-    "s3",
-    region_name=settings.aws_region,
-)
+from app.core import artifacts
+from app.core.storage import MultipartWriter, get_store
 
 
-def upload_raw_csv(job_id: str, content: bytes, filename: str) -> str:
-    key = f"jobs/{job_id}/input/{filename}"
+def _input_key(job_id: str, filename: str) -> str:
+    return f"jobs/{job_id}/input/{filename}"
 
-    s3.put_object(
-        Bucket=settings.s3_bucket,
-        Key=key,
-        Body=content,
-        ContentType="text/csv",
-    )
+
+def raw_csv_key(job_id: str, filename: str = "uploaded.csv") -> str:
+    return _input_key(job_id, filename)
+
+
+def upload_artifact(job_id: str, content: bytes, filename: str) -> str:
+    key = _input_key(job_id, filename)
+
+    get_store().put(key, content, content_type=artifacts.content_type(artifacts.format_of(filename)))
 
     return key
+
+
+class RawCsvUpload(MultipartWriter):
+    """
+    Incremental upload of a raw CSV under the job's input prefix.
+    """
+
+    def __init__(self, job_id: str, filename: str, part_size: Optional[int] = None):
+        super().__init__(_input_key(job_id, filename), "text/csv", part_size)
@@ -1,16 +1,30 @@
 # app/core/sagemaker_client.py
 
+import hashlib
 import json
-import boto3
+from typing import Dict, Optional
+
+from app.core.clients import get_runtime
 from app.core.config import settings
+from app.core.storage import get_store, object_uri
+
+
+def _request_key(job_id: str, name: Optional[str] = None) -> str:
+    if name is None:
+        return f"jobs/{job_id}/inference/request.json"
+    return f"jobs/{job_id}/inference/{name}/request.json"
+
+
+def _inference_id(job_id: str, name: Optional[str] = None) -> str:
+    # InferenceId is limited to 64 characters
+    if name is None:
+        return job_id
+    return f"{job_id}-{hashlib.sha1(name.encode('utf-8')).hexdigest()[:12]}"
 
 
 class SageMakerClient:
     def __init__(self):
-        self.client = boto3.client(
-            "sagemaker-runtime",
-            region_name=settings.aws_region,
-        )
+        self.client = get_runtime()
 
         # name of your deployed async endpoint
         self.endpoint_name = settings.sagemaker_endpoint_name
@@ -21,7 +35,17 @@ class SageMakerClient:
         train_s3: str,
         predict_s3: str,
         output_s3: str,
-    ):
+        name: Optional[str] = None,
+    ) -> Dict:
+        """
+        Queues an asynchronous invocation and returns straight away.
+        `name` distinguishes several invocations of one job (per line).
+
+        The request document is staged in the bucket (async endpoints only
+        accept an S3 input location). The response carries OutputLocation
+        and FailureLocation; exactly one of them appears when the
+        invocation finishes.
+        """
         payload = {
             "job_id": job_id,
             "train_s3": train_s3,
@@ -29,10 +53,14 @@ class SageMakerClient:
             "output_s3": output_s3,
         }
 
+        key = _request_key(job_id, name)
+        get_store().put(key, json.dumps(payload).encode("utf-8"), content_type="application/json")
+
         response = self.client.invoke_endpoint_async(
             EndpointName=self.endpoint_name,
             ContentType="application/json",
-            InputLocation=json.dumps(payload),
+            InputLocation=object_uri(key),
+            InferenceId=_inference_id(job_id, name),
         )
 
         return response
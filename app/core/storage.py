@@ -0,0 +1,575 @@
+# app/core/storage.py
+
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.clients import get_client
+from app.core.config import settings
+
+
+class ObjectNotFound(KeyError):
+    pass
+
+
+class PreconditionFailed(Exception):
+    """
+    A conditional write lost against a concurrent writer.
+    """
+
+
+# ============================================================
+# Backends
+# ============================================================
+
+class ObjectStore(ABC):
+    """
+    Minimal object storage interface used by the backend.
+
+    Keys are S3-style paths (e.g. jobs/<id>/input/train.csv).
+    """
+
+    @abstractmethod
+    def put(
+        self,
+        key: str,
+        body: bytes,
+        content_type: str = "application/octet-stream",
+        *,
+        if_match: Optional[str] = None,
+        if_none_match: bool = False,
+    ) -> str:
+        """
+        Writes an object and returns its ETag.
+
+        - if_match: only write if the current ETag equals this value
+        - if_none_match: only write if the object does not exist yet
+        """
+
+    def get(self, key: str) -> bytes:
+        return self.get_with_etag(key)[0]
+
+    @abstractmethod
+    def get_with_etag(self, key: str) -> Tuple[bytes, str]:
+        ...
+
+    @abstractmethod
+    def open_chunks(self, key: str, chunk_size: int) -> Iterator[bytes]:
+        """
+        Starts reading an object (raising ObjectNotFound immediately if it
+        is missing) and returns an iterator over its bytes in chunks.
+        """
+
+    @abstractmethod
+    def get_range(self, key: str, start: int, end: Optional[int] = None, if_match: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Reads bytes [start, end) of an object (to the end if `end` is
+        None; the last -start bytes if start < 0). Returns them with the
+        object's version token; with `if_match`, raises
+        PreconditionFailed if the object changed since that version.
+        Tokens are only comparable between get_range calls.
+        """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def list_keys(self, prefix: str, start_after: Optional[str] = None) -> Iterator[str]:
+        """
+        Keys under `prefix` in lexicographic order, after `start_after`.
+        """
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    # Multipart uploads
+    @abstractmethod
+    def create_multipart(self, key: str, content_type: str) -> str:
+        ...
+
+    @abstractmethod
+    def upload_part(
+        self,
+        key: str,
+        upload_id: str,
+        number: int,
+        body: bytes,
+        content_md5: Optional[str] = None,
+    ) -> str:
+        """
+        Uploads one part and returns its ETag. `content_md5` (base64) lets
+        the store verify the body it received.
+        """
+
+    @abstractmethod
+    def list_parts(self, key: str, upload_id: str) -> List[Dict]:
+        """
+        Parts received so far: PartNumber, ETag and Size, by part number.
+        Raises ObjectNotFound if the upload does not exist.
+        """
+
+    @abstractmethod
+    def copy_part(self, key: str, upload_id: str, number: int, source_key: str, length: int) -> str:
+        """
+        Uploads the first `length` bytes of `source_key` as a part,
+        without passing them through this process. Returns the part ETag.
+        """
+
+    @abstractmethod
+    def complete_multipart(self, key: str, upload_id: str, parts: List[Dict]):
+        ...
+
+    @abstractmethod
+    def abort_multipart(self, key: str, upload_id: str):
+        ...
+
+
+class S3ObjectStore(ObjectStore):
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+        self.client = get_client("s3")
+
+    def put(self, key, body, content_type="application/octet-stream", *, if_match=None, if_none_match=False):
+        extra = {}
+        if if_match is not None:
+            extra["IfMatch"] = if_match
+        if if_none_match:
+            extra["IfNoneMatch"] = "*"
+
+        try:
+            response = self.client.put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=body,
+                ContentType=content_type,
+                **extra,
+            )
+        except self.client.exceptions.ClientError as exc:
+            if exc.response["Error"]["Code"] in ("PreconditionFailed", "ConditionalRequestConflict"):
+                raise PreconditionFailed(key)
+            raise
+
+        return response["ETag"]
+
+    def get_with_etag(self, key):
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            raise ObjectNotFound(key)
+        return obj["Body"].read(), obj["ETag"]
+
+    def open_chunks(self, key, chunk_size):
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            raise ObjectNotFound(key)
+        return obj["Body"].iter_chunks(chunk_size)
+
+    def get_range(self, key, start, end=None, if_match=None):
+        if start < 0:
+            byte_range = f"bytes={start}"
+        else:
+            byte_range = f"bytes={start}-{'' if end is None else end - 1}"
+
+        extra = {}
+        if if_match is not None:
+            extra["IfMatch"] = if_match
+
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=key, Range=byte_range, **extra)
+        except self.client.exceptions.NoSuchKey:
+            raise ObjectNotFound(key)
+        except self.client.exceptions.ClientError as exc:
+            if exc.response["Error"]["Code"] == "PreconditionFailed":
+                raise PreconditionFailed(key)
+            raise
+
+        return obj["Body"].read(), obj["ETag"]
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.ClientError as exc:
+            if exc.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def list_keys(self, prefix, start_after=None):
+        paginator = self.client.get_paginator("list_objects_v2")
+        extra = {}
+        if start_after is not None:
+            extra["StartAfter"] = start_after
+
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, **extra):
+            for obj in page.get("Contents", []):
+                yield obj["Key"]
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def create_multipart(self, key, content_type):
+        response = self.client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            ContentType=content_type,
+        )
+        return response["UploadId"]
+
+    def upload_part(self, key, upload_id, number, body, content_md5=None):
+        extra = {}
+        if content_md5 is not None:
+            extra["ContentMD5"] = content_md5
+
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=body,
+            **extra,
+        )
+        return response["ETag"]
+
+    def list_parts(self, key, upload_id):
+        parts = []
+        paginator = self.client.get_paginator("list_parts")
+
+        try:
+            for page in paginator.paginate(Bucket=self.bucket, Key=key, UploadId=upload_id):
+                parts.extend(
+                    {"PartNumber": p["PartNumber"], "ETag": p["ETag"], "Size": p["Size"]}
+                    for p in page.get("Parts", [])
+                )
+        except self.client.exceptions.NoSuchUpload:
+            raise ObjectNotFound(key)
+
+        return parts
+
+    def copy_part(self, key, upload_id, number, source_key, length):
+        response = self.client.upload_part_copy(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=number,
+            CopySource={"Bucket": self.bucket, "Key": source_key},
+            CopySourceRange=f"bytes=0-{length - 1}",
+        )
+        return response["CopyPartResult"]["ETag"]
+
+    def complete_multipart(self, key, upload_id, parts):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    def abort_multipart(self, key, upload_id):
+        self.client.abort_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+        )
+
+
+class LocalObjectStore(ObjectStore):
+    """
+    Filesystem stand-in for S3, for offline runs and load tests.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def _parts_dir(self, upload_id: str) -> str:
+        return os.path.join(self.root, ".multipart", upload_id)
+
+    def put(self, key, body, content_type="application/octet-stream", *, if_match=None, if_none_match=False):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Atomic replace so readers never see a partial object
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+
+        with self._lock:
+            if if_match is not None or if_none_match:
+                try:
+                    current = self.get_with_etag(key)[1]
+                except ObjectNotFound:
+                    current = None
+
+                if (if_none_match and current is not None) or (
+                    if_match is not None and current != if_match
+                ):
+                    os.remove(tmp)
+                    raise PreconditionFailed(key)
+
+            os.replace(tmp, path)
+
+        return _etag(body)
+
+    def get_with_etag(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+        return body, _etag(body)
+
+    def open_chunks(self, key, chunk_size):
+        try:
+            f = open(self._path(key), "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+        return _read_chunks(f, chunk_size)
+
+    def get_range(self, key, start, end=None, if_match=None):
+        try:
+            f = open(self._path(key), "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+
+        with f:
+            # Objects are replaced atomically: the open file is one version
+            stat = os.fstat(f.fileno())
+            version = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            if if_match is not None and version != if_match:
+                raise PreconditionFailed(key)
+
+            if start < 0:
+                start = max(stat.st_size + start, 0)
+            f.seek(start)
+            body = f.read() if end is None else f.read(max(end - start, 0))
+
+        return body, version
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def list_keys(self, prefix, start_after=None):
+        folder = prefix.rpartition("/")[0]
+        keys = []
+
+        for dirpath, _, filenames in os.walk(self._path(folder) if folder else self.root):
+            rel = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+            for name in filenames:
+                key = name if rel == "." else f"{rel}/{name}"
+                if name.endswith(".tmp") or not key.startswith(prefix):
+                    continue
+                if start_after is None or key > start_after:
+                    keys.append(key)
+
+        return iter(sorted(keys))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def create_multipart(self, key, content_type):
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._parts_dir(upload_id))
+        return upload_id
+
+    def upload_part(self, key, upload_id, number, body, content_md5=None):
+        parts_dir = self._parts_dir(upload_id)
+        if not os.path.isdir(parts_dir):
+            raise ObjectNotFound(key)
+
+        # Atomic replace: a retried part may race the original
+        path = os.path.join(parts_dir, f"{number:05d}")
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+        return _etag(body)
+
+    def list_parts(self, key, upload_id):
+        parts_dir = self._parts_dir(upload_id)
+        try:
+            names = sorted(n for n in os.listdir(parts_dir) if n.isdigit())
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+
+        parts = []
+        for name in names:
+            with open(os.path.join(parts_dir, name), "rb") as f:
+                body = f.read()
+            parts.append({"PartNumber": int(name), "ETag": _etag(body), "Size": len(body)})
+
+        return parts
+
+    def copy_part(self, key, upload_id, number, source_key, length):
+        digest = hashlib.md5()
+        try:
+            src = open(self._path(source_key), "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(source_key)
+
+        with src, open(os.path.join(self._parts_dir(upload_id), f"{number:05d}"), "wb") as out:
+            for chunk in _read_chunks(src, 1024 * 1024):
+                chunk = chunk[:length]
+                out.write(chunk)
+                digest.update(chunk)
+                length -= len(chunk)
+                if length <= 0:
+                    break
+
+        return f'"{digest.hexdigest()}"'
+
+    def complete_multipart(self, key, upload_id, parts):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        parts_dir = self._parts_dir(upload_id)
+        tmp = f"{path}.{upload_id}.tmp"
+        with open(tmp, "wb") as out:
+            for part in sorted(parts, key=lambda p: p["PartNumber"]):
+                with open(os.path.join(parts_dir, f"{part['PartNumber']:05d}"), "rb") as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp, path)
+
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    def abort_multipart(self, key, upload_id):
+        shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True)
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def _read_chunks(f, chunk_size: int) -> Iterator[bytes]:
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+# ============================================================
+# Incremental writes
+# ============================================================
+
+class MultipartWriter:
+    """
+    Incremental write of one object through a multipart upload.
+
+    Bytes are buffered until a full part is available, so memory stays
+    bounded by `part_size` regardless of the object size.
+    """
+
+    def __init__(self, key: str, content_type: str, part_size: Optional[int] = None):
+        self.key = key
+        self.part_size = part_size or settings.upload_part_bytes
+
+        self._store = get_store()
+        self._buffer = bytearray()
+        self._parts = []
+
+        # Bytes written so far (copied prefix included)
+        self.size = 0
+
+        self._upload_id = self._store.create_multipart(self.key, content_type)
+
+    def copy_from(self, source_key: str, length: int):
+        """
+        Starts the object with the first `length` bytes of `source_key`
+        (which may be the current version of this very key). Prefixes of
+        at least a part are copied server-side; shorter ones, which S3
+        does not accept as a non-final part, are re-sent.
+        """
+        if self.size:
+            raise RuntimeError("copy_from must come before any write")
+
+        if length >= self.part_size:
+            etag = self._store.copy_part(self.key, self._upload_id, 1, source_key, length)
+            self._parts.append({"PartNumber": 1, "ETag": etag})
+            self.size = length
+            return
+
+        remaining = length
+        for chunk in self._store.open_chunks(source_key, self.part_size):
+            self.write(chunk[:remaining])
+            remaining -= len(chunk)
+            if remaining <= 0:
+                break
+
+        if self.size != length:
+            raise RuntimeError(f"{source_key} is shorter than {length} bytes")
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        self._buffer += chunk
+        while len(self._buffer) >= self.part_size:
+            self._send(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+
+    def close(self) -> str:
+        # The final part may be smaller than the S3 minimum
+        if self._buffer or not self._parts:
+            self._send(bytes(self._buffer))
+            self._buffer.clear()
+
+        self._store.complete_multipart(self.key, self._upload_id, self._parts)
+
+        return self.key
+
+    def abort(self):
+        self._store.abort_multipart(self.key, self._upload_id)
+
+    def _send(self, body: bytes):
+        number = len(self._parts) + 1
+        etag = self._store.upload_part(self.key, self._upload_id, number, body)
+        self._parts.append({"PartNumber": number, "ETag": etag})
+
+
+# ============================================================
+# Shared store
+# ============================================================
+
+_store: Optional[ObjectStore] = None
+
+
+def get_store() -> ObjectStore:
+    global _store
+
+    if _store is None:
+        if settings.storage_backend == "local":
+            _store = LocalObjectStore(settings.local_storage_dir)
+        elif settings.storage_backend == "s3":
+            _store = S3ObjectStore(settings.s3_bucket)
+        else:
+            raise ValueError(f"Unknown storage backend '{settings.storage_backend}'")
+
+    return _store
+
+
+# ============================================================
+# URIs (locations exchanged with SageMaker)
+# ============================================================
+
+def object_uri(key: str) -> str:
+    return f"s3://{settings.s3_bucket}/{key}"
+
+
+def key_from_uri(uri: str) -> str:
+    prefix = f"s3://{settings.s3_bucket}/"
+    if not uri.startswith(prefix):
+        raise ValueError(f"'{uri}' is outside bucket '{settings.s3_bucket}'")
+    return uri[len(prefix):]
@@ -0,0 +1,350 @@
+# app/core/traverse.py
+
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+D_ALONG_COL = "d_along"
+IS_MEASURED_COL = "is_measured"
+
+_TRUE_STRINGS = {"true", "t", "1", "yes", "y"}
+
+
+# ============================================================
+# Traverse container
+# ============================================================
+
+@dataclass
+class Traverse:
+    """
+    Columnar representation of a single traverse.
+
+    Numeric columns are float64 arrays (missing values are NaN),
+    `is_measured` is a boolean mask and any other CSV columns are
+    carried through untouched in `extras`.
+
+    `value` is the primary channel; further value channels (e.g. a
+    gradient or second sensor) live in `channels`, in request order.
+    """
+
+    x: np.ndarray
+    y: np.ndarray
+    value: np.ndarray
+    d_along: np.ndarray
+    is_measured: np.ndarray
+
+    x_col: str = "x"
+    y_col: str = "y"
+    value_col: str = "value"
+
+    channels: Dict[str, np.ndarray] = field(default_factory=dict)
+    extras: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    # Original header order, used when writing CSV back out
+    columns: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        n = self.x.shape[0]
+        for name in ("y", "value", "d_along", "is_measured"):
+            if getattr(self, name).shape[0] != n:
+                raise ValueError(f"Traverse column '{name}' has wrong length")
+
+        for name, col in self.channels.items():
+            if col.shape[0] != n:
+                raise ValueError(f"Traverse channel '{name}' has wrong length")
+
+        if not self.columns:
+            self.columns = [self.x_col, self.y_col, *self.value_cols, *self.extras]
+
+    def __len__(self) -> int:
+        return self.x.shape[0]
+
+    # --------------------------------------------------
+    # Construction
+    # --------------------------------------------------
+
+    @classmethod
+    def from_arrays(
+        cls,
+        x,
+        y,
+        value=None,
+        *,
+        x_col: str = "x",
+        y_col: str = "y",
+        value_col: str = "value",
+        d_along=None,
+        is_measured=None,
+        channels: Optional[Dict[str, np.ndarray]] = None,
+        extras: Optional[Dict[str, np.ndarray]] = None,
+        columns: Optional[List[str]] = None,
+    ) -> "Traverse":
+        x = np.asarray(x, dtype=np.float64)
+        n = x.shape[0]
+
+        return cls(
+            x=x,
+            y=np.asarray(y, dtype=np.float64),
+            value=(
+                np.full(n, np.nan) if value is None
+                else np.asarray(value, dtype=np.float64)
+            ),
+            d_along=(
+                np.zeros(n) if d_along is None
+                else np.asarray(d_along, dtype=np.float64)
+            ),
+            is_measured=(
+                np.zeros(n, dtype=bool) if is_measured is None
+                else np.asarray(is_measured, dtype=bool)
+            ),
+            x_col=x_col,
+            y_col=y_col,
+            value_col=value_col,
+            channels={
+                name: np.asarray(col, dtype=np.float64)
+                for name, col in (channels or {}).items()
+            },
+            extras=dict(extras or {}),
+            columns=list(columns or []),
+        )
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: List[Dict],
+        *,
+        x_col: str,
+        y_col: str,
+        value_col: str,
+    ) -> "Traverse":
+        """
+        Builds a traverse from DictReader-style rows (string values).
+        """
+        n = len(rows)
+        columns = list(rows[0].keys()) if rows else [x_col, y_col, value_col]
+        reserved = {x_col, y_col, value_col, D_ALONG_COL, IS_MEASURED_COL}
+
+        x = np.fromiter((float(r[x_col]) for r in rows), dtype=np.float64, count=n)
+        y = np.fromiter((float(r[y_col]) for r in rows), dtype=np.float64, count=n)
+        value = np.fromiter(
+            (parse_float(r.get(value_col)) for r in rows), dtype=np.float64, count=n
+        )
+
+        d_along = None
+        if rows and D_ALONG_COL in rows[0]:
+            d_along = np.fromiter(
+                (float(r[D_ALONG_COL]) for r in rows), dtype=np.float64, count=n
+            )
+
+        is_measured = None
+        if rows and IS_MEASURED_COL in rows[0]:
+            is_measured = np.fromiter(
+                (parse_bool(r[IS_MEASURED_COL]) for r in rows), dtype=bool, count=n
+            )
+
+        extras = {
+            c: np.array([r.get(c, "") for r in rows], dtype=object)
+            for c in columns
+            if c not in reserved
+        }
+
+        return cls.from_arrays(
+            x,
+            y,
+            value,
+            x_col=x_col,
+            y_col=y_col,
+            value_col=value_col,
+            d_along=d_along,
+            is_measured=is_measured,
+            extras=extras,
+            columns=[c for c in columns if c not in (D_ALONG_COL, IS_MEASURED_COL)],
+        )
+
+    # --------------------------------------------------
+    # Selection
+    # --------------------------------------------------
+
+    def select(self, index) -> "Traverse":
+        """
+        Returns the stations picked by a boolean mask or integer index.
+        """
+        return replace(
+            self,
+            x=self.x[index],
+            y=self.y[index],
+            value=self.value[index],
+            d_along=self.d_along[index],
+            is_measured=self.is_measured[index],
+            channels={k: v[index] for k, v in self.channels.items()},
+            extras={k: v[index] for k, v in self.extras.items()},
+            columns=list(self.columns),
+        )
+
+    def concat(self, other: "Traverse") -> "Traverse":
+        """
+        Stations of `self` followed by those of `other` (same channels).
+        Extras are kept only when both sides have them.
+        """
+        def join(a, b):
+            return np.concatenate([a, b])
+
+        return replace(
+            self,
+            x=join(self.x, other.x),
+            y=join(self.y, other.y),
+            value=join(self.value, other.value),
+            d_along=join(self.d_along, other.d_along),
+            is_measured=join(self.is_measured, other.is_measured),
+            channels={k: join(v, other.channels[k]) for k, v in self.channels.items()},
+            extras={
+                k: join(v, other.extras[k])
+                for k, v in self.extras.items()
+                if k in other.extras
+            },
+            columns=list(self.columns),
+        )
+
+    def group_by(self, column: str) -> List[Tuple[str, "Traverse"]]:
+        """
+        Splits on an extras column (e.g. survey line), keeping file order
+        within each group and ordering groups by first appearance.
+        """
+        if column not in self.extras:
+            raise ValueError(f"CSV is missing column '{column}'")
+
+        labels, first, codes = np.unique(
+            self.extras[column].astype(str), return_index=True, return_inverse=True
+        )
+
+        order = np.argsort(codes, kind="stable")
+        bounds = np.cumsum(np.bincount(codes, minlength=labels.shape[0]))[:-1]
+        groups = dict(zip(labels.tolist(), np.split(order, bounds)))
+
+        return [
+            (label, self.select(groups[label]))
+            for label in labels[np.argsort(first)].tolist()
+        ]
+
+    @property
+    def has_value(self) -> np.ndarray:
+        return ~np.isnan(self.value)
+
+    # --------------------------------------------------
+    # Channels
+    # --------------------------------------------------
+
+    @property
+    def value_cols(self) -> List[str]:
+        return [self.value_col, *self.channels]
+
+    def channel(self, name: str) -> np.ndarray:
+        return self.value if name == self.value_col else self.channels[name]
+
+    def values_matrix(self) -> np.ndarray:
+        """
+        All channels as an (n, channels) array.
+        """
+        return np.column_stack([self.channel(name) for name in self.value_cols])
+
+    def for_channel(self, name: str) -> "Traverse":
+        """
+        Single-channel view with `name` as the value column.
+        """
+        return replace(
+            self,
+            value=self.channel(name),
+            value_col=name,
+            channels={},
+            columns=[self.x_col, self.y_col, name, *self.extras],
+        )
+
+    # --------------------------------------------------
+    # Export
+    # --------------------------------------------------
+
+    @property
+    def output_columns(self) -> List[str]:
+        return [*self.columns, D_ALONG_COL, IS_MEASURED_COL]
+
+    def column_strings(self, name: str) -> List[str]:
+        """
+        String form of a column, as written to CSV.
+        """
+        if name == self.x_col:
+            return _format_floats(self.x)
+        if name == self.y_col:
+            return _format_floats(self.y)
+        if name == self.value_col:
+            return _format_floats(self.value)
+        if name in self.channels:
+            return _format_floats(self.channels[name])
+        if name == D_ALONG_COL:
+            return _format_floats(self.d_along)
+        if name == IS_MEASURED_COL:
+            return [str(v) for v in self.is_measured.tolist()]
+        if name in self.extras:
+            return ["" if v is None else str(v) for v in self.extras[name].tolist()]
+
+        return [""] * len(self)
+
+    def iter_csv_lines(self) -> Iterable[str]:
+        headers = self.output_columns
+        yield ",".join(headers)
+        yield from map(",".join, zip(*(self.column_strings(h) for h in headers)))
+
+    def to_csv_bytes(self) -> bytes:
+        return "\n".join(self.iter_csv_lines()).encode()
+
+    def to_rows(self) -> List[Dict]:
+        """
+        Row view for callers that still work on dicts.
+        """
+        rows = []
+        extras = {k: v.tolist() for k, v in self.extras.items()}
+
+        for i, (x, y, v, d, m) in enumerate(zip(
+            self.x.tolist(),
+            self.y.tolist(),
+            self.value.tolist(),
+            self.d_along.tolist(),
+            self.is_measured.tolist(),
+        )):
+            row = {k: col[i] for k, col in extras.items()}
+            row[self.x_col] = x
+            row[self.y_col] = y
+            row[self.value_col] = "" if v != v else v
+            for name, col in self.channels.items():
+                c = float(col[i])
+                row[name] = "" if c != c else c
+            row[D_ALONG_COL] = d
+            row[IS_MEASURED_COL] = m
+            rows.append(row)
+
+        return rows
+
+
+# ============================================================
+# Parsing helpers
+# ============================================================
+
+def parse_float(raw) -> float:
+    if raw is None:
+        return np.nan
+    if isinstance(raw, str):
+        raw = raw.strip()
+        if raw == "":
+            return np.nan
+    return float(raw)
+
+
+def parse_bool(raw) -> bool:
+    if isinstance(raw, str):
+        return raw.strip().lower() in _TRUE_STRINGS
+    return bool(raw)
+
+
+def _format_floats(values: np.ndarray) -> List[str]:
+    return ["" if v != v else repr(v) for v in values.tolist()]
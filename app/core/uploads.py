@@ -0,0 +1,267 @@
+# app/core/uploads.py
+
+"""
+Resumable uploads of large survey CSVs.
+
+Protocol (see routes/uploads.py):
+1. initiate: declares the file size and, optionally, the SHA-256 of the
+   whole file; returns the part size
+2. PUT parts at byte offsets (multiples of the part size), in any order
+   and in parallel, each with its SHA-256. A failed part is simply sent
+   again; the status lists the offsets still missing
+3. complete: assembles the parts and starts the job
+
+The whole-file SHA-256 is the upload's content id for the result cache
+(uploads without one are not cached). It is taken on trust at complete,
+so the assembled object is never read back on the request path; the job
+checks it as it parses the object and fails on a mismatch, so a wrong
+digest never lands in the cache. Transport integrity is covered by the
+per-part checksums.
+
+An upload is one multipart upload of the job's raw CSV key, so the
+assembled object is the job's input as is: nothing is copied. The
+session (job id, sizes, multipart id) is a small JSON object written at
+initiate; received parts are read back from the store (ListParts), so
+parallel part uploads never contend on shared state. A completed session
+is kept: its status names the job, and completing it again is refused.
+"""
+
+import base64
+import hashlib
+import json
+import math
+import re
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.ingest import StoredUpload
+from app.core.s3_io import raw_csv_key
+from app.core.storage import ObjectNotFound, PreconditionFailed, get_store
+
+
+# S3 multipart limits
+MIN_PART_BYTES = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+_UPLOAD_ID = re.compile(r"upload-[0-9a-f]{32}")
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+class UploadError(ValueError):
+    pass
+
+
+class UploadStateError(UploadError):
+    pass
+
+
+def _session_key(upload_id: str) -> str:
+    return f"uploads/{upload_id}/session.json"
+
+
+# ============================================================
+# Sessions
+# ============================================================
+
+def create_upload(filename: str, size: int, sha256: Optional[str] = None) -> Dict:
+    if size <= 0:
+        raise UploadError("Upload size must be positive")
+
+    if sha256 is not None:
+        sha256 = sha256.strip().lower()
+        if not _SHA256.fullmatch(sha256):
+            raise UploadError("sha256 must be the hex SHA-256 of the whole file")
+
+    # Parts of at least the S3 minimum, and few enough for S3's limit
+    part_size = max(settings.upload_part_bytes, MIN_PART_BYTES, math.ceil(size / MAX_PARTS))
+
+    job_id = f"gaia-{uuid.uuid4().hex}"
+    key = raw_csv_key(job_id)
+
+    session = {
+        "upload_id": f"upload-{uuid.uuid4().hex}",
+        "job_id": job_id,
+        "filename": filename,
+        "size": size,
+        "sha256": sha256,
+        "part_size": part_size,
+        "parts": math.ceil(size / part_size),
+        "status": "open",
+        "created_at": datetime.utcnow().isoformat(),
+        "key": key,
+        "multipart_id": get_store().create_multipart(key, "text/csv"),
+    }
+
+    get_store().put(
+        _session_key(session["upload_id"]),
+        json.dumps(session).encode("utf-8"),
+        content_type="application/json",
+        if_none_match=True,
+    )
+
+    return public_session(session)
+
+
+def upload_status(upload_id: str) -> Dict:
+    """
+    The session plus the parts received so far and the offsets still
+    missing, for resuming an interrupted upload. Once completed (or
+    completing), the session alone.
+    """
+    session, _ = _read_session(upload_id)
+    if session["status"] != "open":
+        return public_session(session)
+
+    received = _received(session)
+
+    return {
+        **public_session(session),
+        "received": [
+            {"offset": (p["PartNumber"] - 1) * session["part_size"], "size": p["Size"]}
+            for p in received.values()
+        ],
+        "missing": [
+            (number - 1) * session["part_size"]
+            for number in range(1, session["parts"] + 1)
+            if number not in received
+        ],
+    }
+
+
+def public_session(session: Dict) -> Dict:
+    return {k: v for k, v in session.items() if k not in ("key", "multipart_id")}
+
+
+# ============================================================
+# Parts
+# ============================================================
+
+def put_part(upload_id: str, offset: int, body: bytes, sha256: str) -> Dict:
+    """
+    Stores the part starting at `offset`.
+
+    Rules:
+    - offset is a multiple of the part size, inside the file
+    - every part but the last is exactly one part size long
+    - sha256 (hex) must match the body
+    """
+    session, _ = _read_session(upload_id)
+    if session["status"] != "open":
+        raise UploadStateError(f"Upload is {session['status']}")
+
+    part_size, size = session["part_size"], session["size"]
+    if offset < 0 or offset >= size or offset % part_size:
+        raise UploadError(f"Offset must be a multiple of {part_size} below {size}")
+
+    expected = min(part_size, size - offset)
+    if len(body) != expected:
+        raise UploadError(f"Part at offset {offset} must be {expected} bytes, got {len(body)}")
+
+    if hashlib.sha256(body).hexdigest() != sha256.strip().lower():
+        raise UploadError(f"Checksum mismatch for part at offset {offset}")
+
+    # Content-MD5 lets S3 check the bytes it received from us as well
+    etag = get_store().upload_part(
+        session["key"],
+        session["multipart_id"],
+        offset // part_size + 1,
+        body,
+        content_md5=base64.b64encode(hashlib.md5(body).digest()).decode("ascii"),
+    )
+
+    return {"offset": offset, "size": len(body), "etag": etag}
+
+
+# ============================================================
+# Completion
+# ============================================================
+
+def complete_upload(upload_id: str) -> Tuple[str, StoredUpload]:
+    """
+    Assembles the parts into the job's raw CSV. Returns the job id and
+    the upload to run it on, with the declared SHA-256 (checked by the
+    job's ingest). Only one completion of a session succeeds.
+    """
+    session, version = _read_session(upload_id)
+    if session["status"] != "open":
+        raise UploadStateError(f"Upload is {session['status']}")
+
+    received = _received(session)
+    missing = session["parts"] - len(received)
+    if missing:
+        raise UploadError(f"{missing} of {session['parts']} parts are missing")
+
+    session["status"] = "completing"
+    try:
+        get_store().put(
+            _session_key(upload_id),
+            json.dumps(session).encode("utf-8"),
+            content_type="application/json",
+            if_match=version,
+        )
+    except PreconditionFailed:
+        raise UploadStateError("Upload is already being completed")
+
+    parts: List[Dict] = [
+        {"PartNumber": number, "ETag": part["ETag"]}
+        for number, part in sorted(received.items())
+    ]
+    try:
+        get_store().complete_multipart(session["key"], session["multipart_id"], parts)
+    except Exception:
+        # The parts are still there: completion can be retried
+        session["status"] = "open"
+        get_store().put(
+            _session_key(upload_id),
+            json.dumps(session).encode("utf-8"),
+            content_type="application/json",
+        )
+        raise
+
+    session.update(status="completed", completed_at=datetime.utcnow().isoformat())
+    get_store().put(
+        _session_key(upload_id),
+        json.dumps(session).encode("utf-8"),
+        content_type="application/json",
+    )
+
+    return session["job_id"], StoredUpload(session["key"], session["size"], session["sha256"])
+
+
+def abort_upload(upload_id: str):
+    session, _ = _read_session(upload_id)
+    if session["status"] != "open":
+        raise UploadStateError(f"Upload is {session['status']}")
+
+    get_store().abort_multipart(session["key"], session["multipart_id"])
+    get_store().delete(_session_key(upload_id))
+
+
+# ============================================================
+# Internals
+# ============================================================
+
+def _read_session(upload_id: str) -> Tuple[Dict, str]:
+    if not _UPLOAD_ID.fullmatch(upload_id):
+        raise ObjectNotFound(upload_id)
+
+    body, version = get_store().get_with_etag(_session_key(upload_id))
+    return json.loads(body), version
+
+
+def _received(session: Dict) -> Dict[int, Dict]:
+    """
+    Received parts by number; parts of the wrong size (which the
+    offset rules rule out) are treated as missing.
+    """
+    part_size, size = session["part_size"], session["size"]
+    received = {}
+
+    for part in get_store().list_parts(session["key"], session["multipart_id"]):
+        number = part["PartNumber"]
+        if part["Size"] == min(part_size, size - (number - 1) * part_size):
+            received[number] = part
+
+    return received
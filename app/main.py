@@ -1,8 +1,17 @@
+import asyncio
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core import aio
+from app.core.completions import tracker
+from app.core.executor import executor
 from app.routes.jobs import router as jobs_router
+from app.routes.uploads import router as uploads_router
+
 
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="GAIA Magnetics Backend",
@@ -24,6 +33,29 @@ app.include_router(
     prefix="/jobs",
     tags=["jobs"],
 )
+app.include_router(
+    uploads_router,
+    prefix="/uploads",
+    tags=["uploads"],
+)
+
+
+@app.on_event("startup")
+async def backfill_job_index():
+    # In the background: listing every job must not hold up startup
+    async def backfill():
+        try:
+            await aio.backfill_job_index()
+        except Exception:
+            logger.exception("Backfilling the job index failed")
+
+    app.state.index_backfill = asyncio.create_task(backfill())
+
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    await tracker.shutdown()
+    await executor.shutdown()
 
 
 @app.get("/health")
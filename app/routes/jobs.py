@@ -1,35 +1,98 @@
+import asyncio
+import json
 import uuid
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 
 from fastapi import (
     APIRouter,
+    Depends,
+    Query,
+    Request,
     UploadFile,
     File,
     Form,
     HTTPException,
 )
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from app.core.job_store import get_job_record
+from app.core import admission, aio, result_cache, results
+from app.core.admission import AdmissionRejected, memory_budget
+from app.core.completions import tracker
+from app.core.config import settings
+from app.core.events import TERMINAL_STATUSES, event_bus
+from app.core.executor import executor
+from app.core.ingest import stage_upload
+from app.core.job_store import JobStateError
+from app.core.storage import ObjectNotFound
 from app.core.job_runner import JobRunner
-from app.schemas.job import JobCreateRequest, Scenario
+from app.schemas.job import DecimationMethod, InterpolationModel, JobCreateRequest, Scenario
 
 router = APIRouter(tags=["jobs"])
 
 
-@router.post("")
-async def create_job(
-    csv_file: UploadFile = File(...),
-
+def job_request(
     # scenario
     scenario: Scenario = Form(...),
 
     # column mappings
     x_column: str = Form(...),
     y_column: str = Form(...),
-    value_column: str = Form(...),
+    # repeat value_column for several channels; the first is the primary
+    value_column: List[str] = Form(...),
+
+    # sparse-only; repeat station_spacing for several resolutions
+    station_spacing: Optional[List[str]] = Form(None),
+
+    # multi-line surveys
+    line_column: Optional[str] = Form(None),
+
+    # interpolation
+    model: InterpolationModel = Form(InterpolationModel.linear),
+) -> JobCreateRequest:
+    """
+    Job parameters from the form fields (shared by POST /jobs and the
+    completion of resumable uploads).
+    """
+    # Empty fields (e.g. a cleared input) are ignored, as for one spacing
+    try:
+        spacings = [float(s) for s in station_spacing or [] if s.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="station_spacing must be a number",
+        )
 
-    # sparse-only
-    station_spacing: Optional[float] = Form(None),
+    if scenario == Scenario.sparse and not spacings:
+        raise HTTPException(
+            status_code=400,
+            detail="station_spacing is required for sparse geometry",
+        )
+
+    try:
+        return JobCreateRequest(
+            scenario=scenario,
+            x_column=x_column,
+            y_column=y_column,
+            value_column=value_column[0],
+            value_columns=value_column,
+            station_spacing=spacings[0] if spacings else None,
+            station_spacings=spacings,
+            line_column=line_column or None,
+            model=model,
+        )
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail="; ".join(error["msg"] for error in exc.errors()),
+        )
+
+
+@router.post("", status_code=202)
+async def create_job(
+    csv_file: UploadFile = File(...),
+    request: JobCreateRequest = Depends(job_request),
 ):
     # ---- basic validation ----
     if not csv_file.filename.lower().endswith(".csv"):
@@ -38,27 +101,112 @@ async def create_job(
             detail="Only CSV files are allowed",
         )
 
-    if scenario == Scenario.sparse and station_spacing is None:
+    # ---- job id ----
+    job_id = f"gaia-{uuid.uuid4().hex}"
+
+    # ---- stage upload, then run job in the background ----
+    upload = await stage_upload(csv_file)
+
+    return await start_job(job_id, upload, request)
+
+
+async def start_job(job_id: str, upload, request: JobCreateRequest, *, force_admit: bool = False):
+    """
+    Creates the job record and queues the run, unless an identical
+    upload + parameters can reuse an earlier job. Raises 429 if the
+    memory budget and its queue are full, unless `force_admit`.
+    """
+    # ---- identical upload + parameters: reuse the earlier job ----
+    cache_key = None
+    if settings.result_cache_enabled and upload.sha256 is not None:
+        cache_key = result_cache.cache_key(upload.sha256, request)
+        cached_job_id = await aio.claim_cached_job(cache_key, job_id)
+
+        if cached_job_id != job_id:
+            upload.cleanup()
+            record = await aio.get_job_record(cached_job_id)
+            return {
+                "job_id": cached_job_id,
+                # A concurrent submission may not have written it yet
+                "status": "created" if record["status"] == "unknown" else record["status"],
+                "cached": True,
+            }
+
+    # ---- admission: estimated peak memory against the budget ----
+    memory_bytes = await executor.run_io(admission.estimate_job_bytes, upload, request)
+    try:
+        memory_budget.admit(memory_bytes, force=force_admit)
+    except AdmissionRejected as exc:
+        upload.cleanup()
+        if cache_key is not None:
+            await aio.release_cached_job(cache_key, job_id)
+        raise HTTPException(
+            status_code=429,
+            detail=str(exc),
+            headers={"Retry-After": str(int(exc.retry_after))},
+        )
+
+    runner = JobRunner(job_id)
+    try:
+        await runner.create()
+    except Exception:
+        memory_budget.withdraw(memory_bytes)
+        upload.cleanup()
+        if cache_key is not None:
+            await aio.release_cached_job(cache_key, job_id)
+        raise
+
+    executor.submit(job_id, lambda: runner.run(upload, request), memory_bytes)
+
+    return {
+        "job_id": job_id,
+        "status": "created",
+    }
+
+
+@router.post("/{job_id}/append", status_code=202)
+async def append_to_job(job_id: str, csv_file: UploadFile = File(...)):
+    """
+    Extends a completed single-traverse job with more stations, in the
+    job's column layout. Kriging jobs recompute only the tail of their
+    results; linear jobs rewrite their predictions (see append.py).
+    """
+    if not csv_file.filename.lower().endswith(".csv"):
         raise HTTPException(
             status_code=400,
-            detail="station_spacing is required for sparse geometry",
+            detail="Only CSV files are allowed",
         )
 
-    # ---- job id ----
-    job_id = f"gaia-{uuid.uuid4().hex}"
+    record = await aio.get_job_record(job_id)
+    if record["status"] == "unknown":
+        raise HTTPException(status_code=404, detail="Job not found")
 
-    # ---- request model ----
-    request = JobCreateRequest(
-        scenario=scenario,
-        x_column=x_column,
-        y_column=y_column,
-        value_column=value_column,
-        station_spacing=station_spacing,
-    )
+    try:
+        record = await aio.begin_append(job_id)
+    except JobStateError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
 
-    # ---- run job ----
     runner = JobRunner(job_id)
-    await runner.run(csv_file, request)
+    try:
+        upload = await stage_upload(csv_file)
+        state = record["append"]
+        request = JobCreateRequest(**state["request"])
+        memory_bytes = await executor.run_io(admission.estimate_job_bytes, upload, request)
+
+        # Plus the job's stations the append reads back (a windowed
+        # job's tail; linear jobs stream their results)
+        memory_bytes += admission.estimate_station_bytes(
+            state.get("stations", 0), len(request.value_columns)
+        )
+    except Exception as exc:
+        await aio.update_job_status(
+            job_id, "completed", stage="done", progress=100, message=f"Append failed: {exc}"
+        )
+        raise
+
+    # The job is already marked as appending: queued, never rejected
+    memory_budget.admit(memory_bytes, force=True)
+    executor.submit(job_id, lambda: runner.append(upload), memory_bytes)
 
     return {
         "job_id": job_id,
@@ -66,6 +214,173 @@ async def create_job(
     }
 
 
+@router.get("")
+async def list_jobs(
+    status: Optional[List[str]] = Query(None),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """
+    Jobs newest first, from the job index. Repeat `status` to match any
+    of several; pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        return await aio.list_jobs(
+            status=status,
+            created_after=created_after,
+            created_before=created_before,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/metrics")
+def job_metrics():
+    return {
+        "executor": executor.metrics(),
+        "memory": memory_budget.metrics(),
+        "inference": tracker.metrics(),
+        "result_cache": result_cache.result_cache.metrics(),
+        "event_subscribers": event_bus.subscriber_count(),
+    }
+
+
 @router.get("/{job_id}/status")
-def job_status(job_id: str):
-    return get_job_record(job_id)
+async def job_status(job_id: str):
+    return await aio.get_job_record(job_id)
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of status / progress for one job.
+    The stream ends after a terminal status.
+    """
+    # Subscribe before reading current state so no transition is missed
+    queue = event_bus.subscribe(job_id)
+
+    current = event_bus.latest(job_id)
+    if current is None:
+        current = await aio.get_job_record(job_id)
+
+    if current["status"] == "unknown":
+        event_bus.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        try:
+            yield _sse(current)
+            if current["status"] in TERMINAL_STATUSES:
+                return
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(),
+                        timeout=settings.sse_heartbeat_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield _sse(event)
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            event_bus.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get("/{job_id}/result.csv")
+async def job_result_csv(
+    job_id: str,
+    line: Optional[str] = None,
+    channel: Optional[str] = None,
+    spacing: Optional[float] = None,
+    from_: Optional[float] = Query(None, alias="from"),
+    to: Optional[float] = None,
+    max_points: Optional[int] = Query(None, ge=2),
+    method: DecimationMethod = DecimationMethod.lttb,
+):
+    batches = await _result_batches(job_id, line, channel, spacing, from_, to, max_points, method)
+    labels = (line, channel, None if spacing is None else f"{spacing:g}m")
+    filename = "-".join(
+        [job_id] + [results.key_segment(name) for name in labels if name is not None]
+    )
+
+    return StreamingResponse(
+        results.iter_csv(batches),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+    )
+
+
+@router.get("/{job_id}/result.json")
+async def job_result_json(
+    job_id: str,
+    line: Optional[str] = None,
+    channel: Optional[str] = None,
+    spacing: Optional[float] = None,
+    from_: Optional[float] = Query(None, alias="from"),
+    to: Optional[float] = None,
+    max_points: Optional[int] = Query(None, ge=2),
+    method: DecimationMethod = DecimationMethod.lttb,
+):
+    batches = await _result_batches(job_id, line, channel, spacing, from_, to, max_points, method)
+
+    return StreamingResponse(
+        results.iter_json(batches),
+        media_type="application/json",
+    )
+
+
+async def _result_batches(job_id, line, channel, spacing, d_from, d_to, max_points, method):
+    if channel is not None or spacing is not None:
+        # The primary channel / spacing is stored as the plain result
+        record = await aio.get_job_record(job_id)
+        channel = _variant(channel, record.get("channels"), "channel")
+        spacing = _variant(spacing, record.get("spacings"), "spacing")
+
+    try:
+        reader = await executor.run_io(results.open_result, job_id, line, channel, spacing)
+    except ObjectNotFound:
+        if line is None:
+            record = await aio.get_job_record(job_id)
+            if "lines" in record:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Job has several lines; choose one with ?line=",
+                )
+        raise HTTPException(status_code=404, detail="Result not available")
+
+    if max_points is not None:
+        return results.decimate_batches(reader, d_from, d_to, max_points, method.value)
+
+    return reader.batches(d_from, d_to)
+
+
+def _variant(value, choices, label):
+    if value is None:
+        return None
+
+    choices = choices or []
+    if value not in choices:
+        raise HTTPException(status_code=404, detail=f"Job has no {label} '{value}'")
+
+    return None if value == choices[0] else value
+
+
+def _sse(event) -> str:
+    return f"event: progress\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,97 @@
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+)
+
+from app.core import uploads
+from app.core.executor import executor
+from app.core.storage import ObjectNotFound, get_store
+from app.routes.jobs import job_request, start_job
+from app.schemas.job import JobCreateRequest
+
+router = APIRouter(tags=["uploads"])
+
+
+@router.post("", status_code=201)
+async def initiate_upload(
+    filename: str = Body(...),
+    size: int = Body(...),
+    sha256: Optional[str] = Body(None),
+):
+    """
+    Starts a resumable upload of a CSV of `size` bytes; parts of
+    `part_size` bytes are then PUT at their offsets. `sha256` (hex, of
+    the whole file) lets the job reuse an earlier identical one.
+    """
+    if not filename.lower().endswith(".csv"):
+        raise HTTPException(
+            status_code=400,
+            detail="Only CSV files are allowed",
+        )
+
+    return await _call(uploads.create_upload, filename, size, sha256)
+
+
+@router.get("/{upload_id}")
+async def upload_status(upload_id: str):
+    return await _call(uploads.upload_status, upload_id)
+
+
+@router.put("/{upload_id}")
+async def upload_part(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    checksum: str = Header(..., alias="X-Checksum-SHA256"),
+):
+    """
+    Stores the part starting at `offset`; sending a part again replaces
+    it. The body is the raw bytes, with their hex SHA-256 in the
+    X-Checksum-SHA256 header.
+    """
+    body = await request.body()
+    return await _call(uploads.put_part, upload_id, offset, body, checksum)
+
+
+@router.post("/{upload_id}/complete", status_code=202)
+async def complete_upload(
+    upload_id: str,
+    request: JobCreateRequest = Depends(job_request),
+):
+    """
+    Assembles the upload and starts its job, with the same parameters
+    as POST /jobs.
+    """
+    job_id, upload = await _call(uploads.complete_upload, upload_id)
+
+    # The parts are assembled already: queue rather than reject
+    response = await start_job(job_id, upload, request, force_admit=True)
+
+    if response["job_id"] != job_id:
+        # Reused an earlier job: the assembled copy is not needed
+        await executor.run_io(get_store().delete, upload.key)
+
+    return response
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def abort_upload(upload_id: str):
+    await _call(uploads.abort_upload, upload_id)
+
+
+async def _call(fn, *args):
+    try:
+        return await executor.run_io(fn, *args)
+    except ObjectNotFound:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except uploads.UploadStateError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except uploads.UploadError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
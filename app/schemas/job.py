@@ -1,5 +1,6 @@
+import math
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, root_validator
 
 
@@ -12,6 +13,24 @@ class Scenario(str, Enum):
     explicit = "explicit"
 
 
+# ============================================================
+# Interpolation model
+# ============================================================
+
+class InterpolationModel(str, Enum):
+    linear = "linear"
+    kriging = "kriging"
+
+
+# ============================================================
+# Result decimation method
+# ============================================================
+
+class DecimationMethod(str, Enum):
+    lttb = "lttb"
+    minmax = "minmax"
+
+
 # ============================================================
 # Job creation request schema
 # ============================================================
@@ -44,12 +63,32 @@ class JobCreateRequest(BaseModel):
         description="Column name for magnetic value"
     )
 
+    value_columns: List[str] = Field(
+        default_factory=list,
+        description="All value channels to interpolate (e.g. total field and gradient); the primary value_column comes first"
+    )
+
     station_spacing: Optional[float] = Field(
         None,
         gt=0,
         description="Desired output station spacing (required for sparse)"
     )
 
+    station_spacings: List[float] = Field(
+        default_factory=list,
+        description="Every output spacing to produce from the one upload and fit; station_spacing comes first"
+    )
+
+    line_column: Optional[str] = Field(
+        None,
+        description="Column naming the survey line; each line is processed as its own traverse"
+    )
+
+    model: InterpolationModel = Field(
+        InterpolationModel.linear,
+        description="Interpolation model: linear or kriging (local, windowed)"
+    )
+
     @root_validator
     def validate_scenario_rules(cls, values):
         scenario = values.get("scenario")
@@ -62,11 +101,34 @@ class JobCreateRequest(BaseModel):
                 )
 
         if scenario == Scenario.explicit:
-            if spacing is not None:
+            if spacing is not None or values.get("station_spacings"):
                 raise ValueError(
                     "station_spacing must not be provided when scenario is 'explicit'"
                 )
 
+        # Primary spacing first, no duplicates
+        spacings = []
+        for s in ([spacing] if spacing is not None else []) + list(values.get("station_spacings") or []):
+            if not (math.isfinite(s) and s > 0):
+                raise ValueError("station spacings must be positive and finite")
+            if s not in spacings:
+                spacings.append(s)
+        values["station_spacings"] = spacings
+
+        # Primary channel first, no duplicates
+        primary = values.get("value_column")
+        if primary is not None:
+            channels = [primary]
+            for name in values.get("value_columns") or []:
+                if name not in channels:
+                    channels.append(name)
+
+            coordinates = {values.get("x_column"), values.get("y_column"), values.get("line_column")}
+            if coordinates & set(channels):
+                raise ValueError("value columns must not be coordinate or line columns")
+
+            values["value_columns"] = channels
+
         return values
 
 
@@ -2,10 +2,12 @@ const csvInput = document.getElementById("csv-file");
 const scenarioSelect = document.getElementById("scenario");
 const spacingInput = document.getElementById("station-spacing");
 const spacingSection = document.getElementById("spacing-section");
+const modelSelect = document.getElementById("model");
 
 const xSelect = document.getElementById("x-column");
 const ySelect = document.getElementById("y-column");
 const valueSelect = document.getElementById("value-column");
+const lineColumnSelect = document.getElementById("line-column");
 
 const createJobBtn = document.getElementById("create-job-btn");
 const jobStatusEl = document.getElementById("job-status");
@@ -13,12 +15,16 @@ const jobStatusEl = document.getElementById("job-status");
 const resultActions = document.getElementById("result-actions");
 const downloadBtn = document.getElementById("download-btn");
 const plotBtn = document.getElementById("plot-btn");
+const lineSelect = document.getElementById("line-select");
+const channelSelect = document.getElementById("channel-select");
+const spacingSelect = document.getElementById("spacing-select");
 
 const placeholder = document.getElementById("canvas-placeholder");
 const plotContainer = document.getElementById("plot-container");
 
 let currentJobId = null;
 let pollInterval = null;
+let eventSource = null;
 
 /* =========================================================
    BACKEND BASE URL
@@ -27,6 +33,14 @@ let pollInterval = null;
 
 const API_BASE = "";
 
+// Server-side decimation target for plots
+const PLOT_MAX_POINTS = 5000;
+
+// Larger files go through the resumable upload API, in parallel parts
+const RESUMABLE_MIN_BYTES = 64 * 1024 * 1024;
+const UPLOAD_CONCURRENCY = 4;
+const UPLOAD_PART_RETRIES = 5;
+
 /* =========================================================
    CSV HEADER PARSING
 ========================================================= */
@@ -54,6 +68,14 @@ function populateDropdowns(headers) {
             select.appendChild(opt);
         });
     });
+
+    lineColumnSelect.innerHTML = "";
+    ["", ...headers].forEach(h => {
+        const opt = document.createElement("option");
+        opt.value = h;
+        opt.textContent = h || "(single traverse)";
+        lineColumnSelect.appendChild(opt);
+    });
 }
 
 /* =========================================================
@@ -89,18 +111,31 @@ createJobBtn.addEventListener("click", async () => {
         return;
     }
 
+    if (!valueSelect.selectedOptions.length) {
+        alert("Select at least one value column");
+        return;
+    }
+
+    const file = csvInput.files[0];
     const formData = new FormData();
-    formData.append("csv_file", csvInput.files[0]);
     formData.append("scenario", scenarioSelect.value);
     formData.append("x_column", xSelect.value);
     formData.append("y_column", ySelect.value);
-    formData.append("value_column", valueSelect.value);
+    // Several value channels: the first selected one is the primary
+    Array.from(valueSelect.selectedOptions).forEach(opt => {
+        formData.append("value_column", opt.value);
+    });
+    formData.append("model", modelSelect.value);
+
+    if (lineColumnSelect.value) {
+        formData.append("line_column", lineColumnSelect.value);
+    }
 
+    // Several spacings (comma-separated): the first is the primary
     if (scenarioSelect.value === "sparse") {
-        formData.append(
-            "station_spacing",
-            Number(spacingInput.value)
-        );
+        spacingInput.value.split(",").filter(s => s.trim()).forEach(s => {
+            formData.append("station_spacing", Number(s));
+        });
     }
 
     jobStatusEl.textContent = "RUNNING";
@@ -109,11 +144,21 @@ createJobBtn.addEventListener("click", async () => {
 
     let res;
     try {
-        res = await fetch(`${API_BASE}/jobs`, {
-            method: "POST",
-            body: formData
-        });
+        if (file.size >= RESUMABLE_MIN_BYTES) {
+            const uploadId = await uploadResumable(file);
+            res = await fetch(`${API_BASE}/uploads/${uploadId}/complete`, {
+                method: "POST",
+                body: formData
+            });
+        } else {
+            formData.append("csv_file", file);
+            res = await fetch(`${API_BASE}/jobs`, {
+                method: "POST",
+                body: formData
+            });
+        }
     } catch (err) {
+        console.error(err);
         alert("Backend unreachable");
         return;
     }
@@ -127,35 +172,207 @@ createJobBtn.addEventListener("click", async () => {
 
     const data = await res.json();
     currentJobId = data.job_id;
-    startPolling();
+    subscribeToJob();
 });
 
 /* =========================================================
-   POLLING
+   RESUMABLE UPLOAD
+   (parts in parallel, each retried on its own)
 ========================================================= */
 
-function startPolling() {
-    stopPolling();
-    pollInterval = setInterval(async () => {
-        const res = await fetch(`${API_BASE}/jobs/${currentJobId}/status`);
-        if (!res.ok) return;
+async function uploadResumable(file) {
+    let res = await fetch(`${API_BASE}/uploads`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ filename: file.name, size: file.size })
+    });
+    if (!res.ok) throw new Error(await res.text());
 
-        const data = await res.json();
-        jobStatusEl.textContent = data.status.toUpperCase();
+    const session = await res.json();
+    const offsets = [];
+    for (let offset = 0; offset < file.size; offset += session.part_size) {
+        offsets.push(offset);
+    }
 
-        if (data.status === "completed") {
-            stopPolling();
-            resultActions.classList.remove("hidden");
+    let done = 0;
+    async function worker() {
+        while (offsets.length) {
+            const offset = offsets.shift();
+            await uploadPart(session, file, offset);
+            done += 1;
+            jobStatusEl.textContent = `UPLOADING ${Math.floor(100 * done / session.parts)}%`;
         }
+    }
+
+    await Promise.all(Array.from({ length: UPLOAD_CONCURRENCY }, worker));
+    return session.upload_id;
+}
 
-        if (data.status === "failed") {
-            stopPolling();
-            alert("Job failed");
+async function uploadPart(session, file, offset) {
+    const body = await file.slice(offset, offset + session.part_size).arrayBuffer();
+    const digest = await crypto.subtle.digest("SHA-256", body);
+    const checksum = Array.from(new Uint8Array(digest))
+        .map(b => b.toString(16).padStart(2, "0"))
+        .join("");
+
+    for (let attempt = 1; ; attempt++) {
+        let res = null;
+        try {
+            res = await fetch(
+                `${API_BASE}/uploads/${session.upload_id}?offset=${offset}`,
+                { method: "PUT", headers: { "X-Checksum-SHA256": checksum }, body }
+            );
+        } catch (err) {
+            // Dropped connection: send the part again
+            if (attempt >= UPLOAD_PART_RETRIES) throw err;
         }
+
+        if (res) {
+            if (res.ok) return;
+            if (res.status < 500 || attempt >= UPLOAD_PART_RETRIES) {
+                throw new Error(await res.text());
+            }
+        }
+        await new Promise(r => setTimeout(r, 500 * 2 ** attempt));
+    }
+}
+
+/* =========================================================
+   JOB PROGRESS (Server-Sent Events)
+========================================================= */
+
+function subscribeToJob() {
+    stopUpdates();
+
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+
+    eventSource = new EventSource(`${API_BASE}/jobs/${currentJobId}/events`);
+
+    eventSource.addEventListener("progress", e => {
+        handleJobUpdate(JSON.parse(e.data));
+    });
+
+    // Stream dropped (proxy timeout, API restart): fall back to polling
+    eventSource.onerror = () => {
+        stopUpdates();
+        startPolling();
+    };
+}
+
+function handleJobUpdate(data) {
+    let label = data.status.toUpperCase();
+    if (data.status === "running" && data.progress != null) {
+        label += ` ${data.progress}%`;
+    }
+    jobStatusEl.textContent = label;
+
+    if (data.status === "completed") {
+        stopUpdates();
+        populateLines(data.lines);
+        populateChannels(data.channels);
+        populateSpacings(data.spacings);
+        resultActions.classList.remove("hidden");
+    }
+
+    if (data.status === "failed") {
+        stopUpdates();
+        alert(data.message ? `Job failed: ${data.message}` : "Job failed");
+    }
+}
+
+// Multi-line jobs: results are per line
+function populateLines(lines) {
+    lineSelect.innerHTML = "";
+
+    const names = Object.keys(lines || {}).filter(
+        name => lines[name].status === "completed"
+    );
+
+    names.forEach(name => {
+        const opt = document.createElement("option");
+        opt.value = name;
+        opt.textContent = name;
+        lineSelect.appendChild(opt);
+    });
+
+    lineSelect.classList.toggle("hidden", names.length === 0);
+}
+
+// Multi-channel jobs: one result per value channel
+function populateChannels(channels) {
+    channelSelect.innerHTML = "";
+
+    const names = channels && channels.length > 1 ? channels : [];
+
+    names.forEach(name => {
+        const opt = document.createElement("option");
+        opt.value = name;
+        opt.textContent = name;
+        channelSelect.appendChild(opt);
+    });
+
+    channelSelect.classList.toggle("hidden", names.length === 0);
+}
+
+// Multi-resolution jobs: one result per station spacing
+function populateSpacings(spacings) {
+    spacingSelect.innerHTML = "";
+
+    const values = spacings && spacings.length > 1 ? spacings : [];
+
+    values.forEach(value => {
+        const opt = document.createElement("option");
+        opt.value = value;
+        opt.textContent = `${value} m`;
+        spacingSelect.appendChild(opt);
+    });
+
+    spacingSelect.classList.toggle("hidden", values.length === 0);
+}
+
+function resultParams(params = new URLSearchParams()) {
+    if (!lineSelect.classList.contains("hidden")) {
+        params.set("line", lineSelect.value);
+    }
+    if (!channelSelect.classList.contains("hidden")) {
+        params.set("channel", channelSelect.value);
+    }
+    if (!spacingSelect.classList.contains("hidden")) {
+        params.set("spacing", spacingSelect.value);
+    }
+    return params;
+}
+
+[lineSelect, channelSelect, spacingSelect].forEach(select => {
+    select.addEventListener("change", () => {
+        if (!plotContainer.classList.contains("hidden")) {
+            plotBtn.onclick();
+        }
+    });
+});
+
+/* =========================================================
+   POLLING (fallback)
+========================================================= */
+
+function startPolling() {
+    pollInterval = setInterval(async () => {
+        const res = await fetch(`${API_BASE}/jobs/${currentJobId}/status`);
+        if (!res.ok) return;
+
+        handleJobUpdate(await res.json());
     }, 2000);
 }
 
-function stopPolling() {
+function stopUpdates() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+
     if (pollInterval) {
         clearInterval(pollInterval);
         pollInterval = null;
@@ -167,7 +384,7 @@ function stopPolling() {
 ========================================================= */
 
 downloadBtn.onclick = () => {
-    window.location.href = `${API_BASE}/jobs/${currentJobId}/result.csv`;
+    window.location.href = `${API_BASE}/jobs/${currentJobId}/result.csv?${resultParams()}`;
 };
 
 /* =========================================================
@@ -175,21 +392,62 @@ downloadBtn.onclick = () => {
 ========================================================= */
 
 plotBtn.onclick = async () => {
-    const res = await fetch(`${API_BASE}/jobs/${currentJobId}/result.json`);
-    if (!res.ok) {
+    const rows = await fetchPlotRows();
+    if (!rows) {
         alert("Plot data not available");
         return;
     }
 
-    const rows = await res.json();
+    placeholder.classList.add("hidden");
+    plotContainer.classList.remove("hidden");
+
+    Plotly.newPlot(plotContainer, plotTraces(rows), {
+        paper_bgcolor: "#0e1117",
+        plot_bgcolor: "#0e1117",
+        font: { color: "#e5e7eb" },
+        xaxis: { title: "Distance along traverse" },
+        yaxis: { title: "Magnetic value" }
+    });
+
+    // Re-fetch the visible window at full detail (still decimated) on zoom
+    plotContainer.removeAllListeners("plotly_relayout");
+    plotContainer.on("plotly_relayout", async e => {
+        let range = null;
+        if (e["xaxis.range[0]"] !== undefined) {
+            range = [e["xaxis.range[0]"], e["xaxis.range[1]"]];
+        } else if (!e["xaxis.autorange"]) {
+            return;
+        }
+
+        const windowRows = await fetchPlotRows(range);
+        if (!windowRows) return;
+
+        const traces = plotTraces(windowRows);
+        Plotly.restyle(plotContainer, {
+            x: traces.map(t => t.x),
+            y: traces.map(t => t.y)
+        });
+    });
+};
+
+async function fetchPlotRows(range) {
+    const params = resultParams(new URLSearchParams({ max_points: PLOT_MAX_POINTS }));
+    if (range) {
+        params.set("from", range[0]);
+        params.set("to", range[1]);
+    }
+
+    const res = await fetch(`${API_BASE}/jobs/${currentJobId}/result.json?${params}`);
+    if (!res.ok) return null;
+
+    return res.json();
+}
 
+function plotTraces(rows) {
     const measured = rows.filter(r => r.source === "measured");
     const predicted = rows.filter(r => r.source === "predicted");
 
-    placeholder.classList.add("hidden");
-    plotContainer.classList.remove("hidden");
-
-    Plotly.newPlot(plotContainer, [
+    return [
         {
             x: measured.map(r => r.distance_along),
             y: measured.map(r => r.magnetic_value),
@@ -202,14 +460,8 @@ plotBtn.onclick = async () => {
             mode: "markers",
             name: "Predicted"
         }
-    ], {
-        paper_bgcolor: "#0e1117",
-        plot_bgcolor: "#0e1117",
-        font: { color: "#e5e7eb" },
-        xaxis: { title: "Distance along traverse" },
-        yaxis: { title: "Magnetic value" }
-    });
-};
+    ];
+}
 
 function clearPlot() {
     Plotly.purge(plotContainer);
@@ -0,0 +1,32 @@
+"""
+GAIA magnetic interpolation model.
+
+Shared by the SageMaker container (inference.py) and the API's local
+inference backend, so both produce identical predictions.
+"""
+
+from gaia_model.kriging import LocalKriging
+from gaia_model.model import (
+    DISTANCE_COL,
+    IS_MEASURED_COL,
+    MODELS,
+    LinearModel,
+    MultiOutputModel,
+    build_model,
+    fit_predict,
+    value_column,
+    value_columns,
+)
+
+__all__ = [
+    "DISTANCE_COL",
+    "IS_MEASURED_COL",
+    "MODELS",
+    "LinearModel",
+    "LocalKriging",
+    "MultiOutputModel",
+    "build_model",
+    "fit_predict",
+    "value_column",
+    "value_columns",
+]
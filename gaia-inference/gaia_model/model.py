@@ -0,0 +1,149 @@
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from gaia_model.kriging import LocalKriging
+
+
+DISTANCE_COL = "distance_along"
+IS_MEASURED_COL = "is_measured"
+
+
+# --------------------------------------------------
+# Column helpers
+# --------------------------------------------------
+def value_columns(columns):
+    """
+    Infers the target columns: every column that is neither the distance
+    nor the measured flag, in file order.
+    """
+    value_cols = [
+        c for c in columns
+        if c not in (DISTANCE_COL, IS_MEASURED_COL)
+    ]
+
+    if not value_cols:
+        raise RuntimeError("No value column in train data")
+
+    return value_cols
+
+
+def value_column(columns):
+    """
+    Infers the single target column.
+    """
+    value_cols = value_columns(columns)
+
+    if len(value_cols) != 1:
+        raise RuntimeError(
+            f"Expected exactly one value column in train data, found {value_cols}"
+        )
+
+    return value_cols[0]
+
+
+# --------------------------------------------------
+# Model
+# --------------------------------------------------
+class LinearModel:
+    """
+    Global straight-line fit of magnetic value against distance along
+    the traverse. Accepts (n,) or (n, channels) targets.
+    """
+
+    def __init__(self):
+        self._model = LinearRegression()
+
+    def fit(self, distance, values):
+        distance = np.asarray(distance, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+
+        if distance.shape[0] == 0:
+            raise RuntimeError("No training rows")
+
+        self._model.fit(distance.reshape(-1, 1), values)
+        return self
+
+    def predict(self, distance):
+        distance = np.asarray(distance, dtype=np.float64)
+
+        if distance.shape[0] == 0:
+            return np.empty(0)
+
+        return self._model.predict(distance.reshape(-1, 1))
+
+    def frozen_params(self):
+        """
+        Parameters that reproduce this fit's local behaviour on a subset
+        of the data; a global line has none (every point depends on all
+        train stations).
+        """
+        return {}
+
+
+MODELS = {
+    "linear": LinearModel,
+    "kriging": LocalKriging,
+}
+
+
+def build_model(name="linear", **params):
+    if name not in MODELS:
+        raise RuntimeError(f"Unknown model '{name}', expected one of {sorted(MODELS)}")
+
+    return MODELS[name](**params)
+
+
+class MultiOutputModel:
+    """
+    Fits several value channels that share one distance axis.
+
+    Channels measured at the same stations (same NaN pattern) are fitted
+    together as one multi-output model, so each predict point is solved
+    once for all of them; NaN targets are left out of the fit of their
+    channel only.
+    """
+
+    def __init__(self, name="linear", **params):
+        self.name = name
+        self.params = params
+
+    def fit(self, distance, values):
+        distance = np.asarray(distance, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+
+        self._channels = values.shape[1]
+        self._groups = []
+
+        # Channels grouped by which rows they are measured on
+        groups = {}
+        for j in range(self._channels):
+            rows = ~np.isnan(values[:, j])
+            groups.setdefault(rows.tobytes(), (rows, []))[1].append(j)
+
+        for rows, cols in groups.values():
+            fitted = build_model(self.name, **self.params).fit(distance[rows], values[rows][:, cols])
+            self._groups.append((cols, fitted))
+
+        return self
+
+    def predict(self, distance):
+        distance = np.asarray(distance, dtype=np.float64)
+        out = np.empty((distance.shape[0], self._channels))
+
+        for cols, fitted in self._groups:
+            out[:, cols] = np.asarray(fitted.predict(distance)).reshape(distance.shape[0], len(cols))
+
+        return out
+
+
+def fit_predict(train_distance, train_values, predict_distance, model="linear", **params):
+    """
+    (n,) targets give (m,) predictions; (n, channels) targets give
+    (m, channels).
+    """
+    if np.ndim(train_values) == 2:
+        return MultiOutputModel(model, **params).fit(train_distance, train_values).predict(predict_distance)
+
+    return build_model(model, **params).fit(train_distance, train_values).predict(predict_distance)
@@ -1,6 +1,10 @@
 import os
+import time
+
 import pandas as pd
-from sklearn.linear_model import LinearRegression
+import pyarrow.parquet as pq
+
+from gaia_model import DISTANCE_COL, MultiOutputModel, build_model, value_columns
 
 
 # --------------------------------------------------
@@ -8,13 +12,114 @@ from sklearn.linear_model import LinearRegression
 # --------------------------------------------------
 BASE_INPUT = "/opt/ml/input/data"
 
-TRAIN_PATH = os.path.join(BASE_INPUT, "train", "train.csv")
-PREDICT_PATH = os.path.join(BASE_INPUT, "predict", "predict.csv")
+TRAIN_DIR = os.path.join(BASE_INPUT, "train")
+PREDICT_DIR = os.path.join(BASE_INPUT, "predict")
+
+# Artifacts may be Parquet (preferred) or CSV
+ARTIFACT_EXTENSIONS = (".parquet", ".csv")
+
+# Interpolation model: "linear" or "kriging" (set on the transform job)
+MODEL_NAME = os.environ.get("GAIA_MODEL", "linear")
+
+# Streaming mode: predict in chunks of this many rows ("0" disables)
+CHUNK_ROWS = int(os.environ.get("GAIA_CHUNK_ROWS", "100000"))
 
 OUTPUT_DIR = "/opt/ml/output"
 OUTPUT_PATH = os.path.join(OUTPUT_DIR, "predictions.csv")
 
 
+# --------------------------------------------------
+# Artifact IO
+# --------------------------------------------------
+def find_artifact(directory, stem):
+    for ext in ARTIFACT_EXTENSIONS:
+        path = os.path.join(directory, stem + ext)
+        if os.path.exists(path):
+            return path
+
+    raise RuntimeError(f"Missing {stem} artifact in {directory}")
+
+
+def read_artifact(path, columns=None):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_artifact_chunks(path, columns, chunk_rows):
+    """
+    Yields DataFrames of at most `chunk_rows` rows; only one chunk is
+    held in memory at a time.
+    """
+    if path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+
+
+def count_rows(path, column):
+    """
+    Rows in the artifact (at most 1 for CSV: only emptiness is checked).
+    Raises RuntimeError if `column` is missing.
+    """
+    if path.endswith(".parquet"):
+        parquet = pq.ParquetFile(path)
+        if column not in parquet.schema_arrow.names:
+            raise RuntimeError(f"{path} missing {column} column")
+        return parquet.metadata.num_rows
+
+    try:
+        return len(pd.read_csv(path, usecols=[column], nrows=1))
+    except ValueError:
+        raise RuntimeError(f"{path} missing {column} column")
+
+
+# --------------------------------------------------
+# Prediction
+# --------------------------------------------------
+def predict_frame(model, predict_df, value_cols):
+    """
+    One channel -> `predicted_value`; several -> one column per channel.
+    """
+    predictions = model.predict(predict_df[DISTANCE_COL].to_numpy())
+    frame = {"distance_along": predict_df[DISTANCE_COL]}
+
+    if len(value_cols) == 1:
+        frame["predicted_value"] = predictions
+    else:
+        for j, name in enumerate(value_cols):
+            frame[name] = predictions[:, j]
+
+    return pd.DataFrame(frame)
+
+
+def predict_streaming(model, predict_path, output_path, chunk_rows, value_cols):
+    """
+    Predicts chunk by chunk, appending to `output_path`.
+    Returns the number of rows written.
+    """
+    rows = 0
+    start = time.perf_counter()
+
+    with open(output_path, "w", newline="") as out:
+        for i, chunk in enumerate(iter_artifact_chunks(predict_path, [DISTANCE_COL], chunk_rows)):
+            predict_frame(model, chunk, value_cols).to_csv(out, header=(i == 0), index=False)
+
+            rows += len(chunk)
+            report_throughput(f"chunk {i + 1}", rows, time.perf_counter() - start)
+
+    return rows
+
+
+def report_throughput(label, rows, seconds):
+    # stdout goes to CloudWatch
+    rate = rows / seconds if seconds > 0 else float("inf")
+    print(f"[gaia] {label}: {rows} rows in {seconds:.2f}s ({rate:.0f} rows/sec)", flush=True)
+
+
 # --------------------------------------------------
 # Entry point
 # --------------------------------------------------
@@ -22,20 +127,13 @@ def main():
     # ----------------------------
     # Load inputs
     # ----------------------------
-    if not os.path.exists(TRAIN_PATH):
-        raise RuntimeError(f"Missing train.csv at {TRAIN_PATH}")
-
-    if not os.path.exists(PREDICT_PATH):
-        raise RuntimeError(f"Missing predict.csv at {PREDICT_PATH}")
+    train_path = find_artifact(TRAIN_DIR, "train")
+    predict_path = find_artifact(PREDICT_DIR, "predict")
 
-    train_df = pd.read_csv(TRAIN_PATH)
-    predict_df = pd.read_csv(PREDICT_PATH)
+    train_df = read_artifact(train_path)
 
     if train_df.empty:
-        raise RuntimeError("train.csv is empty")
-
-    if predict_df.empty:
-        raise RuntimeError("predict.csv is empty")
+        raise RuntimeError(f"{train_path} is empty")
 
     # ----------------------------
     # Validate required columns
@@ -43,49 +141,42 @@ def main():
     if "distance_along" not in train_df.columns:
         raise RuntimeError("train.csv missing distance_along column")
 
-    if "distance_along" not in predict_df.columns:
-        raise RuntimeError("predict.csv missing distance_along column")
-
-    # Infer target column from train.csv
-    value_cols = [
-        c for c in train_df.columns
-        if c not in ("distance_along", "is_measured")
-    ]
+    # Checked before writing any output: an empty predictions.csv
+    # must not be left behind for the job to pick up
+    if not count_rows(predict_path, DISTANCE_COL):
+        raise RuntimeError(f"{predict_path} is empty")
 
-    if len(value_cols) != 1:
-        raise RuntimeError(
-            f"Expected exactly one value column in train.csv, found {value_cols}"
-        )
-
-    value_col = value_cols[0]
+    # Infer target column(s) from train.csv
+    value_cols = value_columns(train_df.columns)
 
     # ----------------------------
-    # Fit job-local model
+    # Fit job-local model (once)
     # ----------------------------
-    X_train = train_df[["distance_along"]]
-    y_train = train_df[value_col]
+    # Several channels are fitted and predicted together in one pass
+    if len(value_cols) == 1:
+        model = build_model(MODEL_NAME)
+        targets = train_df[value_cols[0]].to_numpy()
+    else:
+        model = MultiOutputModel(MODEL_NAME)
+        targets = train_df[value_cols].to_numpy(dtype="float64")
 
-    model = LinearRegression()
-    model.fit(X_train, y_train)
+    model.fit(train_df[DISTANCE_COL].to_numpy(), targets)
+    del train_df
 
     # ----------------------------
     # Predict on unmeasured points
     # ----------------------------
-    X_pred = predict_df[["distance_along"]]
-    predictions = model.predict(X_pred)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    start = time.perf_counter()
 
-    output_df = pd.DataFrame(
-        {
-            "distance_along": predict_df["distance_along"],
-            "predicted_value": predictions,
-        }
-    )
+    if CHUNK_ROWS > 0:
+        rows = predict_streaming(model, predict_path, OUTPUT_PATH, CHUNK_ROWS, value_cols)
+    else:
+        predict_df = read_artifact(predict_path, columns=[DISTANCE_COL])
+        rows = len(predict_df)
+        predict_frame(model, predict_df, value_cols).to_csv(OUTPUT_PATH, index=False)
 
-    # ----------------------------
-    # Write predictions
-    # ----------------------------
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    output_df.to_csv(OUTPUT_PATH, index=False)
+    report_throughput("total", rows, time.perf_counter() - start)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+# scripts/bench_inference.py
+
+"""
+Benchmark of batched realtime inference against the fake endpoint, for
+every payload format. Run from the repository root:
+
+    PYTHONPATH=. python scripts/bench_inference.py --train 20000 --predict 2000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.core import payloads
+from app.core.fake_endpoint import FakeSageMakerRuntime
+from app.core.inference import predict_values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched inference against the fake endpoint")
+    parser.add_argument("--train", type=int, default=10000)
+    parser.add_argument("--predict", type=int, default=1000000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    train_d = np.sort(rng.uniform(0, 1e5, args.train))
+    train_v = 0.01 * train_d + rng.normal(0, 1, args.train)
+    predict_d = np.sort(rng.uniform(0, 1e5, args.predict))
+
+    for fmt in payloads.ENCODINGS:
+        runtime = FakeSageMakerRuntime(latency_ms=args.latency_ms)
+        start = time.perf_counter()
+        predict_values(
+            train_d, train_v, predict_d,
+            payload_format=fmt,
+            concurrency=args.concurrency,
+            runtime=runtime,
+        )
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"{fmt:32s} {elapsed:8.2f}s  {runtime.invocations:5d} calls  "
+            f"{runtime.bytes_in / 1e6:9.1f} MB sent  "
+            f"{args.predict / elapsed:12.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
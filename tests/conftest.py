@@ -0,0 +1,96 @@
+# tests/conftest.py
+
+"""
+Shared fixtures. Every test session runs against a local object store,
+in-memory job records and the fake SageMaker runtime, all under a
+temporary directory; settings are read at import, so the environment is
+set before any app module is imported.
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import pytest
+
+_ROOT = tempfile.mkdtemp(prefix="gaia-tests-")
+
+os.environ.update({
+    "GAIA_STORAGE_BACKEND": "local",
+    "GAIA_LOCAL_STORAGE_DIR": os.path.join(_ROOT, "store"),
+    "GAIA_JOB_STORE_BACKEND": "memory",
+    "GAIA_JOB_INDEX_SQLITE_PATH": os.path.join(_ROOT, "job-index.sqlite3"),
+    "GAIA_STAGING_DIR": os.path.join(_ROOT, "staging"),
+    "GAIA_RESULT_CACHE_ENABLED": "false",
+    "GAIA_SAGEMAKER_RUNTIME_BACKEND": "fake",
+    "GAIA_INFERENCE_BACKEND": "local",
+    "GAIA_ASYNC_POLL_INITIAL_SECONDS": "0.05",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    # One app lifespan: shutdown closes the executor's pools for good
+    with TestClient(app) as c:
+        yield c
+
+
+def survey_csv(path, n: int, start: int = 0, seed: int = 0) -> str:
+    """
+    Writes rows [start, start + n) of a straight survey line with
+    irregular station gaps and two value channels.
+    """
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(5.0, 40.0, start + n))[start:]
+    values = 30000.0 + 50.0 * np.sin(x / 300.0)
+    grad = np.cos(x / 300.0)
+
+    with open(path, "w") as f:
+        f.write("x,y,values,grad\n")
+        for row in zip(x.tolist(), values.tolist(), grad.tolist()):
+            f.write(f"{row[0]!r},0.0,{row[1]!r},{row[2]!r}\n")
+
+    return str(path)
+
+
+def submit(client, path, **form):
+    data = {
+        "scenario": "sparse",
+        "x_column": "x",
+        "y_column": "y",
+        "value_column": "values",
+        "station_spacing": "10",
+    }
+    data.update(form)
+
+    with open(path, "rb") as f:
+        return client.post("/jobs", files={"csv_file": ("survey.csv", f, "text/csv")}, data=data)
+
+
+def wait(client, job_id: str, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(f"/jobs/{job_id}/status").json()
+        if status["status"] in ("completed", "failed") or time.monotonic() > deadline:
+            return status
+        time.sleep(0.05)
+
+
+def result_rows(client, job_id: str, **params):
+    """
+    (distance_along, magnetic_value, is_measured) arrays of a result.
+    """
+    response = client.get(f"/jobs/{job_id}/result.csv", params=params)
+    assert response.status_code == 200, response.text
+
+    rows = [line.split(",") for line in response.text.splitlines()[1:]]
+    return (
+        np.array([float(row[0]) for row in rows]),
+        np.array([float(row[1]) for row in rows]),
+        np.array([row[2] == "measured" for row in rows]),
+    )
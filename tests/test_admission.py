@@ -0,0 +1,86 @@
+# tests/test_admission.py
+
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionRejected, MemoryBudget, memory_budget
+from app.core.executor import JobExecutor
+
+from conftest import submit, survey_csv
+
+
+def test_admit_rejects_beyond_the_queue_allowance():
+    budget = MemoryBudget(100, queue_bytes=50)
+    budget.admit(100)
+    budget.admit(50)
+
+    with pytest.raises(AdmissionRejected):
+        budget.admit(1)
+
+    # Forced admissions queue regardless; oversized jobs are capped
+    budget.admit(500, force=True)
+    assert budget.waiting == 250
+    assert budget.metrics()["rejected"] == 1
+
+
+def test_reserve_is_fifo():
+    async def run():
+        budget = MemoryBudget(100)
+        for job_bytes in (80, 60, 10):
+            budget.admit(job_bytes)
+
+        order = []
+
+        async def job(name, job_bytes):
+            await budget.reserve(job_bytes)
+            order.append(name)
+
+        await budget.reserve(80)
+        tasks = [asyncio.create_task(job("big", 60)), asyncio.create_task(job("small", 10))]
+        await asyncio.sleep(0)
+
+        # The small job fits now but waits behind the big one
+        assert order == [] and budget.metrics()["waiting_jobs"] == 2
+
+        budget.release(80)
+        await asyncio.gather(*tasks)
+        assert order == ["big", "small"]
+        assert budget.in_use == 70 and budget.waiting == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_settles_budget_and_queue_depth():
+    async def run():
+        executor = JobExecutor(max_concurrent_jobs=1, memory=MemoryBudget(100))
+        gate = asyncio.Event()
+
+        executor.memory.admit(80)
+        executor.submit("running", gate.wait, 80)
+        executor.memory.admit(80, force=True)
+        waiting = executor.submit("waiting", gate.wait, 80)
+        await asyncio.sleep(0.01)
+        assert executor.metrics()["queue_depth"] == 1
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert executor.metrics()["queue_depth"] == 0
+        assert executor.memory.waiting == 0
+
+        gate.set()
+        await asyncio.sleep(0.01)
+        assert executor.memory.in_use == 0
+
+    asyncio.run(run())
+
+
+def test_post_returns_429_when_the_budget_is_full(client, tmp_path, monkeypatch):
+    path = survey_csv(tmp_path / "survey.csv", 50)
+    monkeypatch.setattr(memory_budget, "queue_bytes", 0)
+    monkeypatch.setattr(memory_budget, "in_use", memory_budget.budget_bytes)
+
+    response = submit(client, path)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
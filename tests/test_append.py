@@ -0,0 +1,157 @@
+# tests/test_append.py
+
+import numpy as np
+import pytest
+from gaia_model import LinearModel
+
+from app.core import append, job_store
+from app.core.config import settings
+from app.core.local_inference import neighbours, predict_local
+from app.core.traverse import Traverse
+
+from conftest import result_rows, submit, survey_csv, wait
+
+
+def _traverse(d: np.ndarray, value: np.ndarray) -> Traverse:
+    return Traverse.from_arrays(
+        d, np.zeros_like(d), value, d_along=d, is_measured=~np.isnan(value)
+    )
+
+
+def _append(client, job_id: str, path) -> dict:
+    with open(path, "rb") as f:
+        response = client.post(f"/jobs/{job_id}/append", files={"csv_file": ("more.csv", f, "text/csv")})
+    assert response.status_code == 202, response.text
+    return wait(client, job_id)
+
+
+def _assert_same_results(client, job_id: str, full_id: str, channels, atol: float):
+    for channel in channels:
+        d, v, m = result_rows(client, job_id, channel=channel)
+        full_d, full_v, full_m = result_rows(client, full_id, channel=channel)
+
+        np.testing.assert_array_equal(d, full_d)
+        np.testing.assert_array_equal(m, full_m)
+        np.testing.assert_allclose(v, full_v, rtol=0, atol=atol)
+
+
+def test_tail_window_needs_more_than_2k_plus_1_stations():
+    k = neighbours("kriging")
+    d = np.arange(2 * k + 1, dtype=float)
+
+    # Too short: the whole traverse is the tail; linear has no window
+    assert append.tail_window(_traverse(d, np.sin(d)), "kriging") == (0.0, 0.0)
+    assert append.tail_window(_traverse(d, np.sin(d)), "linear") == (None, None)
+
+    d = np.arange(2 * k + 5, dtype=float)
+    assert append.tail_window(_traverse(d, np.sin(d)), "kriging") == (d[-(2 * k + 1)], d[-k])
+
+
+def test_windowed_append_matches_full_refit():
+    rng = np.random.default_rng(1)
+    train_d = np.cumsum(rng.uniform(5.0, 40.0, 200))
+    train_v = 30000.0 + 50.0 * np.sin(train_d / 300.0)
+    old, new = train_d[:150], train_d[150:]
+
+    params = append.model_params(_traverse(old, train_v[:150]), "kriging")
+    train_from, predict_from = append.tail_window(_traverse(old, train_v[:150]), "kriging")
+
+    predict_d = np.sort(rng.uniform(train_d[0], train_d[-1], 300))
+    full = predict_local(train_d, train_v, predict_d, "kriging", params["value"])
+
+    train = append.from_distance(_traverse(train_d, train_v), train_from)
+    predict = append.from_distance(_traverse(predict_d, np.full(300, np.nan)), predict_from)
+    windowed = append.predict_window(train, predict, "kriging", params)
+
+    assert new[0] > predict_from
+    np.testing.assert_allclose(windowed[:, 0], full[predict_d >= predict_from], rtol=0, atol=1e-6)
+
+
+def test_linear_sums_refit_the_full_line():
+    rng = np.random.default_rng(2)
+    d = np.cumsum(rng.uniform(5.0, 40.0, 300))
+    v = 30000.0 + 0.01 * d + rng.normal(0.0, 5.0, 300)
+    v[::7] = np.nan
+
+    sums = append.linear_sums(_traverse(d[:200], v[:200]))
+    sums = append.linear_sums(_traverse(d[200:], v[200:]), sums)
+    intercept, slope = append.linear_coefficients(sums["value"])
+
+    measured = ~np.isnan(v)
+    fitted = LinearModel().fit(d[measured], v[measured])
+    np.testing.assert_allclose(intercept + slope * d, fitted.predict(d), rtol=0, atol=1e-8)
+
+    # One station (or one distance): a flat line through its value
+    assert append.linear_coefficients(append.linear_sums(_traverse(d[1:2], v[1:2]))["value"]) == (v[1], 0.0)
+
+
+def test_linear_append_equals_full_job(client, tmp_path):
+    first = survey_csv(tmp_path / "first.csv", 150)
+    more = survey_csv(tmp_path / "more.csv", 100, start=150)
+    whole = survey_csv(tmp_path / "whole.csv", 250)
+
+    job_id = submit(client, first, value_column=["values", "grad"], station_spacing=["10", "25"]).json()["job_id"]
+    assert wait(client, job_id)["status"] == "completed"
+
+    # No window for a global model: the running sums of its fit instead
+    state = job_store.get_job_record(job_id)["append"]
+    assert "tail" not in state and set(state["sums"]) == {"values", "grad"}
+
+    status = _append(client, job_id, more)
+    assert status["status"] == "completed" and status.get("message") is None
+
+    full_id = submit(client, whole, value_column=["values", "grad"], station_spacing=["10", "25"]).json()["job_id"]
+    wait(client, full_id)
+
+    _assert_same_results(client, job_id, full_id, ("values", "grad"), atol=1e-9)
+
+    spacing = {"channel": "grad", "spacing": 25}
+    np.testing.assert_allclose(
+        result_rows(client, job_id, **spacing)[1], result_rows(client, full_id, **spacing)[1], rtol=0, atol=1e-9
+    )
+
+
+@pytest.mark.parametrize("backend", ["local", "async"])
+def test_kriging_window_is_set_up_at_completion(client, tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(settings, "inference_backend", backend)
+    monkeypatch.setattr(settings, "sagemaker_endpoint_model", "kriging")
+
+    parts = [
+        survey_csv(tmp_path / "first.csv", 150),
+        survey_csv(tmp_path / "second.csv", 60, start=150),
+        survey_csv(tmp_path / "third.csv", 60, start=210),
+    ]
+
+    job_id = submit(client, parts[0], model="kriging").json()["job_id"]
+    status = wait(client, job_id)
+    assert status["status"] == "completed" and status["inference"]["backend"] == backend
+
+    state = job_store.get_job_record(job_id)["append"]
+    assert "tail" in state and state["predict_from"] > 0 and state["offsets"]
+
+    _append(client, job_id, parts[1])
+    status = _append(client, job_id, parts[2])
+    assert status["status"] == "completed" and status["appends"] == 2
+
+    # Equal to a full refit with the frozen parameters
+    d, v, m = result_rows(client, job_id)
+    expected = predict_local(d[m], v[m], d[~m], "kriging", state["params"]["values"])
+    np.testing.assert_allclose(v[~m], expected, rtol=0, atol=1e-6)
+
+
+def test_short_kriging_append_equals_full_job(client, tmp_path):
+    first = survey_csv(tmp_path / "first.csv", 12)
+    more = survey_csv(tmp_path / "more.csv", 8, start=12)
+    whole = survey_csv(tmp_path / "whole.csv", 20)
+
+    job_id = submit(client, first, model="kriging").json()["job_id"]
+    wait(client, job_id)
+    assert job_store.get_job_record(job_id)["append"]["predict_from"] == 0.0
+
+    # The tail is the whole job: it is fitted again, as a new job would be
+    _append(client, job_id, more)
+
+    full_id = submit(client, whole, model="kriging").json()["job_id"]
+    wait(client, full_id)
+
+    _assert_same_results(client, job_id, full_id, ("values",), atol=1e-9)
@@ -0,0 +1,103 @@
+# tests/test_completions.py
+
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from app.core import completions, sagemaker_client
+from app.core.completions import CompletionTracker
+from app.core.executor import JobExecutor
+from app.core.storage import get_store, key_from_uri, object_uri
+
+
+class _StubRuntime:
+    """
+    Answers async invocations with fresh output / failure locations in
+    the local store; the test writes one of them, as the endpoint would.
+    """
+
+    def invoke_endpoint_async(self, EndpointName, InputLocation, ContentType=None, InferenceId=None, **kwargs):
+        name = uuid.uuid4().hex
+        return {
+            "InferenceId": InferenceId,
+            "OutputLocation": object_uri(f"sagemaker-async/output/{name}.out"),
+            "FailureLocation": object_uri(f"sagemaker-async/failure/{name}-error.out"),
+        }
+
+
+@pytest.fixture
+def invoke(monkeypatch):
+    monkeypatch.setattr(sagemaker_client, "get_runtime", lambda: _StubRuntime())
+
+    # Completion work runs on an executor of the test's own event loop
+    monkeypatch.setattr(completions, "executor", JobExecutor(max_concurrent_jobs=2))
+
+    def run(job_id: str):
+        return sagemaker_client.SageMakerClient().invoke_async(job_id, "s3://t/train", "s3://t/predict", "s3://t/out")
+
+    return run
+
+
+def _tracked(tracker: CompletionTracker, response: dict, done: list, job_id: str):
+    async def on_done(output_key, failure):
+        done.append((job_id, output_key, failure))
+
+    tracker.track(job_id, response["OutputLocation"], response["FailureLocation"], on_done)
+
+
+def test_output_and_failure_locations_complete_their_jobs(invoke):
+    async def run():
+        tracker = CompletionTracker(initial_delay=0.01, max_delay=0.02, timeout=10.0)
+        done = []
+
+        ok, failing = invoke("job-ok"), invoke("job-failing")
+        _tracked(tracker, ok, done, "job-ok")
+        _tracked(tracker, failing, done, "job-failing")
+
+        await asyncio.sleep(0.05)
+        assert done == [] and tracker.outstanding() == 2
+
+        store = get_store()
+        store.put(key_from_uri(failing["FailureLocation"]), b"model exploded", content_type="text/plain")
+        store.put(key_from_uri(ok["OutputLocation"]), b"distance_along,predicted_value\n", content_type="text/csv")
+
+        for _ in range(100):
+            if len(done) == 2:
+                break
+            await asyncio.sleep(0.01)
+
+        assert sorted(done) == [
+            ("job-failing", None, "model exploded"),
+            ("job-ok", key_from_uri(ok["OutputLocation"]), None),
+        ]
+        metrics = tracker.metrics()
+        assert (metrics["outstanding"], metrics["completed"], metrics["failed"]) == (0, 1, 1)
+        await tracker.shutdown()
+
+    asyncio.run(run())
+
+
+def test_checks_back_off_up_to_the_maximum_then_time_out(invoke):
+    async def run():
+        tracker = CompletionTracker(initial_delay=0.01, max_delay=0.08, timeout=1.0)
+        done = []
+
+        _tracked(tracker, invoke("job-slow"), done, "job-slow")
+        inv = tracker._pending["job-slow"]
+        delays = [inv.delay]
+
+        while not done:
+            await asyncio.sleep(0.002)
+            if inv.delay != delays[-1]:
+                delays.append(inv.delay)
+                # Full jitter: the next check is within [delay / 2, delay]
+                assert inv.next_check - time.monotonic() <= inv.delay
+
+        assert delays == [0.01, 0.02, 0.04, 0.08]
+        assert inv.checks >= 6
+        assert done == [("job-slow", None, "Inference timed out after 1s")]
+        await tracker.shutdown()
+
+    asyncio.run(run())
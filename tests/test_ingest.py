@@ -0,0 +1,111 @@
+# tests/test_ingest.py
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.core.ingest import ChunkStream, ColumnarCsvParser, CsvValidationError
+
+
+def _parse(text: str, **columns):
+    data = text.encode("utf-8")
+
+    # Small chunks, so rows straddle chunk boundaries
+    def stream():
+        return ChunkStream(data[i:i + 7] for i in range(0, len(data), 7))
+
+    parser = ColumnarCsvParser(x_col="x", y_col="y", value_col="values", **columns)
+    return parser.parse(stream(), stream)
+
+
+def _errors(text: str, **columns):
+    with pytest.raises(CsvValidationError) as exc:
+        _parse(text, **columns)
+    return [(e["line"], e["column"], e["error"]) for e in exc.value.errors], exc.value
+
+
+def test_nan_and_empty_values_are_not_measured():
+    traverse = _parse("x,y,values\n0,0,1.5\n1,0,NaN\n2,0,\n3,0,nan\n")
+
+    np.testing.assert_array_equal(traverse.value[:1], [1.5])
+    assert np.isnan(traverse.value[1:]).all()
+    np.testing.assert_array_equal(traverse.has_value, [True, False, False, False])
+
+
+def test_bad_coordinates_and_values_are_reported_by_file_line():
+    errors, exc = _errors(
+        "\n"                     # line 1: blank, skipped before the header
+        "x,y,values\n"           # line 2
+        "0,0,1\n"
+        "NaN,0,2\n"              # line 4
+        "\n"                     # line 5: blank, not a row
+        "2,inf,3\n"              # line 6
+        ",3,4\n"                 # line 7
+        "4,4,-Infinity\n"        # line 8
+    )
+
+    assert errors == [
+        (4, "x", "missing coordinate"),
+        (6, "y", "coordinate is not finite"),
+        (7, "x", "missing coordinate"),
+        (8, "values", "value is not finite"),
+    ]
+    assert exc.count == 4
+    assert "line 4, column 'x': missing coordinate ('nan')" in str(exc)
+
+
+def test_unparseable_cells_are_reported_by_file_line():
+    errors, _ = _errors("x,y,values\n0,0,1\n1,0,abc\n2,zero,3\n3,0,4\n")
+
+    assert errors == [
+        (3, "values", "not a number"),
+        (4, "y", "not a number"),
+    ]
+
+
+def test_duplicate_stations_are_reported_per_line():
+    errors, _ = _errors("x,y,values\n0,0,1\n1,1,2\n0,0,3\n2,2,4\n1,1,5\n")
+    assert errors == [(4, "x,y", "duplicate station"), (6, "x,y", "duplicate station")]
+
+    # The same coordinates on another survey line are a different station
+    traverse = _parse("line,x,y,values\nA,0,0,1\nB,0,0,2\n", line_col="line")
+    assert len(traverse) == 2
+
+    errors, _ = _errors("line,x,y,values\nA,0,0,1\nB,0,0,2\n A ,0,0,3\n", line_col="line")
+    assert errors == [(4, "x,y", "duplicate station")]
+
+
+def test_is_measured_spellings():
+    traverse = _parse(
+        "x,y,values,is_measured\n"
+        "0,0,1,TRUE\n1,0,2,FALSE\n2,0,3,true\n3,0,4,False\n4,0,5,yes\n5,0,6,0\n6,0,7,\n7,0,8,Y\n"
+    )
+    np.testing.assert_array_equal(traverse.is_measured, [True, False, True, False, True, False, False, True])
+
+    errors, _ = _errors("x,y,values,is_measured\n0,0,1,TRUE\n1,0,2,maybe\n")
+    assert errors == [(3, "is_measured", "not a boolean")]
+
+
+def test_only_requested_columns_are_read():
+    # An unparseable column that is not requested is never converted
+    traverse = _parse("x,notes,y,values,grad\n0,n/a,0,1,0.5\n1,??,0,2,0.25\n", channels=["grad"])
+
+    assert traverse.value_cols == ["values", "grad"]
+    assert "notes" not in traverse.extras
+    np.testing.assert_array_equal(traverse.channel("grad"), [0.5, 0.25])
+
+    with pytest.raises(ValueError, match="CSV is missing column 'grad'"):
+        _parse("x,y,values\n0,0,1\n", channels=["grad"])
+
+
+def test_error_reports_are_capped(monkeypatch):
+    monkeypatch.setattr(settings, "ingest_max_error_reports", 5)
+
+    text = "x,y,values\n" + "".join(f"{i},0,inf\n" for i in range(8)) + "1,2\n" * 3
+    errors, exc = _errors(text)
+
+    # Every problem counts; only the first five are reported
+    assert exc.count == 11 and len(errors) == 5
+    assert errors[:2] == [(2, "values", "value is not finite"), (3, "values", "value is not finite")]
+    assert [line for line, _, error in errors if error == "wrong number of fields"] == [10, 11, 12]
+    assert "(and 8 more)" in str(exc)
@@ -0,0 +1,103 @@
+# tests/test_job_index.py
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.core.job_index import JobIndex
+from app.core.job_store import MemoryBackend
+
+from conftest import submit, survey_csv, wait
+
+
+@pytest.fixture
+def fresh_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "job_index_sync_seconds", 0.0)
+
+    def make():
+        return JobIndex(str(tmp_path / f"{uuid.uuid4().hex}.sqlite3"))
+
+    return make
+
+
+def _record(job_id, status, created_at, updated_at=None):
+    return {"job_id": job_id, "status": status, "created_at": created_at, "updated_at": updated_at or created_at}
+
+
+def _window(year):
+    # Each test uses its own year, apart from jobs other tests published
+    return {"created_after": datetime(year, 1, 1), "created_before": datetime(year + 1, 1, 1)}
+
+
+def test_listing_filters_and_pages(fresh_index):
+    index = fresh_index()
+    for i in range(5):
+        index.record(_record(f"list-{i}", "completed" if i % 2 else "failed", f"2001-01-0{i + 1}T00:00:00"))
+
+    page = index.list_jobs(limit=2, **_window(2001))
+    assert [job["job_id"] for job in page["jobs"]] == ["list-4", "list-3"]
+
+    page = index.list_jobs(limit=2, cursor=page["next_cursor"], **_window(2001))
+    assert [job["job_id"] for job in page["jobs"]] == ["list-2", "list-1"]
+
+    page = index.list_jobs(limit=2, cursor=page["next_cursor"], **_window(2001))
+    assert [job["job_id"] for job in page["jobs"]] == ["list-0"]
+    assert page["next_cursor"] is None
+
+    failed = index.list_jobs(status=["failed"], **_window(2001))
+    assert [job["job_id"] for job in failed["jobs"]] == ["list-4", "list-2", "list-0"]
+
+    with pytest.raises(ValueError):
+        index.list_jobs(cursor="not a cursor")
+
+
+def test_instances_share_status_changes(fresh_index):
+    first, second = fresh_index(), fresh_index()
+
+    first.record(_record("shared", "running", "2002-01-01T00:00:00"))
+    first.record(_record("shared", "completed", "2002-01-01T00:00:00", "2002-01-01T00:05:00"))
+
+    jobs = second.list_jobs(**_window(2002))["jobs"]
+    assert [(job["job_id"], job["status"]) for job in jobs] == [("shared", "completed")]
+
+    # An older entry applied later does not win
+    second.record(_record("shared", "running", "2002-01-01T00:00:00", "2002-01-01T00:01:00"))
+    assert first.list_jobs(**_window(2002))["jobs"][0]["status"] == "completed"
+
+
+def test_fresh_instance_starts_from_snapshot(fresh_index, monkeypatch):
+    monkeypatch.setattr(settings, "job_index_snapshot_every", 1)
+    writer = fresh_index()
+    writer.record(_record("snap", "completed", "2003-01-01T00:00:00"))
+    writer.sync()
+
+    reader = fresh_index()
+    assert [job["job_id"] for job in reader.list_jobs(**_window(2003))["jobs"]] == ["snap"]
+
+
+def test_backfill_indexes_existing_records_once(fresh_index):
+    backend = MemoryBackend()
+    backend.write("old-1", _record("old-1", "completed", "2004-01-01T00:00:00"), create=True)
+    backend.write("old-2", _record("old-2", "failed", "2004-02-01T00:00:00"), create=True)
+    backend.write("untimed", {"job_id": "untimed", "status": "completed"}, create=True)
+
+    index = fresh_index()
+    index.backfill(backend.records())
+    assert [job["job_id"] for job in index.list_jobs(**_window(2004))["jobs"]] == ["old-2", "old-1"]
+
+    backend.write("old-3", _record("old-3", "completed", "2004-04-01T00:00:00"), create=True)
+    index.backfill(backend.records())
+    assert len(index.list_jobs(**_window(2004))["jobs"]) == 2
+
+
+def test_get_jobs_lists_submitted_jobs(client, tmp_path):
+    job_id = submit(client, survey_csv(tmp_path / "survey.csv", 30)).json()["job_id"]
+    wait(client, job_id)
+
+    response = client.get("/jobs", params={"status": "completed", "limit": 500})
+    assert response.status_code == 200
+    assert job_id in [job["job_id"] for job in response.json()["jobs"]]
+
+    assert client.get("/jobs", params={"cursor": "bogus"}).status_code == 400
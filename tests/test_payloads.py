@@ -0,0 +1,78 @@
+# tests/test_payloads.py
+
+import numpy as np
+import pytest
+
+from app.core import inference, payloads
+from app.core.clients import get_runtime
+from app.core.config import settings
+from app.core.fake_endpoint import FakeSageMakerRuntime
+from app.core.local_inference import predict_local
+
+from conftest import result_rows, submit, survey_csv, wait
+
+
+def _channels(n: int):
+    rng = np.random.default_rng(3)
+    d = np.cumsum(rng.uniform(5.0, 40.0, n))
+    values = np.column_stack([30000.0 + 50.0 * np.sin(d / 300.0), np.cos(d / 300.0)])
+    values[::5, 1] = np.nan
+    return d, values
+
+
+@pytest.mark.parametrize("fmt", payloads.ENCODINGS)
+def test_multi_channel_request_round_trips(fmt):
+    train_d, train_v = _channels(40)
+    predict_d = train_d[:-1] + 1.0
+
+    body = payloads.encode_request(train_d, train_v, predict_d, fmt, ["values", "grad"])
+    if fmt != payloads.JSON_GZIP:
+        assert len(body) <= payloads.request_size(40, 39, fmt, ["values", "grad"])
+
+    d, v, p, channels = payloads.decode_request(body, payloads.request_content_type(fmt, ["values", "grad"]))
+    np.testing.assert_array_equal(d, train_d)
+    np.testing.assert_array_equal(v, train_v)
+    np.testing.assert_array_equal(p, predict_d)
+    assert len(channels) == 2
+
+
+@pytest.mark.parametrize("fmt", payloads.ENCODINGS)
+def test_predict_values_sends_every_channel_per_chunk(fmt):
+    train_d, train_v = _channels(60)
+    predict_d = np.linspace(train_d[0], train_d[-1], 500)
+    runtime = FakeSageMakerRuntime()
+    max_bytes = payloads.request_size(60, 200, fmt, ["values", "grad"])
+
+    values = inference.predict_values(
+        train_d, train_v, predict_d,
+        payload_format=fmt, max_payload_bytes=max_bytes, concurrency=2, runtime=runtime, channels=["values", "grad"],
+    )
+
+    # One call per chunk, not per chunk and channel
+    assert runtime.invocations == 3
+    np.testing.assert_allclose(
+        values, predict_local(train_d, train_v, predict_d, settings.sagemaker_endpoint_model), rtol=0, atol=1e-9
+    )
+
+
+def test_realtime_job_makes_one_call_for_all_channels(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "inference_backend", "realtime")
+    path = survey_csv(tmp_path / "survey.csv", 120)
+
+    runtime = get_runtime()
+    before = runtime.invocations
+    job_id = submit(client, path, value_column=["values", "grad"]).json()["job_id"]
+    status = wait(client, job_id)
+    assert status["status"] == "completed" and status["inference"]["backend"] == "realtime"
+    assert runtime.invocations - before == 1
+
+    monkeypatch.setattr(settings, "inference_backend", "local")
+    local_id = submit(client, path, value_column=["values", "grad"]).json()["job_id"]
+    wait(client, local_id)
+
+    for channel in ("values", "grad"):
+        np.testing.assert_allclose(
+            result_rows(client, job_id, channel=channel)[1],
+            result_rows(client, local_id, channel=channel)[1],
+            rtol=0, atol=1e-9,
+        )
@@ -0,0 +1,71 @@
+# tests/test_result_cache.py
+
+import pytest
+
+from app.core.config import settings
+from app.core.result_cache import result_cache
+
+from conftest import submit, survey_csv, wait
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(settings, "result_cache_enabled", True)
+    return result_cache
+
+
+def test_identical_submission_reuses_the_job(client, tmp_path, cache):
+    path = survey_csv(tmp_path / "survey.csv", 80, seed=11)
+    hits = cache.metrics()["hits"]
+
+    first = submit(client, path).json()
+    assert "cached" not in first
+    assert wait(client, first["job_id"])["status"] == "completed"
+
+    again = submit(client, path).json()
+    assert again == {"job_id": first["job_id"], "status": "completed", "cached": True}
+    assert cache.metrics()["hits"] == hits + 1
+
+
+def test_other_parameters_or_bytes_miss(client, tmp_path, cache):
+    path = survey_csv(tmp_path / "survey.csv", 80, seed=12)
+    job_id = submit(client, path).json()["job_id"]
+    wait(client, job_id)
+
+    other_spacing = submit(client, path, station_spacing="20").json()
+    assert other_spacing["job_id"] != job_id and "cached" not in other_spacing
+
+    # One more station: other bytes
+    other_bytes = submit(client, survey_csv(tmp_path / "more.csv", 81, seed=12)).json()
+    assert other_bytes["job_id"] != job_id and "cached" not in other_bytes
+
+    wait(client, other_spacing["job_id"])
+    wait(client, other_bytes["job_id"])
+
+
+def test_expired_alias_is_a_miss(client, tmp_path, cache, monkeypatch):
+    path = survey_csv(tmp_path / "survey.csv", 80, seed=13)
+
+    # Aliases written now have already expired on their next read
+    monkeypatch.setattr(cache, "ttl_seconds", 0.0)
+    job_id = submit(client, path).json()["job_id"]
+    wait(client, job_id)
+
+    expirations = cache.metrics()["expirations"]
+    again = submit(client, path).json()
+    assert again["job_id"] != job_id and "cached" not in again
+    assert cache.metrics()["expirations"] > expirations
+
+    wait(client, again["job_id"])
+
+
+def test_failed_job_is_not_reused(client, tmp_path, cache):
+    path = tmp_path / "bad.csv"
+    path.write_text("x,y,values\n0,0,1\n1,0,abc\n2,0,3\n")
+
+    job_id = submit(client, path).json()["job_id"]
+    assert wait(client, job_id)["status"] == "failed"
+
+    again = submit(client, path).json()
+    assert again["job_id"] != job_id and "cached" not in again
+    assert wait(client, again["job_id"])["status"] == "failed"
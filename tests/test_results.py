@@ -0,0 +1,120 @@
+# tests/test_results.py
+
+import uuid
+
+import numpy as np
+import pytest
+
+from app.core import results
+from app.core.config import settings
+from app.core.decimate import decimate
+from app.core.storage import get_store
+from app.core.traverse import Traverse
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "result_chunk_rows", 10)
+    monkeypatch.setattr(settings, "result_chunk_bytes", 2048)
+
+
+def _merged(d: np.ndarray) -> Traverse:
+    return Traverse.from_arrays(
+        d, np.zeros_like(d), 30000.0 + d, d_along=d, is_measured=np.arange(d.shape[0]) % 3 == 0
+    )
+
+
+def _read(job_id, d_from=None, d_to=None):
+    batches = list(results.open_result(job_id).batches(d_from, d_to))
+    if not batches:
+        return np.empty(0), np.empty(0), np.empty(0, dtype=bool)
+    return tuple(np.concatenate(cols) for cols in zip(*batches))
+
+
+def test_window_reads_at_chunk_boundaries(small_chunks):
+    job_id = f"test-{uuid.uuid4().hex}"
+    d = np.arange(95, dtype=float) * 2.5
+    results.write_result(job_id, _merged(d))
+
+    index = results.open_result(job_id).index
+    assert index["rows"] == 95 and len(index["chunks"]) == 10
+
+    edges = [(c["d_min"], c["d_max"]) for c in index["chunks"]]
+    windows = [
+        (None, None),
+        (edges[3][0], edges[3][1]),          # exactly one chunk
+        (edges[3][1], edges[4][0]),          # last row of one, first of the next
+        (edges[2][1] + 0.1, edges[5][0] - 0.1),
+        (edges[-1][1], None),
+        (None, edges[0][0]),
+        (d[-1] + 1.0, None),                 # past the end
+    ]
+
+    for d_from, d_to in windows:
+        got_d, got_v, got_m = _read(job_id, d_from, d_to)
+        mask = np.ones(d.shape[0], dtype=bool)
+        if d_from is not None:
+            mask &= d >= d_from
+        if d_to is not None:
+            mask &= d <= d_to
+
+        np.testing.assert_array_equal(got_d, d[mask])
+        np.testing.assert_array_equal(got_v, 30000.0 + d[mask])
+        np.testing.assert_array_equal(got_m, (np.arange(95) % 3 == 0)[mask])
+
+
+def test_split_offset_keeps_prefix_on_rewrite(small_chunks):
+    job_id = f"test-{uuid.uuid4().hex}"
+    d = np.arange(60, dtype=float)
+    _, offset = results.write_result(job_id, _merged(d), split_at=33.0)
+
+    # Rewrite from the split on with new values; the prefix is copied
+    tail = _merged(d[33:])
+    tail.value = tail.value + 1.0
+    results.write_result(job_id, tail, keep_bytes=offset)
+
+    got_d, got_v, _ = _read(job_id)
+    np.testing.assert_array_equal(got_d, d)
+    np.testing.assert_array_equal(got_v, 30000.0 + d + (d >= 33.0))
+
+
+def test_legacy_csv_result_is_served():
+    job_id = f"test-{uuid.uuid4().hex}"
+    d = np.arange(40, dtype=float)
+    body = results.CSV_HEADER + "".join(
+        f"{di!r},{30000.0 + di!r},{'measured' if di % 2 else 'predicted'}\n" for di in d.tolist()
+    )
+    get_store().put(f"jobs/{job_id}/output/{results.LEGACY_RESULT_NAME}", body.encode(), content_type="text/csv")
+
+    reader = results.open_result(job_id)
+    assert isinstance(reader, results.LegacyResultReader)
+
+    got_d, got_v, got_m = _read(job_id, 10.0, 20.0)
+    np.testing.assert_array_equal(got_d, d[10:21])
+    np.testing.assert_array_equal(got_v, 30000.0 + d[10:21])
+    np.testing.assert_array_equal(got_m, d[10:21] % 2 == 1)
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_streamed_decimation_keeps_the_in_memory_rows(small_chunks, method):
+    job_id = f"test-{uuid.uuid4().hex}"
+    rng = np.random.default_rng(4)
+    d = np.cumsum(rng.uniform(0.5, 3.0, 237))
+    merged = _merged(d)
+    merged.value = np.sin(d / 7.0) + rng.normal(0.0, 0.2, 237)
+    results.write_result(job_id, merged)
+
+    reader = results.open_result(job_id)
+    for d_from, d_to in [(None, None), (d[13] + 0.1, d[181] - 0.1), (d[40], d[52])]:
+        got_d, got_v, got_m = _read(job_id, d_from, d_to)
+        assert reader.count(d_from, d_to) == got_d.shape[0]
+
+        for max_points in (2, 3, 7, 50, got_d.shape[0] - 1, 1000):
+            batches = list(results.decimate_batches(reader, d_from, d_to, max_points, method))
+            keep = decimate(got_d, got_v, max_points, method)
+            assert all(len(batch[0]) for batch in batches)
+
+            d_kept, v_kept, m_kept = (np.concatenate(cols) for cols in zip(*batches))
+            np.testing.assert_array_equal(d_kept, got_d[keep])
+            np.testing.assert_array_equal(v_kept, got_v[keep])
+            np.testing.assert_array_equal(m_kept, got_m[keep])
@@ -0,0 +1,51 @@
+# tests/test_split.py
+
+import numpy as np
+
+from app.core.csv_splitter import split_train_predict
+from app.core.traverse import Traverse
+
+
+def _explicit(values, grad, flags) -> Traverse:
+    d = np.arange(len(values), dtype=float) * 10.0
+    return Traverse.from_arrays(
+        d,
+        np.zeros_like(d),
+        np.array(values, dtype=float),
+        value_col="values",
+        d_along=d,
+        is_measured=np.array(flags),
+        channels={"grad": np.array(grad, dtype=float)},
+    )
+
+
+def test_explicit_split_keeps_the_is_measured_flag():
+    nan = np.nan
+    traverse = _explicit(
+        values=[1.0, 2.0, nan, 4.0, nan],
+        grad=[0.1, nan, 0.3, 0.4, nan],
+        flags=[True, True, True, False, False],
+    )
+
+    train, predict = split_train_predict(traverse, value_col="values", measured_per_channel=True)
+
+    # A station flagged FALSE never trains, even with values
+    np.testing.assert_array_equal(train.d_along, [0.0, 10.0, 20.0])
+
+    # Flagged stations missing a channel are predicted for that channel
+    np.testing.assert_array_equal(predict.d_along, [10.0, 20.0, 40.0])
+    np.testing.assert_array_equal(np.isnan(predict.channel("values")), [False, True, True])
+    np.testing.assert_array_equal(np.isnan(predict.channel("grad")), [True, False, True])
+
+
+def test_single_channel_split_keeps_the_is_measured_flag():
+    traverse = _explicit(
+        values=[1.0, np.nan, 3.0, np.nan],
+        grad=[0.0] * 4,
+        flags=[True, True, False, False],
+    ).for_channel("values")
+
+    train, predict = split_train_predict(traverse, value_col="values", measured_per_channel=True)
+
+    np.testing.assert_array_equal(train.d_along, [0.0])
+    np.testing.assert_array_equal(predict.d_along, [10.0, 30.0])
@@ -0,0 +1,140 @@
+# tests/test_uploads.py
+
+import hashlib
+
+import pytest
+
+from app.core import uploads
+from app.core.config import settings
+from app.core.s3_io import raw_csv_key
+from app.core.storage import get_store
+
+from conftest import survey_csv, wait
+
+
+FORM = {
+    "scenario": "sparse",
+    "x_column": "x",
+    "y_column": "y",
+    "value_column": "values",
+    "station_spacing": "10",
+}
+
+
+@pytest.fixture
+def small_parts(monkeypatch):
+    monkeypatch.setattr(uploads, "MIN_PART_BYTES", 1024)
+    monkeypatch.setattr(settings, "upload_part_bytes", 1024)
+
+
+@pytest.fixture
+def data(tmp_path) -> bytes:
+    with open(survey_csv(tmp_path / "survey.csv", 200), "rb") as f:
+        return f.read()
+
+
+def _initiate(client, data: bytes, **body) -> dict:
+    response = client.post("/uploads", json={"filename": "survey.csv", "size": len(data), **body})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _put(client, session: dict, offset: int, body: bytes, checksum: str = None):
+    return client.put(
+        f"/uploads/{session['upload_id']}",
+        params={"offset": offset},
+        content=body,
+        headers={"X-Checksum-SHA256": checksum or hashlib.sha256(body).hexdigest()},
+    )
+
+
+def _offsets(session: dict):
+    return [i * session["part_size"] for i in range(session["parts"])]
+
+
+def _part(session: dict, data: bytes, offset: int) -> bytes:
+    return data[offset:offset + session["part_size"]]
+
+
+def test_parts_in_any_order_assemble_the_file(client, small_parts, data):
+    session = _initiate(client, data)
+    assert session["part_size"] == 1024 and session["parts"] == -(-len(data) // 1024) > 2
+
+    # Out of order, and the first part twice: sending again replaces it
+    for offset in [*reversed(_offsets(session)), 0]:
+        assert _put(client, session, offset, _part(session, data, offset)).status_code == 200
+
+    status = client.get(f"/uploads/{session['upload_id']}").json()
+    assert status["missing"] == [] and len(status["received"]) == session["parts"]
+
+    response = client.post(f"/uploads/{session['upload_id']}/complete", data=FORM)
+    assert response.status_code == 202, response.text
+    job_id = response.json()["job_id"]
+    assert job_id == session["job_id"]
+
+    assert wait(client, job_id)["status"] == "completed"
+    assert get_store().get(raw_csv_key(job_id)) == data
+
+
+def test_bad_parts_are_refused(client, small_parts, data):
+    session = _initiate(client, data)
+    part = _part(session, data, 0)
+
+    response = _put(client, session, 0, part, checksum="0" * 64)
+    assert response.status_code == 400 and "Checksum mismatch" in response.json()["detail"]
+
+    assert _put(client, session, 1, data[1:1025]).status_code == 400      # not on a part boundary
+    assert _put(client, session, len(data) + 1024, part).status_code == 400
+    assert _put(client, session, 0, part[:-1]).status_code == 400         # short part
+
+    status = client.get(f"/uploads/{session['upload_id']}").json()
+    assert status["received"] == [] and status["missing"] == _offsets(session)
+
+
+def test_missing_part_blocks_complete(client, small_parts, data):
+    session = _initiate(client, data)
+    skipped = _offsets(session)[1]
+    for offset in _offsets(session):
+        if offset != skipped:
+            _put(client, session, offset, _part(session, data, offset))
+
+    assert client.get(f"/uploads/{session['upload_id']}").json()["missing"] == [skipped]
+
+    response = client.post(f"/uploads/{session['upload_id']}/complete", data=FORM)
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"1 of {session['parts']} parts are missing"
+
+    # Resumed: the missing part, then complete
+    _put(client, session, skipped, _part(session, data, skipped))
+    assert client.post(f"/uploads/{session['upload_id']}/complete", data=FORM).status_code == 202
+
+    # A completed session takes no more parts and completes only once
+    assert client.post(f"/uploads/{session['upload_id']}/complete", data=FORM).status_code == 409
+    assert _put(client, session, 0, _part(session, data, 0)).status_code == 409
+    assert client.delete(f"/uploads/{session['upload_id']}").status_code == 409
+    assert client.get(f"/uploads/{session['upload_id']}").json()["status"] == "completed"
+
+    wait(client, session["job_id"])
+
+
+def test_abort_removes_the_session(client, small_parts, data):
+    session = _initiate(client, data)
+    _put(client, session, 0, _part(session, data, 0))
+
+    assert client.delete(f"/uploads/{session['upload_id']}").status_code == 204
+    assert client.get(f"/uploads/{session['upload_id']}").status_code == 404
+    assert client.get("/uploads/not-an-upload").status_code == 404
+
+
+def test_declared_sha256_is_checked_by_the_job(client, small_parts, data):
+    response = client.post("/uploads", json={"filename": "survey.csv", "size": len(data), "sha256": "abc"})
+    assert response.status_code == 400
+
+    session = _initiate(client, data, sha256=hashlib.sha256(data + b"\n").hexdigest())
+    for offset in _offsets(session):
+        _put(client, session, offset, _part(session, data, offset))
+
+    job_id = client.post(f"/uploads/{session['upload_id']}/complete", data=FORM).json()["job_id"]
+    status = wait(client, job_id)
+    assert status["status"] == "failed"
+    assert "does not match the SHA-256 declared" in status["message"]